@@ -0,0 +1,295 @@
+"""
+Change-driven adaptive rescans (nmap).
+
+Each target is put in one of three groups, from what the store already
+knows about it:
+
+    deep    a scan with the configured nmap arguments: targets never deep
+            scanned or not for `deep_every`, hostnames / nmap ranges, and
+            hosts that changed recently (per the history index)
+    quick   only the host's known open ports, for stable hosts not seen for
+            `quick_every`; a host whose quick check differs from the latest
+            snapshot is deep scanned in the same run
+    carry   stable hosts seen recently: copied from the latest nmap snapshot
+            as they are, last_seen included
+
+so the new snapshot still covers every target while most of them cost a
+few probes or nothing. The time of the last deep scan and of the last check
+(deep or quick) of every target are kept in <store>/.meta/adaptive.json,
+not read from snapshot timestamps (carried forward and delta snapshots
+restamp last_seen). The deep scan times also stop addresses that were down
+from being deep scanned on every run.
+"""
+import ipaddress
+import json
+import os
+import shlex
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from attackdiff import metrics
+from attackdiff.asset import Asset
+from attackdiff.scanners.nmap import NmapScanner, expand_targets
+from attackdiff.storage import SnapshotStorage
+
+
+STATE_NAME = "adaptive.json"
+
+# nmap options selecting the ports to scan (replaced by -p on quick checks)
+_PORT_OPTIONS = ("-p", "--top-ports", "--port-ratio")
+_PORT_FLAGS = ("-F",)
+
+
+def _parse_time(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _is_address(target: str) -> bool:
+    try:
+        ipaddress.ip_address(target)
+    except ValueError:
+        return False
+    return True
+
+
+def quick_args(extra_args: str, ports) -> str:
+    """`extra_args` with its port selection replaced by `-p <ports>`."""
+    kept = []
+    args = iter(shlex.split(extra_args))
+
+    for arg in args:
+        if arg in _PORT_OPTIONS:
+            next(args, None)
+            continue
+        if arg in _PORT_FLAGS or any(arg.startswith(o + "=") for o in _PORT_OPTIONS[1:]):
+            continue
+        if arg.startswith("-p") and len(arg) > 2 and not arg[2].isalpha():
+            continue  # -p80,443 / -p- / -p:
+        if arg.startswith("-pT:") or arg.startswith("-pU:") or arg.startswith("-pS:"):
+            continue
+        kept.append(arg)
+
+    kept += ["-p", ",".join(str(p) for p in sorted(ports))]
+    return shlex.join(kept)
+
+
+class AdaptiveScan:
+    """
+    Scanner-like wrapper around NmapScanner: scan(targets) returns the assets
+    of the full snapshot, failed_shards the shards nmap could not scan (their
+    known hosts are carried forward).
+    """
+
+    def __init__(
+        self,
+        storage: SnapshotStorage,
+        scanner: NmapScanner,
+        deep_every: timedelta = timedelta(days=7),
+        quick_every: timedelta = timedelta(hours=24),
+        volatile_changes: int = 1,
+        volatile_window: int = 10
+    ):
+        if volatile_changes < 1:
+            raise ValueError("--volatile-changes must be >= 1")
+        if volatile_window < 2:
+            raise ValueError("--volatile-window must be >= 2")
+
+        self.storage = storage
+        self.scanner = scanner
+        self.deep_every = deep_every
+        self.quick_every = quick_every
+        self.volatile_changes = volatile_changes
+        self.volatile_window = volatile_window
+
+        self.state_path = storage.base_path / ".meta" / STATE_NAME
+        self.last_deep, self.last_checked = self._load_state()
+        self.failed_shards: list[tuple[int, list[str], str]] = []
+
+        # filled by scan()
+        self.plan: Dict[str, list] = {}
+        self.reasons: Dict[str, int] = {}
+        self.escalated: List[str] = []
+
+    # -------------------------------
+    # State
+    # -------------------------------
+
+    def _load_state(self) -> tuple:
+        """({target: last deep scan}, {target: last deep or quick check})."""
+        try:
+            with open(self.state_path, "r") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return {}, {}
+        except ValueError:
+            print(f"[!] Ignoring unreadable {self.state_path}, every target will be deep scanned")
+            return {}, {}
+
+        if "deep" not in state:
+            # deep scan times only (first version of the file)
+            return state, dict(state)
+        return state["deep"], state.get("checked", {})
+
+    def save_state(self) -> None:
+        """Persist the deep scan and check times (after the snapshot is saved)."""
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+
+        with open(tmp, "w") as f:
+            json.dump(
+                {"deep": self.last_deep, "checked": self.last_checked},
+                f, separators=(",", ":"), sort_keys=True
+            )
+        os.replace(tmp, self.state_path)
+
+    # -------------------------------
+    # Planning
+    # -------------------------------
+
+    def _previous(self) -> tuple:
+        """
+        (assets, timestamp) of the latest snapshot nmap took part in: those
+        of other scanners (subfinder, plugins) say nothing about the targets.
+        """
+        for entry in reversed(self.storage.snapshot_entries()):
+            if "error" in entry:
+                continue
+            if "nmap" in (entry.get("scanner") or "").split(","):
+                return self.storage.load_snapshot(entry["path"]), _parse_time(entry.get("timestamp"))
+        return {}, None
+
+    def _volatile(self) -> set:
+        try:
+            changes = self.storage.history.recent_changes(self.volatile_window)
+        except Exception as e:
+            print(f"[!] History index unavailable ({e}), change frequency not used")
+            return set()
+        return {host for host, count in changes.items() if count >= self.volatile_changes}
+
+    def make_plan(
+        self,
+        targets: List[str],
+        previous: Dict[str, Asset],
+        now: datetime,
+        previous_time: datetime | None = None
+    ) -> Dict[str, list]:
+        """
+        {"deep": [targets], "quick": [hosts], "carry": [hosts]}; counts per
+        reason in self.reasons. `previous` is the latest nmap snapshot, taken
+        at `previous_time`.
+        """
+        volatile = self._volatile()
+        plan = {"deep": [], "quick": [], "carry": []}
+        reasons = dict.fromkeys(("new", "stale", "volatile", "quick", "carry"), 0)
+
+        for target in dict.fromkeys(expand_targets(targets)):
+            if not _is_address(target):
+                # hostnames / nmap ranges: no stable id to plan on
+                plan["deep"].append(target)
+                reasons["new"] += 1
+                continue
+
+            last_deep = _parse_time(self.last_deep.get(target))
+            last_checked = _parse_time(self.last_checked.get(target)) or last_deep
+            known = previous.get(target)
+
+            if last_deep is None:
+                group, reason = "deep", "new"
+            elif now - last_deep >= self.deep_every:
+                group, reason = "deep", "stale"
+            elif target in volatile:
+                group, reason = "deep", "volatile"
+            elif known is None:
+                if previous_time is not None and last_deep <= previous_time:
+                    continue  # down at its last deep scan, which `previous` has
+                group, reason = "deep", "new"
+            elif known.ports and now - last_checked >= self.quick_every:
+                group, reason = "quick", "quick"
+            else:
+                group, reason = "carry", "carry"
+
+            plan[group].append(target)
+            reasons[reason] += 1
+
+        self.reasons = reasons
+        return plan
+
+    # -------------------------------
+    # Scanning
+    # -------------------------------
+
+    def _run(self, scanner: NmapScanner, targets: List[str]) -> Dict[str, Asset]:
+        if not targets:
+            return {}
+
+        assets = scanner.scan(targets=targets)
+        self.failed_shards += scanner.failed_shards
+        return assets
+
+    def scan(self, targets: List[str]) -> Dict[str, Asset]:
+        now = datetime.now(timezone.utc)
+        with metrics.phase("adaptive.plan") as p:
+            previous, previous_time = self._previous()
+            plan = self.plan = self.make_plan(targets, previous, now, previous_time)
+            p.count(**{group: len(hosts) for group, hosts in plan.items()})
+        self.failed_shards = []
+
+        # ---- quick checks: the known ports of every stable host at once ----
+        quick = {}
+        if plan["quick"]:
+            ports = set()
+            for host in plan["quick"]:
+                ports.update(previous[host].ports)
+
+            quick_scanner = NmapScanner(
+                extra_args=quick_args(self.scanner.extra_args, ports),
+                workers=self.scanner.workers,
+                shard_size=self.scanner.shard_size
+            )
+            quick = self._run(quick_scanner, plan["quick"])
+
+        failed = {t for _, shard, _ in self.failed_shards for t in shard}
+
+        # a quick check that differs from the last snapshot gets a deep scan
+        self.escalated = [
+            host for host in plan["quick"]
+            if host not in failed
+            and (host not in quick or set(quick[host].ports) != set(previous[host].ports))
+        ]
+
+        # ---- deep scans ----
+        deep_targets = plan["deep"] + self.escalated
+        deep = self._run(self.scanner, deep_targets)
+        failed = {t for _, shard, _ in self.failed_shards for t in shard}
+
+        stamp = now.isoformat()
+        for target in deep_targets:
+            if target not in failed and _is_address(target):
+                self.last_deep[target] = stamp
+                self.last_checked[target] = stamp
+        for host in plan["quick"]:
+            if host not in failed:
+                self.last_checked[host] = stamp
+
+        # ---- merge: deep > quick > carried forward ----
+        assets = {}
+        for host in plan["carry"]:
+            assets[host] = previous[host]
+
+        # unscanned (failed shard) hosts still in the estate are carried forward
+        for host in failed:
+            if host in previous:
+                assets[host] = previous[host]
+
+        for host in plan["quick"]:
+            if host in quick and host not in self.escalated:
+                assets[host] = quick[host]
+
+        assets.update(deep)
+        return assets
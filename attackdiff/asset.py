@@ -1,12 +1,61 @@
+import sys
+import time
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Iterable, List, Optional
+
+
+# Canonical tuples shared by every asset with the same ports / services /
+# sources. Bounded so an unusual estate cannot grow it without limit.
+_SHARED_TUPLES: dict = {}
+_SHARED_TUPLES_MAX = 1 << 16
+
+
+def _shared_tuple(values: Optional[Iterable]) -> tuple:
+    """
+    Return an immutable tuple for `values`, reusing an identical one if it
+    was seen before (in any snapshot). Strings are interned.
+    """
+    if not values:
+        return ()
+
+    key = tuple(values)
+    shared = _SHARED_TUPLES.get(key)
+
+    if shared is None:
+        shared = tuple(sys.intern(v) if isinstance(v, str) else v for v in key)
+        if len(_SHARED_TUPLES) < _SHARED_TUPLES_MAX:
+            _SHARED_TUPLES[key] = shared
+
+    return shared
+
+
+def _isoformat(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
 
 
 class Asset:
     """
     Represents a single attack surface asset (host/IP) that may persist across scans.
+
+    Kept compact because snapshots hold hundreds of thousands of them:
+    no per-instance __dict__, ports / services / sources as immutable tuples
+    shared between assets (and snapshots) with the same values, interned
+    names, and first_seen/last_seen only formatted when read (assets loaded
+    from a snapshot never touch the clock).
     """
 
+    __slots__ = (
+        "id",
+        "host",
+        "ip",
+        "_ports",
+        "_services",
+        "_sources",
+        "_first_seen",
+        "_last_seen",
+        "_created",
+    )
+
     def __init__(
         self,
         host: str,
@@ -14,17 +63,69 @@ class Asset:
         ports: Optional[List[int]] = None,
         services: Optional[List[str]] = None,
         sources: Optional[List[str]] = None,
+        first_seen: Optional[str] = None,
+        last_seen: Optional[str] = None,
     ):
+        host = sys.intern(host)
         self.id = host                     # stable identifier
         self.host = host
-        self.ip = ip
-        self.ports = ports or []
-        self.services = services or []
-        self.sources = sources or []
+        self.ip = sys.intern(ip) if ip else ip
+        self.ports = ports
+        self.services = services
+        self.sources = sources
+
+        self._first_seen = first_seen
+        self._last_seen = last_seen
+        # creation time, turned into an ISO timestamp only if needed
+        self._created = time.time() if first_seen is None or last_seen is None else None
+
+    # -------------------------------
+    # Attributes
+    # -------------------------------
+
+    @property
+    def ports(self) -> tuple:
+        return self._ports
 
-        now = datetime.now(timezone.utc).isoformat()
-        self.first_seen = now
-        self.last_seen = now
+    @ports.setter
+    def ports(self, value: Optional[Iterable[int]]) -> None:
+        self._ports = _shared_tuple(value)
+
+    @property
+    def services(self) -> tuple:
+        return self._services
+
+    @services.setter
+    def services(self, value: Optional[Iterable[str]]) -> None:
+        self._services = _shared_tuple(value)
+
+    @property
+    def sources(self) -> tuple:
+        return self._sources
+
+    @sources.setter
+    def sources(self, value: Optional[Iterable[str]]) -> None:
+        self._sources = _shared_tuple(value)
+
+    @property
+    def first_seen(self) -> str:
+        if self._first_seen is None:
+            self._first_seen = _isoformat(self._created)
+        return self._first_seen
+
+    @first_seen.setter
+    def first_seen(self, value: str) -> None:
+        self._first_seen = value
+
+    @property
+    def last_seen(self) -> str:
+        if self._last_seen is None:
+            self._last_seen = _isoformat(self._created)
+        return self._last_seen
+
+    @last_seen.setter
+    def last_seen(self, value: str) -> None:
+        self._last_seen = value
 
     def update_seen(self) -> None:
         """Update last_seen when asset is observed again."""
@@ -37,9 +138,9 @@ class Asset:
         if other.ip:
             self.ip = other.ip
 
-        self.ports = sorted(set(self.ports + other.ports))
-        self.services = sorted(set(self.services + other.services))
-        self.sources = sorted(set(self.sources + other.sources))
+        self.ports = sorted(set(self.ports) | set(other.ports))
+        self.services = sorted(set(self.services) | set(other.services))
+        self.sources = sorted(set(self.sources) | set(other.sources))
         self.update_seen()
 
     def to_dict(self) -> dict:
@@ -48,9 +149,9 @@ class Asset:
             "id": self.id,
             "host": self.host,
             "ip": self.ip,
-            "ports": self.ports,
-            "services": self.services,
-            "sources": self.sources,
+            "ports": list(self._ports),
+            "services": list(self._services),
+            "sources": list(self._sources),
             "first_seen": self.first_seen,
             "last_seen": self.last_seen,
         }
@@ -58,15 +159,55 @@ class Asset:
     @classmethod
     def from_dict(cls, data: dict) -> "Asset":
         """Recreate Asset object from stored dictionary."""
-        asset = cls(
-            host=data["host"],
-            ip=data.get("ip"),
-            ports=data.get("ports", []),
-            services=data.get("services", []),
-            sources=data.get("sources", []),
+        first_seen = data.get("first_seen")
+        last_seen = data.get("last_seen")
+
+        if first_seen is None or last_seen is None:
+            return cls(
+                host=data["host"],
+                ip=data.get("ip"),
+                ports=data.get("ports", []),
+                services=data.get("services", []),
+                sources=data.get("sources", []),
+                first_seen=first_seen,
+                last_seen=last_seen,
+            )
+
+        return cls.restore(
+            data["host"],
+            data.get("ip"),
+            data.get("ports"),
+            data.get("services"),
+            data.get("sources"),
+            first_seen,
+            last_seen,
         )
-        asset.first_seen = data.get("first_seen", asset.first_seen)
-        asset.last_seen = data.get("last_seen", asset.last_seen)
-        return asset
 
+    @classmethod
+    def restore(
+        cls,
+        host: str,
+        ip: Optional[str],
+        ports: Optional[Iterable[int]],
+        services: Optional[Iterable[str]],
+        sources: Optional[Iterable[str]],
+        first_seen: str,
+        last_seen: str,
+    ) -> "Asset":
+        """
+        Rebuild a stored asset whose timestamps are both known.
+        Hot path of load_snapshot: fills the slots directly.
+        """
+        asset = cls.__new__(cls)
+        host = sys.intern(host)
 
+        asset.id = host
+        asset.host = host
+        asset.ip = sys.intern(ip) if ip else ip
+        asset._ports = _shared_tuple(ports)
+        asset._services = _shared_tuple(services)
+        asset._sources = _shared_tuple(sources)
+        asset._first_seen = first_seen
+        asset._last_seen = last_seen
+        asset._created = None
+        return asset
@@ -0,0 +1,313 @@
+"""
+Binary snapshot format, read through mmap.
+
+    header    magic, version, counts and section offsets (HEADER)
+    meta      snapshot metadata as UTF-8 JSON
+    strings   string table: (count + 1) u32 offsets, then the UTF-8 bytes
+    assets    one fixed-size RECORD per asset, sorted by id
+    ports     packed u16 port numbers
+    refs      packed u32 string table indices (services, sources)
+
+All integers are little-endian. The metadata, the asset count and any single
+asset (binary search on id) are read without decoding the rest of the file;
+strings are decoded once, on first use.
+"""
+import json
+import mmap
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator
+
+from attackdiff.asset import Asset
+
+
+SUFFIX = ".snap"
+
+MAGIC = b"ADSNAP\x00\x00"
+VERSION = 1
+
+# magic, version, reserved, asset count, string count, meta length,
+# meta / strings / assets / ports / refs offsets
+HEADER = struct.Struct("<8sHHIIIQQQQQ")
+
+# id, host, ip, first_seen, last_seen (string indices), ports start,
+# services start, sources start, ports / services / sources lengths
+RECORD = struct.Struct("<IIIIIIIIHHH2x")
+
+NONE = 0xFFFFFFFF
+
+
+def write_snapshot(path: Path, meta: dict, assets: Dict[str, Asset]) -> None:
+    strings: Dict[str, int] = {}
+    records = bytearray()
+    ports = array("H")
+    refs = array("I")
+
+    def ref(value: str | None) -> int:
+        if value is None:
+            return NONE
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    for aid in sorted(assets):
+        asset = assets[aid]
+
+        if any(not 0 <= p <= 0xFFFF for p in asset.ports):
+            raise ValueError(f"{asset.host}: port out of range in {list(asset.ports)}")
+
+        record = RECORD.pack(
+            ref(aid),
+            ref(asset.host),
+            ref(asset.ip),
+            ref(asset.first_seen),
+            ref(asset.last_seen),
+            len(ports),
+            len(refs),
+            len(refs) + len(asset.services),
+            len(asset.ports),
+            len(asset.services),
+            len(asset.sources),
+        )
+        records += record
+        ports.extend(asset.ports)
+        refs.extend(ref(s) for s in asset.services)
+        refs.extend(ref(s) for s in asset.sources)
+
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = [0]
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+
+    offsets = array("I", offsets)
+    if sys.byteorder == "big":
+        for packed in (offsets, ports, refs):
+            packed.byteswap()
+
+    meta_bytes = json.dumps(meta).encode("utf-8")
+    string_table = offsets.tobytes() + b"".join(encoded)
+
+    meta_off = HEADER.size
+    strings_off = meta_off + len(meta_bytes)
+    assets_off = strings_off + len(string_table)
+    ports_off = assets_off + len(records)
+    refs_off = ports_off + 2 * len(ports)
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(
+            MAGIC, VERSION, 0,
+            len(assets), len(encoded), len(meta_bytes),
+            meta_off, strings_off, assets_off, ports_off, refs_off,
+        ))
+        f.write(meta_bytes)
+        f.write(string_table)
+        f.write(records)
+        f.write(ports.tobytes())
+        f.write(refs.tobytes())
+
+
+class BinarySnapshot:
+    """
+    Read-only view of a binary snapshot file.
+
+        with BinarySnapshot(path) as snap:
+            snap.meta, len(snap), snap.find("example.com"), list(snap)
+
+    Assets are returned as dicts in the Asset.to_dict() shape.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+        with open(self.path, "rb") as f:
+            try:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError(f"{self.path.name}: empty snapshot file")
+
+        try:
+            (
+                magic, version, _,
+                self._count, self._string_count, self._meta_len,
+                self._meta_off, self._strings_off, self._assets_off,
+                self._ports_off, self._refs_off,
+            ) = HEADER.unpack_from(self._mm, 0)
+        except struct.error:
+            self.close()
+            raise ValueError(f"{self.path.name}: truncated binary snapshot")
+
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{self.path.name}: not a binary snapshot (version {VERSION})")
+
+        if self._refs_off > len(self._mm):
+            self.close()
+            raise ValueError(f"{self.path.name}: truncated binary snapshot")
+
+        self._blob_off = self._strings_off + 4 * (self._string_count + 1)
+        self._strings = [None] * self._string_count
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def __enter__(self) -> "BinarySnapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def meta(self) -> dict:
+        start = self._meta_off
+        return json.loads(self._mm[start:start + self._meta_len])
+
+    def _string(self, index: int) -> str | None:
+        if index == NONE:
+            return None
+
+        value = self._strings[index]
+        if value is None:
+            start, end = struct.unpack_from("<II", self._mm, self._strings_off + 4 * index)
+            value = self._strings[index] = str(
+                self._mm[self._blob_off + start:self._blob_off + end], "utf-8"
+            )
+        return value
+
+    def _record(self, row: int) -> tuple:
+        return RECORD.unpack_from(self._mm, self._assets_off + RECORD.size * row)
+
+    def asset(self, row: int) -> dict:
+        """The asset at position `row` (0 <= row < len) in id order."""
+        (
+            aid, host, ip, first_seen, last_seen,
+            ports_start, refs_start, sources_start,
+            ports_len, services_len, sources_len,
+        ) = self._record(row)
+
+        ports = struct.unpack_from(f"<{ports_len}H", self._mm, self._ports_off + 2 * ports_start)
+        services = struct.unpack_from(f"<{services_len}I", self._mm, self._refs_off + 4 * refs_start)
+        sources = struct.unpack_from(f"<{sources_len}I", self._mm, self._refs_off + 4 * sources_start)
+        string = self._string
+
+        return {
+            "id": string(aid),
+            "host": string(host),
+            "ip": string(ip),
+            "ports": list(ports),
+            "services": [string(s) for s in services],
+            "sources": [string(s) for s in sources],
+            "first_seen": string(first_seen),
+            "last_seen": string(last_seen),
+        }
+
+    def find(self, asset_id: str) -> dict | None:
+        """Binary search on the id-sorted asset table."""
+        lo, hi = 0, self._count
+
+        while lo < hi:
+            mid = (lo + hi) // 2
+            current = self._string(self._record(mid)[0])
+
+            if current == asset_id:
+                return self.asset(mid)
+            if current < asset_id:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        return None
+
+    def __iter__(self) -> Iterator[dict]:
+        for row in range(self._count):
+            yield self.asset(row)
+
+    def _tables(self) -> tuple:
+        """Decode the whole string, ports and refs tables at once."""
+        mm = self._mm
+        offsets = array("I", mm[self._strings_off:self._blob_off])
+        ports = array("H", mm[self._ports_off:self._refs_off])
+        refs = array("I", mm[self._refs_off:])
+
+        if sys.byteorder == "big":
+            for packed in (offsets, ports, refs):
+                packed.byteswap()
+
+        blob = mm[self._blob_off:self._blob_off + offsets[-1]] if len(offsets) > 1 else b""
+        strings = [
+            str(blob[start:end], "utf-8")
+            for start, end in zip(offsets, offsets[1:])
+        ]
+
+        return strings, ports, refs
+
+    def load_assets(self, where=None) -> Dict[str, Asset]:
+        """
+        All assets as Asset objects, decoded table by table rather than
+        record by record (load_snapshot's path for binary snapshots).
+
+        where: only the assets matching this AssetFilter, checked on the
+        decoded fields before an Asset is built.
+        """
+        strings, ports, refs = self._tables()
+        table = self._mm[self._assets_off:self._assets_off + RECORD.size * self._count]
+        restore = Asset.restore
+        assets = {}
+
+        for row, (
+            aid, host, ip, first_seen, last_seen,
+            ports_start, refs_start, sources_start,
+            ports_len, services_len, sources_len,
+        ) in enumerate(RECORD.iter_unpack(table)):
+            if first_seen == NONE or last_seen == NONE:
+                # incomplete record: let Asset fill in the defaults
+                data = self.asset(row)
+                if where is None or where.matches(data):
+                    assets[strings[aid]] = Asset.from_dict(data)
+                continue
+
+            host_name = strings[host]
+            address = strings[ip] if ip != NONE else None
+            asset_ports = ports[ports_start:ports_start + ports_len]
+            # nmap's <service> without a name is stored as NONE
+            services = [
+                strings[i] if i != NONE else None
+                for i in refs[refs_start:refs_start + services_len]
+            ]
+
+            if where is not None and not where.match(host_name, address, asset_ports, services):
+                continue
+
+            assets[strings[aid]] = restore(
+                host_name,
+                address,
+                asset_ports,
+                services,
+                [strings[i] for i in refs[sources_start:sources_start + sources_len]],
+                strings[first_seen],
+                strings[last_seen],
+            )
+
+        return assets
+
+
+def read_meta(path: Path) -> dict:
+    with BinarySnapshot(path) as snap:
+        meta = snap.meta
+        meta.setdefault("assets", len(snap))
+    return meta
+
+
+def load_assets(path: Path, where=None) -> Dict[str, Asset]:
+    with BinarySnapshot(path) as snap:
+        return snap.load_assets(where)
+
+
+def read_assets(path: Path) -> Dict[str, dict]:
+    with BinarySnapshot(path) as snap:
+        return {data["id"]: data for data in snap}
@@ -0,0 +1,188 @@
+"""
+Bulk state diff for the assets common to two snapshots.
+
+Every distinct port list and service list is encoded once as an integer
+code (equal codes meaning equal sets), so each asset reduces to one code per
+snapshot. Changed rows are found by comparing code arrays in batches -
+vectorized with NumPy when it is installed, with a pure-Python pass
+otherwise - and per-host records are only built for rows that differ, once
+per distinct (old, new) pair of sets.
+
+Rows whose port and service tuples are the same objects (assets share their
+tuples, see Asset) are skipped before any encoding. When more than
+FALLBACK_CHURN of the common assets are left, few records repeat and the
+encoding costs more than it saves, so they are compared one by one instead.
+"""
+from typing import Dict, Iterable, List, Sequence
+
+from attackdiff.asset import Asset
+
+
+BATCH_SIZE = 1 << 16
+
+# Below this many common assets, importing NumPy costs more than it saves
+NUMPY_MIN_ROWS = 50_000
+
+# Above this share of possibly changed rows, compare them one by one
+FALLBACK_CHURN = 0.05
+
+_numpy = None
+
+
+def _load_numpy():
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+class _SetEncoder:
+    """
+    Map sequences (ports or service names) to small integer codes, equal
+    codes meaning equal sets (order and duplicates ignored, as in
+    diff_assets). Keeps the set behind every code.
+
+    Lookups are cached by object identity first (`by_identity`): assets
+    share their tuples (see Asset), so most rows cost a single dict hit.
+    """
+
+    def __init__(self):
+        self.by_identity: Dict[int, int] = {}
+        self._keep_alive: List[Sequence] = []
+        self._by_set: Dict[frozenset, int] = {}
+        self.sets: List[frozenset] = []
+
+    def encode(self, values: Sequence) -> int:
+        key = frozenset(values)
+        code = self._by_set.get(key)
+
+        if code is None:
+            code = len(self.sets)
+            self._by_set[key] = code
+            self.sets.append(key)
+
+        self.by_identity[id(values)] = code
+        self._keep_alive.append(values)  # ids stay valid for the whole diff
+        return code
+
+
+def _changed_rows(old_codes: List[int], new_codes: List[int]) -> Iterable[int]:
+    np = _load_numpy() if len(old_codes) >= NUMPY_MIN_ROWS else None
+
+    if np is not None:
+        old_arr = np.asarray(old_codes, dtype=np.int64)
+        new_arr = np.asarray(new_codes, dtype=np.int64)
+        return np.flatnonzero(old_arr != new_arr).tolist()
+
+    return [i for i, (o, n) in enumerate(zip(old_codes, new_codes)) if o != n]
+
+
+def _per_asset(old_assets: Dict[str, Asset], new_assets: Dict[str, Asset], ids: List[str]) -> List[dict]:
+    """The per-asset comparison (what diff_assets did before the bulk engine)."""
+    changed = []
+
+    for aid in ids:
+        old = old_assets[aid]
+        new = new_assets[aid]
+
+        old_ports = set(old.ports)
+        new_ports = set(new.ports)
+        old_services = set(old.services)
+        new_services = set(new.services)
+
+        if old_ports != new_ports or old_services != new_services:
+            changed.append({
+                "host": new.host,
+                "ports_added": sorted(new_ports - old_ports),
+                "ports_removed": sorted(old_ports - new_ports),
+                "services_added": sorted(new_services - old_services),
+                "services_removed": sorted(old_services - new_services),
+            })
+
+    return changed
+
+
+def changed_assets(
+    old_assets: Dict[str, Asset],
+    new_assets: Dict[str, Asset],
+    common_ids: Iterable[str]
+) -> List[dict]:
+    """
+    Return the changed_assets records of diff_assets for common_ids, in the
+    order given.
+    """
+    common_ids = list(common_ids)
+
+    # same shared tuples → same sets, nothing to compare
+    ids = [
+        aid for aid in common_ids
+        if old_assets[aid].ports is not new_assets[aid].ports
+        or old_assets[aid].services is not new_assets[aid].services
+    ]
+
+    if len(ids) > FALLBACK_CHURN * len(common_ids):
+        return _per_asset(old_assets, new_assets, ids)
+
+    ports = _SetEncoder()
+    services = _SetEncoder()
+
+    port_codes = ports.by_identity
+    service_codes = services.by_identity
+
+    def code(asset: Asset) -> int:
+        """(port code, service code) folded into one integer"""
+        p = asset.ports
+        s = asset.services
+        pc = port_codes.get(id(p))
+        if pc is None:
+            pc = ports.encode(p)
+        sc = service_codes.get(id(s))
+        if sc is None:
+            sc = services.encode(s)
+        return pc << 32 | sc
+
+    # (old code, new code) -> record fields, since the same change is
+    # usually seen on many hosts
+    records: Dict[tuple, tuple] = {}
+
+    changed = []
+
+    for start in range(0, len(ids), BATCH_SIZE):
+        batch = ids[start:start + BATCH_SIZE]
+        old_codes = [code(old_assets[aid]) for aid in batch]
+        new_codes = [code(new_assets[aid]) for aid in batch]
+
+        for row in _changed_rows(old_codes, new_codes):
+            o, n = old_codes[row], new_codes[row]
+            fields = records.get((o, n))
+
+            if fields is None:
+                old_ports = ports.sets[o >> 32]
+                new_ports = ports.sets[n >> 32]
+                old_services = services.sets[o & 0xFFFFFFFF]
+                new_services = services.sets[n & 0xFFFFFFFF]
+
+                fields = records[(o, n)] = (
+                    sorted(new_ports - old_ports),
+                    sorted(old_ports - new_ports),
+                    sorted(new_services - old_services),
+                    sorted(old_services - new_services),
+                )
+                ports_added, ports_removed, services_added, services_removed = fields
+            else:
+                # every record gets its own lists, as before
+                ports_added, ports_removed, services_added, services_removed = map(list, fields)
+
+            changed.append({
+                "host": new_assets[batch[row]].host,
+                "ports_added": ports_added,
+                "ports_removed": ports_removed,
+                "services_added": services_added,
+                "services_removed": services_removed,
+            })
+
+    return changed
@@ -0,0 +1,313 @@
+"""
+Import of nmap XML (-oX) and subfinder output produced outside attackdiff
+(`attackdiff import`).
+
+    plan    every file gets a timestamp and tag from the manifest, or else
+            from the file itself: nmap's scan start time (<nmaprun start>),
+            the modification time for subfinder output
+    parse   in a process pool, with the scanners' own parsing
+            (NmapScanner._iter_hosts, SubfinderScanner._parse_line); files
+            with the same timestamp make one snapshot, joined as in a
+            combined scan
+    save    oldest first, while the next snapshots are being parsed; the
+            index and checksum manifest are written once at the end
+
+In directories, *.xml files are read as nmap output and *.txt files as
+subfinder output (recursively). Timestamps already in the store are
+skipped, so an interrupted import can simply be run again.
+
+Manifest (JSON), paths relative to the manifest's directory; the files it
+lists are imported even when not given on the command line:
+
+    {
+      "2019/q1-external.xml": {"timestamp": "2019-01-07T02:00:00Z", "tag": "2019-q1"},
+      "2019/q1-subdomains": {"timestamp": "2019-01-07T02:00:00Z", "type": "subfinder"}
+    }
+"""
+import itertools
+import json
+import os
+import time
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from attackdiff import metrics
+from attackdiff.asset import Asset
+from attackdiff.scanners.combined import join_assets
+from attackdiff.scanners.nmap import NmapScanner
+from attackdiff.scanners.subfinder_scanner import SubfinderScanner
+from attackdiff.storage import SnapshotStorage
+
+
+FILE_TYPES = {".xml": "nmap", ".txt": "subfinder"}
+
+
+# -------------------------------
+# Plan
+# -------------------------------
+
+def _parse_timestamp(value) -> str:
+    """ISO timestamp (UTC when naive) or epoch seconds -> canonical ISO timestamp."""
+    if isinstance(value, (int, float)):
+        parsed = datetime.fromtimestamp(value, timezone.utc)
+    else:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+def _sniff_type(path: Path) -> str:
+    with open(path, "rb") as f:
+        head = f.read(256).lstrip()
+    return "nmap" if head.startswith(b"<") else "subfinder"
+
+
+def _nmap_start(path: Path) -> float | None:
+    """Scan start time of an nmap XML file (epoch seconds), from its head only."""
+    parser = ET.XMLPullParser(events=("start",))
+
+    try:
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(64 * 1024)
+                if not chunk:
+                    return None
+
+                parser.feed(chunk)
+                for _, elem in parser.read_events():
+                    start = elem.attrib.get("start") if elem.tag == "nmaprun" else None
+                    return float(start) if start else None
+    except (ET.ParseError, ValueError):
+        return None
+
+
+def load_manifest(path: str | Path) -> Dict[Path, dict]:
+    """{resolved file path: {"timestamp", "tag", "type"}} from a manifest file."""
+    path = Path(path)
+
+    with open(path, "r") as f:
+        raw = json.load(f)
+
+    if not isinstance(raw, dict):
+        raise ValueError(f"{path}: expected an object of {{file: {{timestamp, tag, type}}}}")
+
+    manifest = {}
+    for name, entry in raw.items():
+        if not isinstance(entry, dict):
+            raise ValueError(f"{path}: entry for {name} must be an object")
+        if entry.get("type") not in (None, "nmap", "subfinder"):
+            raise ValueError(f"{path}: unknown type for {name}: {entry['type']}")
+
+        manifest[(path.parent / name).resolve()] = entry
+
+    return manifest
+
+
+def collect_files(paths: List[str], manifest: Dict[Path, dict]) -> Dict[Path, str]:
+    """{resolved path: type} of the files to import."""
+    files = {}
+
+    for value in paths:
+        path = Path(value)
+
+        if path.is_dir():
+            for child in sorted(path.rglob("*")):
+                kind = FILE_TYPES.get(child.suffix.lower())
+                if kind and child.is_file():
+                    files[child.resolve()] = kind
+        elif path.is_file():
+            files[path.resolve()] = FILE_TYPES.get(path.suffix.lower()) or _sniff_type(path)
+        else:
+            raise FileNotFoundError(f"No such file or directory: {value}")
+
+    for path, entry in manifest.items():
+        if entry.get("type"):
+            files[path] = entry["type"]
+        elif path not in files:
+            if not path.is_file():
+                raise FileNotFoundError(f"Manifest file not found: {path}")
+            files[path] = FILE_TYPES.get(path.suffix.lower()) or _sniff_type(path)
+
+    return files
+
+
+def plan_import(files: Dict[Path, str], manifest: Dict[Path, dict]) -> List[dict]:
+    """
+    Group the files into snapshots, oldest first:
+    [{"timestamp", "tag", "scanner", "files": [(type, path)], "bytes"}].
+    """
+    groups: Dict[str, dict] = {}
+
+    for path, kind in files.items():
+        entry = manifest.get(path, {})
+
+        if entry.get("timestamp") is not None:
+            try:
+                timestamp = _parse_timestamp(entry["timestamp"])
+            except ValueError:
+                raise ValueError(f"Bad manifest timestamp for {path}: {entry['timestamp']}")
+        else:
+            start = _nmap_start(path) if kind == "nmap" else None
+            timestamp = _parse_timestamp(start if start is not None else path.stat().st_mtime)
+
+        group = groups.setdefault(timestamp, {
+            "timestamp": timestamp, "tag": None, "scanner": None, "files": [], "bytes": 0
+        })
+
+        tag = entry.get("tag")
+        if tag is not None:
+            if group["tag"] not in (None, tag):
+                raise ValueError(f"Conflicting tags for the files of {timestamp}: {group['tag']}, {tag}")
+            group["tag"] = tag
+
+        group["files"].append((kind, str(path)))
+        group["bytes"] += path.stat().st_size
+
+    for group in groups.values():
+        group["files"].sort()
+        group["scanner"] = ",".join(dict.fromkeys(kind for kind, _ in group["files"]))
+
+    return [groups[timestamp] for timestamp in sorted(groups)]
+
+
+# -------------------------------
+# Parse
+# -------------------------------
+
+def parse_files(files: List[tuple], timestamp: str) -> Dict[str, Asset]:
+    """
+    [(type, path)] -> {asset id: Asset} of one snapshot (runs in the worker
+    processes). Assets are seen at the snapshot's timestamp, not now.
+    """
+    results = []
+
+    for kind, path in files:
+        assets = {}
+
+        if kind == "nmap":
+            scanner = NmapScanner()
+            with open(path, "rb") as f:
+                for asset in scanner._iter_hosts(f):
+                    assets[asset.id] = asset
+            results.append((assets, scanner.hostnames, False))
+
+        else:
+            scanner = SubfinderScanner()
+            with open(path, "rb") as f:
+                for line in f:
+                    domain = scanner._parse_line(line)
+                    if domain is not None:
+                        asset = scanner.make_asset(domain)
+                        assets[asset.id] = asset
+            results.append((assets, {}, scanner.assumed_ports))
+
+    assets = results[0][0] if len(results) == 1 else join_assets(results)
+
+    for asset in assets.values():
+        asset.first_seen = asset.last_seen = timestamp
+
+    return assets
+
+
+def _parse_in_order(groups: List[dict], workers: int) -> Iterator[tuple]:
+    """
+    Yield (group, assets or the exception that parsing raised), in order.
+    At most 2 * workers groups are parsed ahead of the one being saved.
+    """
+    if workers <= 1:
+        for group in groups:
+            try:
+                yield group, parse_files(group["files"], group["timestamp"])
+            except Exception as e:
+                yield group, e
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        remaining = iter(groups)
+
+        for group in itertools.islice(remaining, workers * 2):
+            pending.append((group, pool.submit(parse_files, group["files"], group["timestamp"])))
+
+        while pending:
+            group, future = pending.popleft()
+
+            with metrics.phase("import.wait"):
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    outcome = e
+
+            for next_group in itertools.islice(remaining, 1):
+                pending.append((next_group, pool.submit(parse_files, next_group["files"], next_group["timestamp"])))
+
+            yield group, outcome
+
+
+# -------------------------------
+# Import
+# -------------------------------
+
+def import_files(
+    storage: SnapshotStorage,
+    paths: List[str],
+    manifest_path: str | None = None,
+    workers: int | None = None
+) -> dict:
+    """
+    Import result files as snapshots. Returns {"imported", "skipped",
+    "failed": [(files, error)], "assets", "bytes", "seconds"}.
+    """
+    if workers is not None and workers < 1:
+        raise ValueError("--workers must be >= 1")
+
+    workers = workers or os.cpu_count() or 1
+
+    start = time.perf_counter()
+
+    with metrics.phase("import.plan") as p:
+        manifest = load_manifest(manifest_path) if manifest_path else {}
+        files = collect_files(paths, manifest)
+        groups = plan_import(files, manifest)
+
+        existing = {e.get("timestamp") for e in storage.snapshot_entries() if "error" not in e}
+        todo = [g for g in groups if g["timestamp"] not in existing]
+        p.count(files=len(files), snapshots=len(todo))
+
+    result = {
+        "imported": 0,
+        "skipped": len(groups) - len(todo),
+        "failed": [],
+        "assets": 0,
+        "bytes": 0,
+    }
+
+    with storage.bulk():
+        for group, outcome in _parse_in_order(todo, min(workers, len(todo)) or 1):
+            names = [Path(path).name for _, path in group["files"]]
+
+            if isinstance(outcome, Exception):
+                result["failed"].append((names, str(outcome).strip() or type(outcome).__name__))
+                continue
+
+            with metrics.phase("save", assets=len(outcome)):
+                path = storage.save_snapshot(
+                    outcome,
+                    tag=group["tag"],
+                    scanner=group["scanner"],
+                    timestamp=group["timestamp"]
+                )
+
+            print(f"[+] {path.name}: {len(outcome)} asset(s) from {', '.join(names)}")
+            result["imported"] += 1
+            result["assets"] += len(outcome)
+            result["bytes"] += group["bytes"]
+
+    result["seconds"] = time.perf_counter() - start
+    return result
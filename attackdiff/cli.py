@@ -19,9 +19,19 @@ def build_parser():
 
     scan_parser.add_argument(
         "--scanner",
+        nargs="+",
         required=True,
-        choices=["nmap", "subfinder"],
-        help="Scanner to use"
+        metavar="NAME",
+        help="Scanner(s) to use: nmap, subfinder or an installed plugin (attackdiff.scanners entry point). "
+             "Several scanners run at the same time and their results are joined on host name / IP"
+    )
+
+    scan_parser.add_argument(
+        "--scanner-opt",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Option passed to a plugin scanner's constructor (repeatable)"
     )
 
     scan_parser.add_argument(
@@ -37,6 +47,58 @@ def build_parser():
         help="Extra arguments passed directly to nmap"
     )
 
+    scan_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of concurrent nmap processes (nmap only, default: 1)"
+    )
+
+    scan_parser.add_argument(
+        "--shard-size",
+        type=int,
+        default=256,
+        help="Targets per nmap process when --workers > 1 (CIDRs are expanded, default: 256)"
+    )
+
+    scan_parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Deep scan only new, volatile or stale targets, quick check or carry forward the rest (nmap only)"
+    )
+
+    scan_parser.add_argument(
+        "--deep-every",
+        type=float,
+        default=7,
+        metavar="DAYS",
+        help="With --adaptive: deep scan every target at least this often (default: 7)"
+    )
+
+    scan_parser.add_argument(
+        "--quick-every",
+        type=float,
+        default=24,
+        metavar="HOURS",
+        help="With --adaptive: quick check stable hosts not seen for this long (default: 24)"
+    )
+
+    scan_parser.add_argument(
+        "--volatile-changes",
+        type=int,
+        default=1,
+        metavar="N",
+        help="With --adaptive: hosts with N changes in the recent snapshots are always deep scanned (default: 1)"
+    )
+
+    scan_parser.add_argument(
+        "--volatile-window",
+        type=int,
+        default=10,
+        metavar="N",
+        help="With --adaptive: number of recent snapshots to count changes in (default: 10)"
+    )
+
     scan_parser.add_argument(
         "--tag",
         help="Optional tag for the scan (e.g. weekly, prod, baseline)"
@@ -48,6 +110,13 @@ def build_parser():
         help="Extra arguments passed directly to subfinder"
     )
 
+    scan_parser.add_argument(
+        "--subfinder-concurrency",
+        type=int,
+        default=4,
+        help="Number of root domains enumerated concurrently (subfinder only, default: 4)"
+    )
+
     scan_parser.add_argument(
         "--httpx",
         action="store_true",
@@ -93,6 +162,12 @@ def build_parser():
     help="Output diff as JSON"
     )
 
+    diff_parser.add_argument(
+        "--ndjson",
+        action="store_true",
+        help="Output one JSON event per line (added / removed / changed asset), streamed as the diff runs"
+    )
+
     diff_parser.add_argument(
     "--from-tag",
     help="Tag of the base snapshot"
@@ -108,6 +183,12 @@ def build_parser():
     help="Diff from a tagged snapshot to the latest snapshot"
     )
 
+    diff_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Recompute the diff instead of using (and filling) the diff cache"
+    )
+
     list_parser = subparsers.add_parser(
         "list",
         help="List available scan snapshots"
@@ -124,6 +205,36 @@ def build_parser():
     help="Only list snapshots with this tag"
     )
 
+    # ---- asset filters (diff, list) ----
+    for command_parser in (diff_parser, list_parser):
+        command_parser.add_argument(
+            "--host",
+            action="append",
+            metavar="PATTERN",
+            help="Only assets whose host matches this glob, e.g. '*.prod.example.com' (repeatable)"
+        )
+
+        command_parser.add_argument(
+            "--cidr",
+            action="append",
+            metavar="NETWORK",
+            help="Only assets whose address is in this network (repeatable)"
+        )
+
+        command_parser.add_argument(
+            "--port",
+            action="append",
+            type=int,
+            help="Only assets with this port open (repeatable)"
+        )
+
+        command_parser.add_argument(
+            "--service",
+            action="append",
+            metavar="NAME",
+            help="Only assets running this service (repeatable)"
+        )
+
 
     prune_parser = subparsers.add_parser(
     "prune",
@@ -159,12 +270,234 @@ def build_parser():
     help="Allow pruning without any retention rule (DANGEROUS)"
     )
 
+    # ---- migrate command ----
+    migrate_parser = subparsers.add_parser(
+        "migrate",
+        help="Import existing JSON snapshots into another storage backend"
+    )
+
+    migrate_parser.add_argument(
+        "--to",
+        required=True,
+        choices=["sqlite"],
+        help="Target storage backend"
+    )
+
+    migrate_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=50,
+        help="Number of snapshots imported per transaction (default: 50)"
+    )
+
+    migrate_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Switch backend even if some snapshots could not be imported"
+    )
+
+    # ---- import command ----
+    import_parser = subparsers.add_parser(
+        "import",
+        help="Import nmap XML and subfinder output files as snapshots"
+    )
+
+    import_parser.add_argument(
+        "paths",
+        nargs="*",
+        metavar="PATH",
+        help="Files or directories (*.xml: nmap -oX output, *.txt: subfinder output, recursively)"
+    )
+
+    import_parser.add_argument(
+        "--manifest",
+        metavar="FILE",
+        help="JSON {file: {timestamp, tag, type}} giving the snapshot of each file "
+             "(default: nmap's scan start time, the file's mtime for subfinder output)"
+    )
+
+    import_parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processes parsing files (default: number of CPUs)"
+    )
+
+    # ---- config command ----
+    config_parser = subparsers.add_parser(
+        "config",
+        help="Show or change how snapshots are stored"
+    )
+
+    config_parser.add_argument(
+        "--delta-keyframes",
+        type=int,
+        metavar="N",
+        help="Store snapshots as deltas with a full keyframe every N snapshots (0 disables)"
+    )
+
+    config_parser.add_argument(
+        "--format",
+        choices=["json", "jsonl", "binary"],
+        help="Format of new snapshots (jsonl: one asset per line, sorted, diffed in constant memory; "
+             "binary: compact memory-mapped file)"
+    )
+
+    config_parser.add_argument(
+        "--compression",
+        choices=["none", "gzip", "lzma", "bz2"],
+        help="Compress new json/jsonl snapshots (convert rewrites existing ones)"
+    )
+
+    config_parser.add_argument(
+        "--diff-cache-mb",
+        type=int,
+        metavar="MB",
+        help="Maximum size of the diff result cache (default: 256, 0 disables it)"
+    )
+
+    # ---- timeline command ----
+    timeline_parser = subparsers.add_parser(
+        "timeline",
+        help="Churn between consecutive snapshots over a range"
+    )
+
+    timeline_parser.add_argument(
+        "--from-tag",
+        help="Tag of the first snapshot of the range"
+    )
+
+    timeline_parser.add_argument(
+        "--to-tag",
+        help="Tag of the last snapshot of the range"
+    )
+
+    timeline_parser.add_argument(
+        "--last",
+        type=int,
+        metavar="N",
+        help="Range of the last N snapshots"
+    )
+
+    timeline_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Diff snapshot pairs in N processes (default: 1, a single pass)"
+    )
+
+    timeline_parser.add_argument(
+        "--summary",
+        action="store_true",
+        help="Only print per-interval counts, not per-host events"
+    )
+
+    timeline_parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Output the timeline as JSON"
+    )
+
+    timeline_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Recompute every diff instead of using the diff cache"
+    )
+
+    # ---- history command ----
+    history_parser = subparsers.add_parser(
+        "history",
+        help="Show when a host appeared, changed or disappeared"
+    )
+
+    history_parser.add_argument(
+        "host",
+        nargs="?",
+        help="Host / asset id"
+    )
+
+    history_parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Output the timeline as JSON"
+    )
+
+    history_parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Rebuild the history index from all snapshots"
+    )
+
+    # ---- convert command ----
+    convert_parser = subparsers.add_parser(
+        "convert",
+        help="Rewrite existing snapshots in another format"
+    )
+
+    convert_parser.add_argument(
+        "--to",
+        required=True,
+        choices=["json", "jsonl", "binary"],
+        help="Target snapshot format"
+    )
+
+    convert_parser.add_argument(
+        "snapshots",
+        nargs="*",
+        metavar="SNAPSHOT",
+        help="Snapshots to convert (default: all)"
+    )
+
+    # ---- daemon command ----
+    daemon_parser = subparsers.add_parser(
+        "daemon",
+        help="Run scheduled jobs (scan, diff, prune, ...) from a config file"
+    )
+
+    daemon_parser.add_argument(
+        "--config",
+        required=True,
+        help="Daemon config (JSON): workers, snapshot_cache, log and jobs"
+    )
+
+    daemon_parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Validate the config, print the next run of every job and exit"
+    )
+
     # ---- doctor command ----
     doctor_parser = subparsers.add_parser(
         "doctor",
         help="Check installation and environment health"
     )
 
+    doctor_parser.add_argument(
+        "--quick",
+        action="store_true",
+        help="Only compare the snapshot checksums with the index (no snapshot is read)"
+    )
+
+    doctor_parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processes verifying snapshots (default: number of CPUs)"
+    )
 
+    # ---- instrumentation (every command) ----
+    for command_parser in subparsers.choices.values():
+        command_parser.add_argument(
+            "--metrics",
+            metavar="PATH",
+            help="Write per-phase timings, CPU, peak RSS and counts as JSON to PATH "
+                 "and as a Prometheus textfile to PATH with a .prom suffix"
+        )
+
+        command_parser.add_argument(
+            "--profile",
+            metavar="PATH",
+            help="Write cProfile stats of the run to PATH (read with: python -m pstats PATH)"
+        )
 
     return parser
@@ -0,0 +1,52 @@
+"""
+Optional compression of stored snapshots (stdlib codecs only).
+
+A compressed snapshot keeps its format suffix with the codec suffix appended
+(2026-...+00-00.json.gz). Files are read and written as streams through the
+codec, never compressed or decompressed in one piece. Codec modules are
+imported on first use.
+"""
+from importlib import import_module
+from pathlib import Path
+from typing import IO
+
+
+CODECS = {
+    "gzip": ".gz",
+    "lzma": ".xz",
+    "bz2": ".bz2",
+}
+
+# suffix -> (module, open() keyword arguments)
+_OPENERS = {
+    ".gz": ("gzip", {"compresslevel": 6}),
+    ".xz": ("lzma", {}),
+    ".bz2": ("bz2", {}),
+}
+
+
+def codec_suffix(path: str | Path) -> str:
+    """The compression suffix of path, or "" for a plain file."""
+    suffix = Path(path).suffix
+    return suffix if suffix in _OPENERS else ""
+
+
+def strip_codec(path: str | Path) -> Path:
+    """path without its compression suffix (x.json.gz -> x.json)."""
+    path = Path(path)
+    suffix = codec_suffix(path)
+    return path.with_name(path.name[: -len(suffix)]) if suffix else path
+
+
+def open_text(path: str | Path, mode: str = "r") -> IO[str]:
+    """
+    Open a snapshot file for reading ("r") or writing ("w") as text,
+    through its codec when the name has a compression suffix.
+    """
+    opener = _OPENERS.get(codec_suffix(path))
+
+    if opener is None:
+        return open(path, mode, encoding="utf-8")
+
+    module, options = opener
+    return import_module(module).open(path, mode + "t", encoding="utf-8", **options)
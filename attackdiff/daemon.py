@@ -0,0 +1,453 @@
+"""
+Long-running job scheduler (attackdiff daemon).
+
+Runs attackdiff commands on cron schedules from a JSON config file:
+
+    {
+      "workers": 2,
+      "snapshot_cache": 4,
+      "log": "data/daemon.log",
+      "jobs": [
+        {"name": "daily-scan", "schedule": "0 2 * * *",
+         "args": ["scan", "--scanner", "nmap", "--targets", "10.0.0.0/24", "--tag", "daily"]},
+        {"name": "weekly-diff", "schedule": "0 3 * * 0", "args": "diff --since baseline"},
+        {"name": "prune", "schedule": "30 4 * * *", "args": "prune --keep-last 10 --keep-days 7"}
+      ]
+    }
+
+Jobs run in-process on a pool of `workers` threads (each one may run a
+scanner subprocess), so they do not pay interpreter startup, and the stores
+they open are kept between jobs with their snapshot index and the last
+`snapshot_cache` loaded snapshots in memory. A job locks its store from
+start to finish (a scan included), so scans, prunes and diffs of the same
+store never overlap.
+
+Every run is reported with its duration and exit code (0 = success,
+1 = user error, 2 = runtime / scanner failure, as for the CLI), and appended
+to the `log` file as a JSON line when one is configured.
+"""
+import io
+import json
+import shlex
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List
+
+from attackdiff import storage as storage_module
+
+# the store every command uses (the CLI has no option to pick another one)
+JOB_STORE = "data/scans"
+
+
+# -------------------------------
+# Cron expressions
+# -------------------------------
+
+_FIELDS = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day of month", 1, 31),
+    ("month", 1, 12),
+    ("day of week", 0, 7),
+)
+
+_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+}
+
+
+def _parse_field(text: str, name: str, low: int, high: int) -> frozenset:
+    values = set()
+
+    for part in text.split(","):
+        spec, _, step = part.partition("/")
+
+        try:
+            step = int(step) if step else 1
+            if spec == "*":
+                start, end = low, high
+            elif "-" in spec:
+                start, end = (int(v) for v in spec.split("-", 1))
+            else:
+                start = int(spec)
+                end = high if "/" in part else start  # 5/15: from 5 on
+        except ValueError:
+            raise ValueError(f"Invalid {name} field: '{text}'") from None
+
+        if step < 1 or not low <= start <= end <= high:
+            raise ValueError(f"Invalid {name} field: '{text}' (allowed: {low}-{high})")
+
+        values.update(range(start, end + 1, step))
+
+    return frozenset(values)
+
+
+class CronSchedule:
+    """
+    Standard 5-field cron expression (minute hour day-of-month month
+    day-of-week; *, lists, ranges and steps, Sunday is 0 or 7) or one of
+    the @hourly / @daily / @weekly / @monthly / @yearly aliases.
+    Times are local, like cron.
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = _ALIASES.get(expression.strip(), expression).split()
+
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: '{expression}'")
+
+        parsed = [_parse_field(text, *spec) for text, spec in zip(fields, _FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = frozenset(d % 7 for d in weekdays)
+
+        # as in cron: when both day fields are restricted, either one matches
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, dt: datetime) -> bool:
+        in_days = dt.day in self.days
+        in_weekdays = (dt.weekday() + 1) % 7 in self.weekdays
+
+        if self._any_day or self._any_weekday:
+            return in_days and in_weekdays
+        return in_days or in_weekdays
+
+    def matches(self, dt: datetime) -> bool:
+        return (
+            dt.minute in self.minutes
+            and dt.hour in self.hours
+            and dt.month in self.months
+            and self._day_matches(dt)
+        )
+
+    def next_after(self, dt: datetime) -> datetime:
+        """First matching minute strictly after dt."""
+        dt = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt + timedelta(days=366 * 5)
+
+        while dt < limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+            elif dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+            elif dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+            else:
+                return dt
+
+        raise ValueError(f"Cron expression never matches: '{self.expression}'")
+
+
+# -------------------------------
+# Config
+# -------------------------------
+
+def load_daemon_config(path: str | Path) -> dict:
+    """Read and validate the daemon config; errors are ValueError."""
+    from attackdiff.cli import build_parser
+
+    try:
+        with open(path, "r") as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        raise ValueError(f"Daemon config not found: {path}") from None
+
+    workers = config.get("workers", 2)
+    snapshot_cache = config.get("snapshot_cache", 4)
+
+    if not isinstance(workers, int) or workers < 1:
+        raise ValueError("workers must be >= 1")
+    if not isinstance(snapshot_cache, int) or snapshot_cache < 0:
+        raise ValueError("snapshot_cache must be >= 0")
+
+    jobs = []
+    names = set()
+    parser = build_parser()
+
+    for number, job in enumerate(config.get("jobs") or [], 1):
+        name = job.get("name") or f"job-{number}"
+        if name in names:
+            raise ValueError(f"Duplicate job name: {name}")
+        names.add(name)
+
+        if "schedule" not in job or "args" not in job:
+            raise ValueError(f"Job '{name}' needs a schedule and args")
+
+        args = job["args"]
+        if isinstance(args, str):
+            args = shlex.split(args)
+
+        if not args or args[0] == "daemon":
+            raise ValueError(f"Job '{name}': args must be an attackdiff command other than daemon")
+
+        try:
+            parser.parse_args(args)
+        except SystemExit:
+            raise ValueError(f"Job '{name}': invalid arguments: {shlex.join(args)}") from None
+
+        jobs.append({
+            "name": name,
+            "schedule": CronSchedule(job["schedule"]),
+            "args": args,
+        })
+
+    if not jobs:
+        raise ValueError("No jobs configured")
+
+    return {
+        "workers": workers,
+        "snapshot_cache": snapshot_cache,
+        "log": config.get("log"),
+        "jobs": jobs,
+    }
+
+
+# -------------------------------
+# Shared stores
+# -------------------------------
+
+class StorePool:
+    """
+    Storages kept open across jobs, one per store, with one lock per store.
+
+    lock() locks a store for the calling job, open() (through
+    storage.open_storage) locks it too if the job did not, and release()
+    unlocks everything the job locked. A store is reopened when its config
+    (.meta/store.json) changed.
+    """
+
+    def __init__(self, snapshot_cache: int = 4):
+        self.snapshot_cache = snapshot_cache
+        self._stores: Dict[str, tuple] = {}   # path -> (config mtime, storage)
+        self._locks: Dict[str, threading.RLock] = {}
+        self._guard = threading.Lock()
+        self._held = threading.local()
+
+    def _held_keys(self, name: str = "keys") -> set:
+        """Stores the calling job locked ("keys") or opened ("opened")."""
+        if not hasattr(self._held, name):
+            setattr(self._held, name, set())
+        return getattr(self._held, name)
+
+    def lock(self, base_path: str) -> str:
+        """Lock the store for the calling job (once per job); returns its key."""
+        key = str(Path(base_path).resolve())
+
+        with self._guard:
+            lock = self._locks.setdefault(key, threading.RLock())
+
+        held = self._held_keys()
+        if key not in held:
+            lock.acquire()
+            held.add(key)
+        return key
+
+    def open(self, base_path: str) -> "storage_module.SnapshotStorage":
+        key = self.lock(base_path)
+
+        opened = self._held_keys("opened")
+        if key in opened:
+            return self._stores[key][1]
+        opened.add(key)
+
+        try:
+            stamp = storage_module.store_config_path(base_path).stat().st_mtime_ns
+        except OSError:
+            stamp = None
+
+        entry = self._stores.get(key)
+        if entry is None or entry[0] != stamp:
+            if entry is not None:
+                entry[1].close()
+
+            storage = storage_module.open_storage(base_path, shared=False)
+            storage.snapshot_cache_size = self.snapshot_cache
+            self._stores[key] = (stamp, storage)
+
+        return self._stores[key][1]
+
+    def release(self) -> None:
+        held = self._held_keys()
+        for key in held:
+            self._locks[key].release()
+        held.clear()
+        self._held_keys("opened").clear()
+
+    def close(self) -> None:
+        for _, storage in self._stores.values():
+            storage.close()
+        self._stores.clear()
+
+
+# -------------------------------
+# Job output
+# -------------------------------
+
+class _JobOutput(io.TextIOBase):
+    """
+    sys.stdout replacement: what a job thread prints is buffered and shown
+    as one block when the job ends, everything else goes straight through.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+
+    def write(self, text: str) -> int:
+        buffer = getattr(self._local, "buffer", None)
+        (buffer if buffer is not None else self.stream).write(text)
+        return len(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+    def begin(self) -> None:
+        self._local.buffer = io.StringIO()
+
+    def end(self) -> str:
+        buffer, self._local.buffer = self._local.buffer, None
+        return buffer.getvalue()
+
+
+def _exit_code(code) -> tuple:
+    """(status, message) for a SystemExit code, as the interpreter would exit."""
+    if code is None:
+        return 0, None
+    if isinstance(code, int):
+        return code, None
+    return 1, str(code)
+
+
+# -------------------------------
+# Daemon
+# -------------------------------
+
+class Daemon:
+    def __init__(self, config: dict):
+        self.jobs: List[dict] = config["jobs"]
+        self.workers = config["workers"]
+        self.log_path = Path(config["log"]) if config.get("log") else None
+        self.stores = StorePool(config["snapshot_cache"])
+
+        self._stop = threading.Event()
+        self._print_lock = threading.Lock()
+        self._output = None
+
+    def print_schedule(self, now: datetime | None = None) -> None:
+        now = now or datetime.now()
+
+        for job in self.jobs:
+            print(
+                f"{job['name']:<20} {job['schedule'].expression:<16} "
+                f"next: {job['schedule'].next_after(now):%Y-%m-%d %H:%M}  "
+                f"attackdiff {shlex.join(job['args'])}"
+            )
+
+    def _emit(self, text: str) -> None:
+        with self._print_lock:
+            stream = self._output.stream if self._output else sys.stdout
+            stream.write(text)
+            stream.flush()
+
+    def run_job(self, job: dict) -> int:
+        """Run one job in the calling thread; returns its exit code."""
+        from attackdiff.main import main
+
+        started = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        message = None
+
+        if self._output:
+            self._output.begin()
+
+        try:
+            self.stores.lock(JOB_STORE)
+            main(job["args"])
+            code = 0
+        except SystemExit as e:
+            code, message = _exit_code(e.code)
+        except Exception as e:
+            code, message = 2, f"[!] Error: {e}"
+        finally:
+            self.stores.release()
+            output = self._output.end() if self._output else ""
+
+        duration = time.perf_counter() - start
+
+        lines = [f"[{job['name']}] {line}" for line in output.splitlines()]
+        if message:
+            lines.append(f"[{job['name']}] {message}")
+        status = "+" if code == 0 else "!"
+        lines.append(f"[{status}] Job {job['name']} finished in {duration:.2f}s (exit {code})")
+        self._emit("\n".join(lines) + "\n")
+
+        if self.log_path:
+            record = {
+                "job": job["name"],
+                "started": started.isoformat(),
+                "duration_s": round(duration, 3),
+                "exit_code": code,
+            }
+            with self._print_lock, open(self.log_path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+        return code
+
+    def stop(self, *_) -> None:
+        self._stop.set()
+
+    def run(self) -> None:
+        """Schedule jobs until SIGINT / SIGTERM, then wait for the running ones."""
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+        self._output = _JobOutput(sys.stdout)
+        sys.stdout = self._output
+        storage_module.set_store_pool(self.stores)
+
+        now = datetime.now()
+        due = {job["name"]: job["schedule"].next_after(now) for job in self.jobs}
+        running = {}
+
+        self._emit(f"[+] Daemon started: {len(self.jobs)} job(s), {self.workers} worker(s)\n")
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                while not self._stop.is_set():
+                    now = datetime.now()
+
+                    for job in self.jobs:
+                        name = job["name"]
+                        if due[name] > now:
+                            continue
+
+                        if name in running and not running[name].done():
+                            self._emit(f"[!] Job {name} skipped: previous run still running\n")
+                        else:
+                            running[name] = pool.submit(self.run_job, job)
+
+                        due[name] = job["schedule"].next_after(now)
+
+                    wait = (min(due.values()) - datetime.now()).total_seconds()
+                    self._stop.wait(min(max(wait, 0.5), 60))
+
+                self._emit("[+] Stopping, waiting for running jobs\n")
+        finally:
+            storage_module.set_store_pool(None)
+            self.stores.close()
+            sys.stdout = self._output.stream
+            self._output = None
@@ -0,0 +1,127 @@
+from typing import Dict, Iterable, List
+
+
+def asset_state(data: dict) -> tuple:
+    """
+    The part of a serialized asset that counts as a change between snapshots.
+    first_seen / last_seen are deliberately excluded.
+    """
+    return (
+        data.get("host"),
+        data.get("ip"),
+        data.get("ports", []),
+        data.get("services", []),
+        data.get("sources", []),
+    )
+
+
+def make_delta(
+    base: Dict[str, dict],
+    new: Dict[str, dict],
+    seen_at: str
+) -> dict:
+    """
+    Encode `new` as a delta against `base` (both {asset_id: asset.to_dict()}).
+
+    Assets whose state did not change are not stored: on replay they keep
+    their previous record with last_seen set to `seen_at`. When their
+    first_seen / last_seen differ from that, both are kept in "seen"
+    ({asset id: [first_seen, last_seen]}), so replay gives back `new` exactly.
+    """
+    added = {}
+    changed = {}
+    seen = {}
+
+    for aid, data in new.items():
+        old = base.get(aid)
+
+        if old is None:
+            added[aid] = data
+        elif asset_state(old) != asset_state(data):
+            changed[aid] = data
+        elif data.get("first_seen") != old.get("first_seen") or data.get("last_seen") != seen_at:
+            seen[aid] = [data.get("first_seen"), data.get("last_seen")]
+
+    removed = sorted(aid for aid in base if aid not in new)
+
+    delta = {
+        "added": added,
+        "removed": removed,
+        "changed": changed,
+        "last_seen": seen_at,
+    }
+    if seen:
+        delta["seen"] = seen
+
+    return delta
+
+
+def apply_delta(assets: Dict[str, dict], delta: dict) -> None:
+    """
+    Apply one delta in place (last_seen of the assets it leaves alone is
+    set by replay()).
+    """
+    for aid in delta.get("removed", []):
+        assets.pop(aid, None)
+
+    assets.update(delta.get("changed", {}))
+    assets.update(delta.get("added", {}))
+
+    for aid, (first_seen, last_seen) in delta.get("seen", {}).items():
+        assets[aid] = {**assets[aid], "first_seen": first_seen, "last_seen": last_seen}
+
+
+def replay(keyframe: Dict[str, dict], deltas: List[dict]) -> Dict[str, dict]:
+    """
+    Rebuild a snapshot from its keyframe assets and the deltas leading to
+    it (oldest first).
+    """
+    assets = keyframe
+
+    for delta in deltas:
+        apply_delta(assets, delta)
+
+    if deltas:
+        target = deltas[-1]
+        touched = set(target.get("added", {})) | set(target.get("changed", {})) | set(target.get("seen", {}))
+        seen_at = target.get("last_seen")
+
+        for aid, data in assets.items():
+            if aid not in touched:
+                data["last_seen"] = seen_at
+
+    return assets
+
+
+def find_chain_problems(entries: Iterable[dict]) -> List[str]:
+    """
+    Check delta chains using index entries only (name, base, error).
+    Returns a human readable message per broken snapshot.
+    """
+    by_name = {e["name"]: e for e in entries}
+    problems = []
+
+    for name, entry in by_name.items():
+        seen = {name}
+        current = entry
+
+        while current.get("base"):
+            base = current["base"]
+
+            if base in seen:
+                problems.append(f"{name}: delta chain loops at {base}")
+                break
+
+            base_entry = by_name.get(base)
+            if base_entry is None:
+                problems.append(f"{name}: missing base snapshot {base}")
+                break
+
+            if "error" in base_entry:
+                problems.append(f"{name}: base snapshot {base} is corrupted")
+                break
+
+            seen.add(base)
+            current = base_entry
+
+    return problems
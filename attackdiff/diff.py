@@ -1,5 +1,7 @@
 from typing import Dict, List
+from attackdiff import metrics
 from attackdiff.asset import Asset
+from attackdiff.bulk_diff import changed_assets as bulk_changed_assets
 
 
 def diff_assets(
@@ -7,6 +9,15 @@ def diff_assets(
     new_assets: Dict[str, Asset]
 ) -> dict:
 
+    with metrics.phase("diff", assets=len(old_assets) + len(new_assets)):
+        return _diff_assets(old_assets, new_assets)
+
+
+def _diff_assets(
+    old_assets: Dict[str, Asset],
+    new_assets: Dict[str, Asset]
+) -> dict:
+
     old_ids = set(old_assets.keys())
     new_ids = set(new_assets.keys())
 
@@ -18,33 +29,8 @@ def diff_assets(
     new_assets_dict = {aid: new_assets[aid] for aid in new_asset_ids}
     missing_assets_dict = {aid: old_assets[aid] for aid in missing_asset_ids}
 
-    # State-level diffs
-    changed_assets = []
-
-    for aid in common_asset_ids:
-        old = old_assets[aid]
-        new = new_assets[aid]
-
-        old_ports = set(old.ports)
-        new_ports = set(new.ports)
-
-        ports_added = sorted(new_ports - old_ports)
-        ports_removed = sorted(old_ports - new_ports)
-
-        old_services = set(old.services)
-        new_services = set(new.services)
-
-        services_added = sorted(new_services - old_services)
-        services_removed = sorted(old_services - new_services)
-
-        if ports_added or ports_removed or services_added or services_removed:
-            changed_assets.append({
-                "host": new.host,
-                "ports_added": ports_added,
-                "ports_removed": ports_removed,
-                "services_added": services_added,
-                "services_removed": services_removed
-            })
+    # State-level diffs (bulk-encoded, see bulk_diff)
+    changed_assets = bulk_changed_assets(old_assets, new_assets, common_asset_ids)
 
     return {
         "new_assets": new_assets_dict,
@@ -0,0 +1,131 @@
+"""
+On-disk cache of diff results.
+
+Entries live in <store>/.meta/diff-cache/, one JSON file per diff, named
+after the content hashes (sha256) of both snapshots and a hash of the diff
+options:
+
+    <old sha256>-<new sha256>-<options hash>.json
+
+Results are stored normalized (see output.normalize_diff), so a hit can be
+printed without loading any snapshot. The cache is bounded in size; reading
+an entry refreshes its mtime, and the least recently used entries are
+evicted first.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+
+# Bump when the cached result shape changes
+CACHE_VERSION = 1
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class DiffCache:
+    def __init__(self, path: str | Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        max_bytes: total size of the cache files; 0 disables the cache.
+        """
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def key(self, old_sha256: str, new_sha256: str, options: dict | None = None) -> str:
+        options = {"version": CACHE_VERSION, **(options or {})}
+        digest = hashlib.sha256(json.dumps(options, sort_keys=True).encode("utf-8")).hexdigest()
+        return f"{old_sha256}-{new_sha256}-{digest[:16]}"
+
+    def _entry_path(self, key: str) -> Path:
+        return self.path / (key + ".json")
+
+    def get(self, key: str) -> dict | None:
+        if not self.enabled:
+            return None
+
+        path = self._entry_path(key)
+
+        try:
+            with open(path, "r") as f:
+                diff = json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            # torn or corrupted entry
+            path.unlink(missing_ok=True)
+            return None
+
+        try:
+            os.utime(path)  # most recently used
+        except OSError:
+            pass
+
+        return diff
+
+    def put(self, key: str, diff: dict) -> None:
+        if not self.enabled:
+            return
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        path = self._entry_path(key)
+        tmp = path.with_suffix(".tmp")
+
+        with open(tmp, "w") as f:
+            json.dump(diff, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+        self.evict()
+
+    def _entries(self) -> list:
+        """(mtime, size, path) of every entry, least recently used first."""
+        entries = []
+
+        for path in self.path.glob("*.json"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, path))
+
+        entries.sort()
+        return entries
+
+    def evict(self) -> int:
+        """Remove least recently used entries until the cache fits. Returns the count removed."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+
+        return removed
+
+    def invalidate(self, sha256: str | None) -> int:
+        """Remove every entry involving the snapshot with this content hash."""
+        if not sha256 or not self.path.exists():
+            return 0
+
+        removed = 0
+        for path in self.path.glob("*.json"):
+            if sha256 in path.stem.split("-")[:2]:
+                path.unlink(missing_ok=True)
+                removed += 1
+
+        return removed
+
+    def clear(self) -> int:
+        removed = 0
+        for _, _, path in self._entries():
+            path.unlink(missing_ok=True)
+            removed += 1
+        return removed
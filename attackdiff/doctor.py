@@ -1,7 +1,12 @@
+import os
 import sys
 import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from attackdiff.storage import SnapshotStorage
+from attackdiff.delta import find_chain_problems
+from attackdiff.index import file_sha256
+from attackdiff.storage import SnapshotStorage, open_storage, read_document
 
 
 REQUIRED_SCANNERS = [
@@ -12,7 +17,129 @@ REQUIRED_SCANNERS = [
 ]
 
 
-def run_doctor() -> int:
+def _check_file(job: tuple) -> tuple:
+    """
+    (name, path, expected sha256) -> (name, size, sha256, problem).
+    Snapshots with a checksum are only hashed; older ones are parsed.
+    """
+    name, path, expected = job
+
+    try:
+        size = os.path.getsize(path)
+        if expected is None:
+            read_document(Path(path))
+        sha256 = file_sha256(Path(path))
+    except Exception as e:
+        return name, 0, None, f"unreadable ({e})"
+
+    if expected is not None and sha256 != expected:
+        return name, size, sha256, "checksum mismatch (changed or damaged after it was saved)"
+
+    return name, size, sha256, None
+
+
+def _verify_files(jobs: list, workers: int) -> list:
+    workers = min(workers, len(jobs))
+
+    if workers <= 1:
+        return [_check_file(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_check_file, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+
+def _rate(count: float, seconds: float, unit: str) -> str:
+    return f"{count / seconds:,.0f} {unit}/s" if seconds > 0 else f"- {unit}/s"
+
+
+def check_snapshots(storage: SnapshotStorage, quick: bool, workers: int) -> tuple:
+    """
+    Verify every snapshot against the checksum recorded when it was saved.
+
+    quick: compare the checksums with the index only. The index re-hashes
+    files whose size or mtime changed, so this catches snapshots rewritten,
+    truncated or replaced since they were saved, without reading the others.
+    Otherwise every file is hashed (in `workers` processes), which also
+    catches damage that kept size and mtime; snapshots saved before
+    checksums existed are parsed instead, and their checksum recorded.
+
+    Returns (exit code, index entries).
+    """
+    exit_code = 0
+    checksums = storage.checksums
+    start = time.perf_counter()
+    entries = storage.snapshot_entries()
+
+    problems = []
+    unchecked = []
+
+    if quick:
+        for entry in entries:
+            expected = checksums.get(entry["name"])
+
+            if "error" in entry:
+                problems.append((entry["name"], f"unreadable ({entry['error']})"))
+            elif expected is None:
+                unchecked.append(entry["name"])
+            elif entry.get("sha256") != expected:
+                problems.append((entry["name"], "checksum mismatch (changed after it was saved)"))
+
+        elapsed = time.perf_counter() - start
+        throughput = _rate(len(entries), elapsed, "snapshots")
+    else:
+        jobs = [(e["name"], str(e["path"]), checksums.get(e["name"])) for e in entries]
+        results = _verify_files(jobs, workers)
+        elapsed = time.perf_counter() - start
+
+        recorded = 0
+        for name, _, sha256, problem in results:
+            if problem:
+                problems.append((name, problem))
+            elif checksums.get(name) is None:
+                checksums.set(name, sha256)
+                recorded += 1
+        checksums.save()
+
+        size = sum(size for _, size, _, _ in results)
+        throughput = (
+            f"{size / 1e6:,.1f} MB, {_rate(size / 1e6, elapsed, 'MB')}, "
+            f"{_rate(len(entries), elapsed, 'snapshots')}, {min(workers, len(jobs))} worker(s)"
+        )
+
+        if recorded:
+            print(f"  ✔ Checksum recorded for {recorded} snapshot(s) saved before checksums existed")
+
+    for name, problem in problems:
+        print(f"  ✘ Corrupted snapshot: {name}: {problem}")
+        exit_code = 2
+
+    # in the manifest but gone from disk (deleted outside of prune)
+    names = {entry["name"] for entry in entries}
+    missing = sorted(set(checksums.entries) - names)
+    for name in missing:
+        print(f"  ✘ Missing snapshot: {name}")
+        exit_code = 2
+
+    if unchecked:
+        print(f"  ⚠ {len(unchecked)} snapshot(s) without checksum (run attackdiff doctor without --quick once)")
+        exit_code = exit_code or 1
+
+    checked = len(entries) - len(problems) - len(unchecked)
+    if problems or missing:
+        print(
+            f"  ✘ {len(problems)} corrupted, {len(missing)} missing, {checked} OK "
+            f"in {elapsed:.2f}s ({throughput})"
+        )
+    else:
+        print(f"  ✔ {checked} snapshot(s) OK in {elapsed:.2f}s ({throughput})")
+
+    return exit_code, entries
+
+
+def run_doctor(quick: bool = False, workers: int | None = None) -> int:
+    if workers is not None and workers < 1:
+        raise ValueError("--workers must be >= 1")
+
     print("Running attackdiff doctor...\n")
 
     exit_code = 0
@@ -27,7 +154,7 @@ def run_doctor() -> int:
 
     # Data directory check
     print("\nData directory:")
-    storage = SnapshotStorage()
+    storage = open_storage()
     data_path = storage.base_path
 
     try:
@@ -48,18 +175,38 @@ def run_doctor() -> int:
         print("  ⚠ No snapshots found")
         if exit_code == 0:
             exit_code = 1
+    elif hasattr(storage, "integrity_problems"):
+        # sqlite backend: snapshots are rows, the database checks itself
+        start = time.perf_counter()
+        problems = storage.integrity_problems(quick=quick)
+
+        for problem in problems:
+            print(f"  ✘ {problem}")
+            exit_code = 2
+
+        if not problems:
+            print(
+                f"  ✔ {len(snapshots)} snapshot(s), database OK "
+                f"({'quick_check' if quick else 'integrity_check'}, {time.perf_counter() - start:.2f}s)"
+            )
     else:
-        corrupted = False
-        for snap in snapshots:
-            try:
-                storage.load_snapshot(snap)
-            except Exception:
-                corrupted = True
-                print(f"  ✘ Corrupted snapshot: {snap.name}")
+        code, entries = check_snapshots(storage, quick, workers or os.cpu_count() or 1)
+        exit_code = max(exit_code, code)
+
+        # Delta chains (json backend with delta snapshots)
+        deltas = [e for e in entries if e.get("base")]
+
+        if deltas:
+            print("\nDelta chains:")
+            problems = find_chain_problems(entries)
+
+            for problem in problems:
+                print(f"  ✘ {problem}")
                 exit_code = 2
 
-        if not corrupted:
-            print(f"  ✔ {len(snapshots)} snapshot(s) OK")
+            if not problems:
+                keyframes = len(entries) - len(deltas)
+                print(f"  ✔ {len(deltas)} delta(s) on {keyframes} keyframe(s) intact")
 
     # External scanners
     print("\nScanners:")
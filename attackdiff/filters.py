@@ -0,0 +1,138 @@
+"""
+Asset filters of diff and list (--host, --cidr, --port, --service).
+
+A filter is checked on asset records (the Asset.to_dict() shape) while a
+snapshot is read, so assets outside the slice are never turned into Asset
+objects nor diffed. An asset matches when it matches every kind of
+criterion given, and a kind given several times when it matches any value:
+
+    --host '*.prod.example.com' --port 22 --port 3389
+
+is "hosts under prod.example.com exposing 22 or 3389".
+
+--host and --cidr select assets by identity: the same asset is in or out
+of the slice in both snapshots of a diff. --port and --service select by
+content: an asset that opened or closed a filtered port is in the slice
+of one snapshot only, and is reported as changed rather than new or
+missing (see SnapshotStorage.load_slice).
+"""
+import ipaddress
+import re
+import socket
+from fnmatch import translate
+from typing import Iterable
+
+
+class AssetFilter:
+    def __init__(
+        self,
+        hosts: Iterable[str] = (),
+        cidrs: Iterable[str] = (),
+        ports: Iterable[int] = (),
+        services: Iterable[str] = ()
+    ):
+        self.hosts = sorted({h.lower() for h in hosts})
+        self.ports = frozenset(ports)
+        self.services = frozenset(s.lower() for s in services)
+
+        networks = set()
+        for cidr in cidrs:
+            try:
+                networks.add(ipaddress.ip_network(cidr, strict=False))
+            except ValueError:
+                raise ValueError(f"Bad --cidr: {cidr}")
+        self.cidrs = sorted(networks, key=lambda n: (n.version, n))
+
+        # (first, last) address of each network as integers, per family
+        self._ranges = {
+            family: [
+                (int(n.network_address), int(n.broadcast_address))
+                for n in self.cidrs if n.version == version
+            ]
+            for family, version in ((socket.AF_INET, 4), (socket.AF_INET6, 6))
+        }
+
+        # host globs, case-insensitive, as one regex
+        self._host_re = (
+            re.compile("|".join(translate(h) for h in self.hosts), re.IGNORECASE)
+            if self.hosts else None
+        )
+
+    @classmethod
+    def from_args(cls, args) -> "AssetFilter | None":
+        """The filter of a command's options, None when there is none."""
+        where = cls(
+            hosts=getattr(args, "host", None) or (),
+            cidrs=getattr(args, "cidr", None) or (),
+            ports=getattr(args, "port", None) or (),
+            services=getattr(args, "service", None) or ()
+        )
+        return where if where else None
+
+    def __bool__(self) -> bool:
+        return bool(self.hosts or self.cidrs or self.ports or self.services)
+
+    @property
+    def content(self) -> bool:
+        """True when the filter looks at ports / services (not only identity)."""
+        return bool(self.ports or self.services)
+
+    def identity(self) -> "AssetFilter | None":
+        """The --host / --cidr part of the filter, None when there is none."""
+        if not (self.hosts or self.cidrs):
+            return None
+        return AssetFilter(hosts=self.hosts, cidrs=[str(n) for n in self.cidrs])
+
+    def options(self) -> dict:
+        """Canonical form, for diff cache keys."""
+        return {
+            "host": self.hosts,
+            "cidr": [str(n) for n in self.cidrs],
+            "port": sorted(self.ports),
+            "service": sorted(self.services),
+        }
+
+    # -------------------------------
+    # Matching
+    # -------------------------------
+
+    def _match_address(self, host: str, ip: str | None) -> bool:
+        # inet_pton rather than ipaddress: this runs once per record
+        for value in (ip, host):
+            if not value:
+                continue
+            for family, ranges in self._ranges.items():
+                try:
+                    address = int.from_bytes(socket.inet_pton(family, value), "big")
+                except OSError:
+                    continue
+                return any(first <= address <= last for first, last in ranges)
+        return False
+
+    def match_identity(self, host: str, ip: str | None) -> bool:
+        """The --host / --cidr part of match()."""
+        if self._host_re is not None and self._host_re.fullmatch(host) is None:
+            return False
+        return not self.cidrs or self._match_address(host, ip)
+
+    def match(
+        self,
+        host: str,
+        ip: str | None,
+        ports: Iterable[int],
+        services: Iterable[str]
+    ) -> bool:
+        if not self.match_identity(host, ip):
+            return False
+        if self.ports and self.ports.isdisjoint(ports):
+            return False
+        if self.services and not any(s and s.lower() in self.services for s in services):
+            return False
+        return True
+
+    def matches(self, data: dict) -> bool:
+        """Check an asset record (Asset.to_dict() shape)."""
+        return self.match(data["host"], data.get("ip"), data.get("ports") or (), data.get("services") or ())
+
+    def matches_asset(self, asset) -> bool:
+        return self.match(asset.host, asset.ip, asset.ports, asset.services)
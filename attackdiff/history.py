@@ -0,0 +1,374 @@
+"""
+Per-host history index (<store>/.meta/history.db).
+
+An inverted index of the stored snapshots: for every asset id, the snapshots
+it was seen in and its ports/services in each of them, with a `changed` flag
+on the sightings where they differ from the previous sighting (or the asset
+is seen for the first time). Answers "when did this host change" without
+loading any snapshot.
+
+Maintained by SnapshotStorage on save / prune / convert, and rebuildable from
+the snapshots at any time (SnapshotStorage.rebuild_history).
+"""
+import json
+from pathlib import Path
+from typing import Dict, Iterable
+
+from attackdiff.asset import Asset
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshot (
+    id        INTEGER PRIMARY KEY,
+    name      TEXT NOT NULL UNIQUE,
+    timestamp TEXT NOT NULL,
+    tag       TEXT
+);
+CREATE INDEX IF NOT EXISTS snapshot_by_time ON snapshot (timestamp, name);
+
+CREATE TABLE IF NOT EXISTS host (
+    id   INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS state (
+    id       INTEGER PRIMARY KEY,
+    ports    TEXT NOT NULL,
+    services TEXT NOT NULL,
+    UNIQUE (ports, services)
+);
+
+CREATE TABLE IF NOT EXISTS sighting (
+    host_id     INTEGER NOT NULL REFERENCES host (id),
+    snapshot_id INTEGER NOT NULL REFERENCES snapshot (id) ON DELETE CASCADE,
+    state_id    INTEGER NOT NULL REFERENCES state (id),
+    changed     INTEGER NOT NULL,
+    PRIMARY KEY (host_id, snapshot_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS sighting_by_snapshot ON sighting (snapshot_id);
+"""
+
+# Flags of the given hosts' sightings, recomputed from their state sequence
+_CHANGED_FLAGS = """
+SELECT host_id, snapshot_id, changed,
+       LAG(state_id) OVER (PARTITION BY host_id ORDER BY sn.timestamp, sn.name) IS NOT state_id
+FROM sighting
+JOIN snapshot sn ON sn.id = sighting.snapshot_id
+WHERE host_id IN (SELECT host_id FROM temp.affected)
+"""
+
+
+def _sorted(values) -> list:
+    """Distinct values, sorted; unnamed services (None) are left out."""
+    return sorted({v for v in values if v is not None})
+
+
+def _state_keys(assets: Dict[str, Asset]) -> Dict[str, tuple]:
+    """
+    Ports / services of every asset as stored: sorted, so that order does
+    not count as a change. Each distinct tuple is encoded once (assets
+    share their tuples).
+    """
+    encoded = {}
+
+    def encode(values: tuple) -> str:
+        text = encoded.get(values)
+        if text is None:
+            text = encoded[values] = json.dumps(_sorted(values))
+        return text
+
+    return {
+        aid: (encode(asset.ports), encode(asset.services))
+        for aid, asset in assets.items()
+    }
+
+
+class HostHistory:
+    def __init__(self, path: str | Path):
+        import sqlite3  # only commands that use the index pay for it
+
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # shared between the daemon's job threads, one job at a time
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS affected (host_id INTEGER PRIMARY KEY)")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # -------------------------------
+    # Maintenance
+    # -------------------------------
+
+    def snapshot_names(self) -> set:
+        return {name for (name,) in self.conn.execute("SELECT name FROM snapshot")}
+
+    def _host_ids(self, hosts: Iterable[str]) -> Dict[str, int]:
+        """{host: id}, adding the hosts not indexed yet."""
+        def lookup(values):
+            ids = {}
+            for start in range(0, len(values), 500):
+                chunk = values[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                ids.update(
+                    (name, rowid) for rowid, name in self.conn.execute(
+                        f"SELECT id, name FROM host WHERE name IN ({marks})", chunk
+                    )
+                )
+            return ids
+
+        hosts = list(hosts)
+        ids = lookup(hosts)
+        missing = [h for h in hosts if h not in ids]
+
+        if missing:
+            self.conn.executemany("INSERT INTO host (name) VALUES (?)", ((h,) for h in missing))
+            ids.update(lookup(missing))
+
+        return ids
+
+    def _state_ids(self, keys: Iterable[tuple]) -> Dict[tuple, int]:
+        """{(ports, services): id}, adding the states not indexed yet."""
+        keys = list(set(keys))
+        self.conn.executemany("INSERT OR IGNORE INTO state (ports, services) VALUES (?, ?)", keys)
+
+        ids = {}
+        for start in range(0, len(keys), 250):
+            chunk = keys[start:start + 250]
+            marks = ",".join("(?, ?)" for _ in chunk)
+            params = [value for key in chunk for value in key]
+            ids.update(
+                ((ports, services), rowid) for rowid, ports, services in self.conn.execute(
+                    f"SELECT id, ports, services FROM state WHERE (ports, services) IN (VALUES {marks})",
+                    params
+                )
+            )
+        return ids
+
+    def _last_states(self, host_ids: Iterable[int], before: str) -> Dict[int, int]:
+        """state_id of each host's latest sighting before the given timestamp."""
+        self.conn.execute("DELETE FROM temp.affected")
+        self.conn.executemany("INSERT OR IGNORE INTO temp.affected VALUES (?)", ((h,) for h in host_ids))
+
+        last = {}
+        for host_id, state_id in self.conn.execute(
+            "SELECT host_id, state_id FROM sighting "
+            "JOIN snapshot sn ON sn.id = sighting.snapshot_id "
+            "WHERE host_id IN (SELECT host_id FROM temp.affected) AND sn.timestamp < ? "
+            "ORDER BY sn.timestamp, sn.name",
+            (before,)
+        ):
+            last[host_id] = state_id
+        return last
+
+    def _recompute_changed(self, host_ids: Iterable[int]) -> None:
+        self.conn.execute("DELETE FROM temp.affected")
+        self.conn.executemany("INSERT OR IGNORE INTO temp.affected VALUES (?)", ((h,) for h in host_ids))
+
+        updates = [
+            (int(flag), host_id, snapshot_id)
+            for host_id, snapshot_id, changed, flag in self.conn.execute(_CHANGED_FLAGS).fetchall()
+            if changed != flag
+        ]
+        self.conn.executemany(
+            "UPDATE sighting SET changed = ? WHERE host_id = ? AND snapshot_id = ?", updates
+        )
+
+    def add_snapshot(self, name: str, meta: dict, assets: Dict[str, Asset]) -> None:
+        """
+        Index one snapshot. Appending the newest snapshot (the save path)
+        only compares against the previous snapshot; anything older
+        recomputes the flags of the hosts it contains.
+        """
+        timestamp = meta["timestamp"]
+
+        with self.conn:
+            if name in self.snapshot_names():
+                self._remove(name)
+
+            latest = self.conn.execute(
+                "SELECT id, timestamp FROM snapshot ORDER BY timestamp DESC, name DESC LIMIT 1"
+            ).fetchone()
+
+            snapshot_id = self.conn.execute(
+                "INSERT INTO snapshot (name, timestamp, tag) VALUES (?, ?, ?)",
+                (name, timestamp, meta.get("tag"))
+            ).lastrowid
+
+            host_ids = self._host_ids(assets)
+            keys = _state_keys(assets)
+            state_ids = self._state_ids(keys.values())
+            rows = {host_ids[aid]: state_ids[key] for aid, key in keys.items()}
+
+            if latest is None or latest[1] <= timestamp:
+                previous = dict(self.conn.execute(
+                    "SELECT host_id, state_id FROM sighting WHERE snapshot_id = ?", (latest[0],)
+                )) if latest else {}
+
+                # hosts absent from the previous snapshot: compare with their last sighting
+                absent = [h for h in rows if h not in previous]
+                if absent and latest:
+                    previous.update(self._last_states(absent, timestamp))
+
+                self.conn.executemany(
+                    "INSERT INTO sighting VALUES (?, ?, ?, ?)",
+                    (
+                        (host_id, snapshot_id, state_id, int(previous.get(host_id) != state_id))
+                        for host_id, state_id in rows.items()
+                    )
+                )
+            else:
+                self.conn.executemany(
+                    "INSERT INTO sighting VALUES (?, ?, ?, 0)",
+                    ((host_id, snapshot_id, state_id) for host_id, state_id in rows.items())
+                )
+                self._recompute_changed(rows)
+
+    def _remove(self, name: str) -> list:
+        row = self.conn.execute("SELECT id FROM snapshot WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return []
+
+        host_ids = [h for (h,) in self.conn.execute(
+            "SELECT host_id FROM sighting WHERE snapshot_id = ?", (row[0],)
+        )]
+        self.conn.execute("DELETE FROM snapshot WHERE id = ?", (row[0],))
+        return host_ids
+
+    def remove_snapshots(self, names: Iterable[str]) -> None:
+        """Drop snapshots (after prune) and fix the flags of the sightings that followed them."""
+        with self.conn:
+            affected = set()
+            for name in names:
+                affected.update(self._remove(name))
+
+            if affected:
+                self._recompute_changed(affected)
+
+    def rename_snapshot(self, old: str, new: str) -> None:
+        with self.conn:
+            self.conn.execute("UPDATE snapshot SET name = ? WHERE name = ?", (new, old))
+
+    def clear(self) -> None:
+        with self.conn:
+            for table in ("sighting", "snapshot", "host", "state"):
+                self.conn.execute(f"DELETE FROM {table}")
+
+    # -------------------------------
+    # Queries
+    # -------------------------------
+
+    def recent_changes(self, snapshots: int) -> Dict[str, int]:
+        """
+        {host: number of changes} over the latest `snapshots` snapshots.
+        A host's first sighting is not a change.
+        """
+        return dict(self.conn.execute(
+            """
+            WITH recent AS (
+                SELECT id, timestamp, name FROM snapshot
+                ORDER BY timestamp DESC, name DESC LIMIT ?
+            )
+            SELECT host.name, COUNT(*) FROM sighting
+            JOIN recent ON recent.id = sighting.snapshot_id
+            JOIN host ON host.id = sighting.host_id
+            WHERE sighting.changed = 1 AND EXISTS (
+                SELECT 1 FROM sighting earlier
+                JOIN snapshot sn ON sn.id = earlier.snapshot_id
+                WHERE earlier.host_id = sighting.host_id
+                  AND (sn.timestamp, sn.name) < (recent.timestamp, recent.name)
+            )
+            GROUP BY host.name
+            """,
+            (snapshots,)
+        ))
+
+    def timeline(self, host: str) -> dict | None:
+        """
+        Everything the index knows about `host`, oldest first:
+
+            {"host", "sightings", "snapshots", "first_seen", "last_seen",
+             "present": bool (seen in the latest snapshot),
+             "events": [{"event": "first_seen" | "changed" | "missing" | "seen_again",
+                         "snapshot", "timestamp", "tag", "ports", "services",
+                         "ports_added", "ports_removed", "services_added", "services_removed"}]}
+
+        None when the host was never seen.
+        """
+        row = self.conn.execute("SELECT id FROM host WHERE name = ?", (host,)).fetchone()
+        if row is None:
+            return None
+
+        sightings = {
+            snapshot_id: (json.loads(ports), json.loads(services), changed)
+            for snapshot_id, ports, services, changed in self.conn.execute(
+                "SELECT snapshot_id, ports, services, changed FROM sighting "
+                "JOIN state ON state.id = sighting.state_id WHERE host_id = ?",
+                (row[0],)
+            )
+        }
+        if not sightings:
+            return None
+
+        snapshots = self.conn.execute(
+            "SELECT id, name, timestamp, tag FROM snapshot ORDER BY timestamp, name"
+        ).fetchall()
+
+        events = []
+        state = None       # (ports, services) at the last sighting
+        present = False
+        first_seen = last_seen = None
+
+        for snapshot_id, name, timestamp, tag in snapshots:
+            base = {"snapshot": name, "timestamp": timestamp, "tag": tag}
+            sighting = sightings.get(snapshot_id)
+
+            if sighting is None:
+                if present:
+                    events.append({"event": "missing", **base})
+                present = False
+                continue
+
+            ports, services, changed = sighting
+            last_seen = timestamp
+
+            if state is None:
+                first_seen = timestamp
+                event = "first_seen"
+            elif not present:
+                event = "seen_again"
+            elif changed:
+                event = "changed"
+            else:
+                event = None
+
+            if event:
+                old_ports, old_services = state or ([], [])
+                events.append({
+                    "event": event,
+                    **base,
+                    "ports": ports,
+                    "services": services,
+                    "ports_added": _sorted(set(ports) - set(old_ports)),
+                    "ports_removed": _sorted(set(old_ports) - set(ports)),
+                    "services_added": _sorted(set(services) - set(old_services)),
+                    "services_removed": _sorted(set(old_services) - set(services)),
+                })
+
+            state = (ports, services)
+            present = True
+
+        return {
+            "host": host,
+            "sightings": len(sightings),
+            "snapshots": len(snapshots),
+            "first_seen": first_seen,
+            "last_seen": last_seen,
+            "present": present,
+            "events": events,
+        }
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List
+
+
+INDEX_VERSION = 1
+
+
+def file_sha256(path: Path) -> str:
+    """Hash a file in fixed-size chunks (memory does not depend on file size)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class SnapshotIndex:
+    """
+    Persistent metadata index for a snapshot directory.
+
+    Keeps one entry per snapshot file (timestamp, tag, scanner, asset count,
+    file size and content hash) in `<base>/.meta/index.json`, so that list,
+    tag lookups and prune never have to parse the snapshots themselves.
+
+    Entries are validated against the file size and mtime, so the index is
+    rebuilt transparently for files that are new, changed or deleted.
+    """
+
+    def __init__(self, base_path: Path):
+        self.base_path = Path(base_path)
+        self.path = self.base_path / ".meta" / "index.json"
+        self.entries: Dict[str, dict] = {}
+        self._loaded = False
+        self._dirty = False
+
+    def load(self) -> None:
+        self.entries = {}
+        self._loaded = True
+
+        if not self.path.exists():
+            return
+
+        try:
+            with open(self.path, "r") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            # unreadable index → rebuilt on next refresh
+            return
+
+        if raw.get("version") != INDEX_VERSION:
+            return
+
+        self.entries = raw.get("snapshots", {})
+
+    def save(self) -> None:
+        """
+        Write the index atomically (temp file + rename).
+        """
+        if not self._dirty:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+
+        with open(tmp, "w") as f:
+            json.dump({"version": INDEX_VERSION, "snapshots": self.entries}, f)
+
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.load()
+
+    def add(self, path: Path, entry: dict) -> None:
+        """
+        Record a snapshot that was just written.
+        `entry` must contain timestamp, tag, scanner, assets and sha256.
+        """
+        self._ensure_loaded()
+        st = path.stat()
+        self.entries[path.name] = {
+            **entry,
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+        }
+        self._dirty = True
+
+    def remove(self, name: str) -> None:
+        self._ensure_loaded()
+        if self.entries.pop(name, None) is not None:
+            self._dirty = True
+
+    def _is_fresh(self, path: Path, entry: dict) -> bool:
+        try:
+            st = path.stat()
+        except OSError:
+            return False
+        return (
+            entry.get("size") == st.st_size
+            and entry.get("mtime_ns") == st.st_mtime_ns
+        )
+
+    def refresh(
+        self,
+        paths: Iterable[Path],
+        describe: Callable[[Path], dict],
+    ) -> List[dict]:
+        """
+        Bring the index in line with `paths` and return their entries
+        (same order as `paths`).
+
+        Only files that are missing from the index or whose size/mtime
+        changed are passed to `describe`. Files that cannot be described
+        are recorded with `"error"` so they are not reparsed on every call.
+        """
+        self._ensure_loaded()
+
+        paths = list(paths)
+        names = {p.name for p in paths}
+
+        for name in list(self.entries):
+            if name not in names:
+                del self.entries[name]
+                self._dirty = True
+
+        result = []
+        for path in paths:
+            entry = self.entries.get(path.name)
+
+            if entry is None or not self._is_fresh(path, entry):
+                try:
+                    entry = describe(path)
+                except Exception as e:
+                    entry = {"error": str(e) or type(e).__name__}
+
+                st = path.stat()
+                entry["size"] = st.st_size
+                entry["mtime_ns"] = st.st_mtime_ns
+                self.entries[path.name] = entry
+                self._dirty = True
+
+            result.append({"name": path.name, "path": path, **entry})
+
+        self.save()
+        return result
+
+    def rebuild(
+        self,
+        paths: Iterable[Path],
+        describe: Callable[[Path], dict],
+    ) -> List[dict]:
+        """Drop every entry and re-describe all snapshot files."""
+        self.entries = {}
+        self._loaded = True
+        self._dirty = True
+        return self.refresh(paths, describe)
+
+
+class ChecksumManifest:
+    """
+    Checksums of the snapshot files as the store wrote them, in
+    `<base>/.meta/checksums.json` ({name: sha256}).
+
+    Unlike the index, entries are never recomputed from the files: a file
+    whose hash no longer matches its checksum was changed or damaged after
+    it was written (see `attackdiff doctor`).
+    """
+
+    def __init__(self, base_path: Path):
+        self.path = Path(base_path) / ".meta" / "checksums.json"
+        self.entries: Dict[str, str] = {}
+        self._loaded = False
+        self._dirty = False
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+
+        self._loaded = True
+        try:
+            with open(self.path, "r") as f:
+                raw = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            # unlike the index this cannot be rebuilt, so say so
+            print(f"[!] Unreadable checksum manifest {self.path} ({e}), checksums are lost")
+            return
+
+        self.entries = raw.get("snapshots", {})
+
+    def get(self, name: str) -> str | None:
+        self._ensure_loaded()
+        return self.entries.get(name)
+
+    def set(self, name: str, sha256: str) -> None:
+        self._ensure_loaded()
+        self.entries[name] = sha256
+        self._dirty = True
+
+    def remove(self, name: str) -> None:
+        self._ensure_loaded()
+        if self.entries.pop(name, None) is not None:
+            self._dirty = True
+
+    def save(self) -> None:
+        """Write the manifest atomically (temp file + rename)."""
+        if not self._dirty:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+
+        with open(tmp, "w") as f:
+            json.dump({"version": INDEX_VERSION, "snapshots": self.entries}, f)
+
+        os.replace(tmp, self.path)
+        self._dirty = False
@@ -0,0 +1,175 @@
+"""
+Sorted JSONL snapshot format.
+
+    {"meta": {...}}            <- header line
+    {"id": "a", "host": ...}   <- one asset per line, sorted by id
+    {"id": "b", "host": ...}
+
+Because assets are sorted, two snapshots can be diffed in a single
+merge-join pass that holds one asset of each file at a time.
+"""
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+from attackdiff.asset import Asset
+from attackdiff.compression import open_text
+
+
+SUFFIX = ".jsonl"
+
+# start of every asset line: Asset.to_dict() begins with id, host, ip
+_IDENTITY = re.compile(r'\{"id":"([^"\\]*)","host":"([^"\\]*)","ip":(?:null|"([^"\\]*)")')
+
+
+def write_snapshot(path: Path, meta: dict, assets: Dict[str, Asset]) -> None:
+    with open_text(path, "w") as f:
+        f.write(json.dumps({"meta": meta}) + "\n")
+
+        for aid in sorted(assets):
+            f.write(json.dumps(assets[aid].to_dict(), separators=(",", ":")) + "\n")
+
+
+def read_meta(path: Path) -> dict:
+    """Only the header line is read."""
+    with open_text(path, "r") as f:
+        header = f.readline()
+
+    return json.loads(header).get("meta", {})
+
+
+def _asset_id(data: dict) -> str:
+    return data.get("id", data["host"])
+
+
+def iter_assets(path: Path, where=None) -> Iterator[dict]:
+    """
+    Yield asset dicts in file (id) order, one line at a time.
+
+    where: only the assets matching this AssetFilter. With --host / --cidr,
+    lines of other assets are skipped on their id, host and ip (read with a
+    regex from the start of the line, as write_snapshot writes it) without
+    being decoded.
+    """
+    by_identity = where is not None and bool(where.hosts or where.cidrs)
+
+    with open_text(path, "r") as f:
+        f.readline()  # header
+
+        previous = None
+        for line in f:
+            if not line.strip():
+                continue
+
+            identity = _IDENTITY.match(line) if by_identity else None
+
+            if identity is not None and not where.match_identity(identity[2], identity[3]):
+                data = None
+                aid = identity[1]
+            else:
+                data = json.loads(line)
+                aid = _asset_id(data)
+
+            if previous is not None and aid <= previous:
+                raise ValueError(f"{Path(path).name}: assets are not sorted by id at {aid}")
+            previous = aid
+
+            if data is not None and (where is None or where.matches(data)):
+                yield data
+
+
+def changed_record(old: dict, new: dict) -> dict | None:
+    """
+    Same comparison as diff_assets for one asset present in both snapshots.
+    """
+    old_ports = set(old.get("ports", []))
+    new_ports = set(new.get("ports", []))
+    old_services = set(old.get("services", []))
+    new_services = set(new.get("services", []))
+
+    if old_ports == new_ports and old_services == new_services:
+        return None
+
+    return {
+        "host": new["host"],
+        "ports_added": sorted(new_ports - old_ports),
+        "ports_removed": sorted(old_ports - new_ports),
+        "services_added": sorted(new_services - old_services),
+        "services_removed": sorted(old_services - new_services),
+    }
+
+
+def iter_diff(old_path: Path, new_path: Path, where=None) -> Iterator[Tuple[str, dict]]:
+    """
+    Merge-join two sorted JSONL snapshots and yield diff events one at a time:
+
+        ("new", asset_dict)
+        ("missing", asset_dict)
+        ("changed", changed_assets record)
+
+    Memory does not depend on snapshot size.
+
+    where: only assets matching this AssetFilter in either snapshot. Its
+    host / CIDR part is applied while reading, ports / services on each
+    pair, so an asset that lost a filtered port is still "changed".
+    """
+    identity = where.identity() if where is not None else None
+    old_it = iter_assets(old_path, identity)
+    new_it = iter_assets(new_path, identity)
+
+    old = next(old_it, None)
+    new = next(new_it, None)
+
+    while old is not None or new is not None:
+        if new is None or (old is not None and _asset_id(old) < _asset_id(new)):
+            if where is None or where.matches(old):
+                yield "missing", old
+            old = next(old_it, None)
+
+        elif old is None or _asset_id(new) < _asset_id(old):
+            if where is None or where.matches(new):
+                yield "new", new
+            new = next(new_it, None)
+
+        else:
+            record = changed_record(old, new)
+            if record is not None and (where is None or where.matches(old) or where.matches(new)):
+                yield "changed", record
+            old = next(old_it, None)
+            new = next(new_it, None)
+
+
+def collect_diff(events: Iterator[Tuple[str, dict]]) -> dict:
+    """
+    Build the diff_assets result shape from diff events (only the diff
+    itself is held in memory).
+    """
+    diff = {
+        "new_assets": {},
+        "missing_assets": {},
+        "changed_assets": [],
+    }
+
+    for kind, data in events:
+        if kind == "changed":
+            diff["changed_assets"].append(data)
+        else:
+            asset = Asset.from_dict(data)
+            diff[f"{kind}_assets"][asset.id] = asset
+
+    return diff
+
+
+def record_diff(events: Iterator[Tuple[str, dict]], diff: dict) -> Iterator[Tuple[str, dict]]:
+    """
+    Pass diff events through, adding them to `diff` on the way (the
+    normalized shape, as dicts): output can be streamed while the diff is
+    still collected for the diff cache.
+    """
+    for kind, data in events:
+        if kind == "changed":
+            diff["changed_assets"].append(data)
+        else:
+            diff[f"{kind}_assets"][_asset_id(data)] = data
+        yield kind, data
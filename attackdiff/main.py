@@ -1,74 +1,144 @@
-from attackdiff.asset import Asset
-from attackdiff.storage import AssetStorage
-from attackdiff.diff import diff_assets
-from attackdiff.storage import SnapshotStorage
+# Command modules are imported in their branch of run(), so that a command
+# only pays for what it uses (see benchmarks/import_time.py).
+from attackdiff import metrics
+from attackdiff.storage import SnapshotStorage, open_storage
 from attackdiff.cli import build_parser
-from attackdiff.scanners.nmap import NmapScanner
-from attackdiff.scanners.subfinder_scanner import SubfinderScanner
-from attackdiff.output import print_diff, diff_to_json
 import os
 import sys
 
 
 
-def main():
+def main(argv=None):
     parser = build_parser()
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
+    if args.metrics or args.profile:
+        from attackdiff.metrics import instrumented
+
+        with instrumented(args.command, args.metrics, args.profile):
+            run(args)
+    else:
+        run(args)
+
+
+def run(args):
     try:
         if args.command == "scan":
             # Targets are already a list thanks to nargs="+"
             targets = args.targets
 
-            if args.scanner == "nmap":
+            from attackdiff.scanners.registry import create_scanner
+
+            names = list(dict.fromkeys(args.scanner))
+
+            if "nmap" in names:
                 # Warn about privileged scan options
                 if args.nmap_args and os.name != "nt":
                     if os.geteuid() != 0:
                         print("[!] Warning: some Nmap options may require sudo")
 
-                scanner = NmapScanner(
-                    extra_args=args.nmap_args
-                )
+            scanners = {name: create_scanner(name, args) for name in names}
 
-            elif args.scanner == "subfinder":
-                scanner = SubfinderScanner(
-                    extra_args=args.subfinder_args,
-                    use_httpx=args.httpx,
-                    httpx_args=args.httpx_args
-                )
+            if len(scanners) > 1:
+                from attackdiff.scanners.combined import CombinedScan
 
+                scanner = CombinedScan(scanners)
             else:
-                raise ValueError(f"Unknown scanner: {args.scanner}")
+                scanner = scanners[names[0]]
+
+            storage = None
+
+            if args.adaptive:
+                if names != ["nmap"]:
+                    raise ValueError("--adaptive is only supported with --scanner nmap")
+
+                from datetime import timedelta
+                from attackdiff.adaptive import AdaptiveScan
+
+                storage = open_storage()
+                scanner = AdaptiveScan(
+                    storage,
+                    scanner,
+                    deep_every=timedelta(days=args.deep_every),
+                    quick_every=timedelta(hours=args.quick_every),
+                    volatile_changes=args.volatile_changes,
+                    volatile_window=args.volatile_window
+                )
 
             # Run scan
-            assets = scanner.scan(targets=targets)
+            with metrics.phase("scan") as p:
+                assets = scanner.scan(targets=targets)
+                p.count(assets=len(assets), ports=sum(len(a.ports) for a in assets.values()))
+
+            if args.adaptive:
+                reasons = scanner.reasons
+                print(
+                    f"[+] Adaptive plan: {len(scanner.plan['deep'])} deep "
+                    f"({reasons['new']} new, {reasons['stale']} stale, {reasons['volatile']} volatile), "
+                    f"{len(scanner.plan['quick'])} quick, {len(scanner.plan['carry'])} carried forward"
+                )
+                if scanner.escalated:
+                    print(f"[+] {len(scanner.escalated)} host(s) differed on quick check and were deep scanned")
+
+            if len(scanners) > 1:
+                found = ", ".join(f"{name} {count}" for name, count in scanner.counts.items())
+                print(f"[+] Joined {len(assets)} asset(s) from {found}")
 
             # Store snapshot
-            storage = SnapshotStorage()
+            storage = storage or open_storage()
 
-            snapshot_path = storage.save_snapshot(
-                assets,
-                tag=args.tag,
-                scanner=args.scanner
-            )
+            with metrics.phase("save", assets=len(assets)):
+                snapshot_path = storage.save_snapshot(
+                    assets,
+                    tag=args.tag,
+                    scanner=",".join(names)
+                )
 
             print(f"[+] Scan saved: {snapshot_path.name}")
 
+            if args.adaptive:
+                scanner.save_state()
+
             print(f"[+] Scan completed: {snapshot_path}")
 
+            failed_shards = getattr(scanner, "failed_shards", [])
+            if failed_shards:
+                for number, shard, error in failed_shards:
+                    print(
+                        f"[!] Shard {number} failed ({len(shard)} target(s), "
+                        f"{shard[0]} .. {shard[-1]}): {error}"
+                    )
+                print(f"[!] {len(failed_shards)} shard(s) failed, snapshot is incomplete")
+                sys.exit(2)
+
             sys.exit(0)
 
             
         
         elif args.command == "diff":
-            storage = SnapshotStorage()
+            from attackdiff.diff import diff_assets
+            from attackdiff.filters import AssetFilter
+            from attackdiff.jsonl import collect_diff, iter_diff, record_diff
+            from attackdiff.output import iter_diff_events, normalize_diff, write_json, write_ndjson, write_text
+
+            if args.json and args.ndjson:
+                raise SystemExit("[!] --json cannot be combined with --ndjson")
+
+            # --host / --cidr / --port / --service, applied as snapshots are read
+            where = AssetFilter.from_args(args)
+
+            storage = open_storage()
 
             # ---- Mode 1: last ----
             if args.last:
                 if args.from_snapshot or args.to_snapshot or args.from_tag or args.to_tag:
                     raise SystemExit("[!] --last cannot be combined with other diff options")
 
-                old_assets, new_assets = storage.load_last_two_snapshots()
+                snapshots = storage.list_snapshots()
+                if len(snapshots) < 2:
+                    raise RuntimeError("Not enough snapshots to diff")
+
+                old_path, new_path = snapshots[-2], snapshots[-1]
 
             # ---- Mode 2: explicit snapshots ----
             elif args.from_snapshot or args.to_snapshot:
@@ -82,77 +152,138 @@ def main():
                 old_path = storage.resolve_snapshot(args.from_snapshot)
                 new_path = storage.resolve_snapshot(args.to_snapshot)
 
-                old_assets = storage.load_snapshot(old_path)
-                new_assets = storage.load_snapshot(new_path)
-
             # ---- Mode 3: tags ----
             elif args.from_tag or args.to_tag:
                 if not (args.from_tag and args.to_tag):
                     raise SystemExit("[!] --from-tag requires --to-tag")
 
-                from_path = storage.find_snapshot_by_tag(args.from_tag)
-                to_path = storage.find_snapshot_by_tag(args.to_tag)
-
-                old_assets = storage.load_snapshot(from_path)
-                new_assets = storage.load_snapshot(to_path)
+                old_path = storage.find_snapshot_by_tag(args.from_tag)
+                new_path = storage.find_snapshot_by_tag(args.to_tag)
 
             # ---- Mode 4: since ----
             elif args.since:
-                base_path = storage.find_snapshot_by_tag(args.since)
-                latest_path = storage.get_latest_snapshot()
-
-                old_assets = storage.load_snapshot(base_path)
-                new_assets = storage.load_snapshot(latest_path)
+                old_path = storage.find_snapshot_by_tag(args.since)
+                new_path = storage.get_latest_snapshot()
 
             else:
                 raise SystemExit(
                     "[!] You must specify one diff mode: "
                     "--last OR --from/--to OR --from-tag/--to-tag OR --since"
                 )
-            
 
-            diff = diff_assets(old_assets, new_assets)
+            # ---- Cached result (keyed by both snapshots' content hashes) ----
+            cache = storage.diff_cache
+            cache_key = None
+            diff = None
 
-            if args.json:
-                from attackdiff.output import diff_to_json
-                print(diff_to_json(diff))
-            else:
-                print_diff(diff)
+            if not args.no_cache and cache.enabled:
+                old_sha = storage.snapshot_sha256(old_path)
+                new_sha = storage.snapshot_sha256(new_path)
+
+                if old_sha and new_sha:
+                    cache_key = cache.key(old_sha, new_sha, {"filter": where.options()} if where else None)
+                    with metrics.phase("diff.cache") as p:
+                        diff = cache.get(cache_key)
+                        p.count(hits=diff is not None)
+
+            streamable = diff is None and storage.can_stream_diff(old_path, new_path)
+
+            # ---- NDJSON from sorted JSONL snapshots: events are written as the merge-join finds them ----
+            if streamable and args.ndjson:
+                events = iter_diff(old_path, new_path, where)
+
+                if cache_key:
+                    diff = {"new_assets": {}, "missing_assets": {}, "changed_assets": []}
+                    events = record_diff(events, diff)
+
+                with metrics.phase("output") as p:
+                    p.count(**write_ndjson(events))
+
+                if cache_key:
+                    cache.put(cache_key, diff)
+
+                sys.exit(0)
+
+            if diff is None:
+                if streamable:
+                    # sorted JSONL snapshots: merge-join, only the diff is kept in memory
+                    with metrics.phase("diff"):
+                        diff = collect_diff(iter_diff(old_path, new_path, where))
+                elif where:
+                    old_assets, new_assets = storage.load_slice(old_path, new_path, where)
+
+                    diff = diff_assets(old_assets, new_assets)
+                else:
+                    old_assets = storage.load_snapshot(old_path)
+                    new_assets = storage.load_snapshot(new_path)
+
+                    diff = diff_assets(old_assets, new_assets)
+
+                if cache_key:
+                    diff = normalize_diff(diff)
+                    cache.put(cache_key, diff)
+
+            # Assets are converted one at a time as they are written
+            with metrics.phase("output") as p:
+                p.count(
+                    new=len(diff["new_assets"]),
+                    missing=len(diff["missing_assets"]),
+                    changed=len(diff["changed_assets"])
+                )
+
+                if args.ndjson:
+                    write_ndjson(iter_diff_events(diff))
+                elif args.json:
+                    write_json(diff)
+                    sys.stdout.write("\n")
+                else:
+                    write_text(diff)
 
             sys.exit(0)
 
 
         
         elif args.command == "list":
-            storage = SnapshotStorage()
-            snapshots = storage.list_snapshots()
+            where = None
+            if args.host or args.cidr or args.port or args.service:
+                from attackdiff.filters import AssetFilter
+                where = AssetFilter.from_args(args)
 
-            if not snapshots:
+            storage = open_storage()
+            entries = storage.snapshot_entries()
+
+            if not entries:
                 print("[!] No snapshots found")
                 return
 
-            for path in snapshots:
-                meta = storage.load_meta(path)
-                tag = meta.get("tag", "-")
+            for entry in entries:
+                tag = entry.get("tag") or "-"
 
-                if args.short:
-                    if args.tag and meta.get("tag") != args.tag:
-                        continue
-                    print(path.name)
+                if args.tag and entry.get("tag") != args.tag:
+                    continue
 
-                else:
-                    if args.tag and meta.get("tag") != args.tag:
+                # with filters: matching assets / all assets, snapshots without any skipped
+                assets = entry.get("assets")
+                if where is not None and "error" not in entry:
+                    matching = len(storage.load_snapshot(entry["path"], where))
+                    if not matching:
                         continue
+                    assets = f"{matching}/{entry['assets']}"
 
-                    assets = storage.load_snapshot(path)
+                if args.short:
+                    print(entry["name"])
 
-                    print(f"{path.name:<30} tag: {tag} assets: {len(assets)}")
+                elif "error" in entry:
+                    print(f"{entry['name']:<30} [corrupted: {entry['error']}]")
+
+                else:
+                    print(f"{entry['name']:<30} tag: {tag} assets: {assets}")
 
             sys.exit(0)
 
 
         elif args.command == "prune":
-            storage = SnapshotStorage()
+            storage = open_storage()
 
             print(args)
             print(storage.has_retention_rule(args))
@@ -173,12 +304,14 @@ def main():
             if args.force and args.dry_run:
                 print("Dry-run active: no files will actually be deleted.")
 
-            result = storage.prune(
-                keep_last=args.keep_last,
-                keep_days=args.keep_days,
-                dry_run=args.dry_run,
-                tag=args.tag
-            )
+            with metrics.phase("prune") as p:
+                result = storage.prune(
+                    keep_last=args.keep_last,
+                    keep_days=args.keep_days,
+                    dry_run=args.dry_run,
+                    tag=args.tag
+                )
+                p.count(deleted=sum(d["action"] == "delete" for d in result["decisions"]))
 
             if args.dry_run:
                 for d in result["decisions"]:
@@ -197,9 +330,246 @@ def main():
             sys.exit(0)
         
 
+        elif args.command == "migrate":
+            from attackdiff.sqlite_storage import SqliteSnapshotStorage
+            from attackdiff.storage import load_store_config, save_store_config
+
+            config = load_store_config()
+            if config.get("backend") == args.to:
+                raise SystemExit(f"[!] Store already uses the {args.to} backend")
+
+            json_storage = SnapshotStorage()
+            sqlite_storage = SqliteSnapshotStorage()
+
+            result = sqlite_storage.import_json_snapshots(
+                json_storage,
+                batch_size=args.batch_size
+            )
+
+            for path, error in result["failed"]:
+                print(f"[!] Skipped corrupted snapshot {path.name}: {error}")
+
+            print(
+                f"[+] Imported {result['imported']} snapshot(s) into {sqlite_storage.db_path} "
+                f"({result['skipped']} already present)"
+            )
+
+            if result["failed"] and not args.force:
+                print("[!] Store backend NOT switched because some snapshots failed to import (use --force)")
+                sys.exit(2)
+
+            config["backend"] = args.to
+            save_store_config(config)
+            print(f"[+] Store backend set to {args.to} (JSON files were left in place)")
+
+            sys.exit(0)
+
+
+        elif args.command == "import":
+            from attackdiff.bulk_import import import_files
+
+            if not args.paths and not args.manifest:
+                raise SystemExit("[!] import requires files, directories or --manifest")
+
+            storage = open_storage()
+            result = import_files(storage, args.paths, args.manifest, workers=args.workers)
+
+            for names, error in result["failed"]:
+                print(f"[!] Could not import {', '.join(names)}: {error}")
+
+            seconds = result["seconds"]
+            rate = f", {result['bytes'] / seconds / 1e6:.1f} MB/s" if seconds > 0 else ""
+            print(
+                f"[+] Imported {result['imported']} snapshot(s), {result['assets']} asset(s) "
+                f"in {seconds:.1f}s{rate} ({result['skipped']} already present)"
+            )
+
+            sys.exit(2 if result["failed"] else 0)
+
+
+        elif args.command == "timeline":
+            import json
+            from attackdiff.output import print_timeline_interval
+            from attackdiff.timeline import iter_timeline, select_range, summarize
+
+            if args.last is not None:
+                if args.from_tag or args.to_tag:
+                    raise SystemExit("[!] --last cannot be combined with tags")
+            elif not (args.from_tag and args.to_tag):
+                raise SystemExit("[!] timeline requires --from-tag and --to-tag, or --last N")
+
+            if args.workers < 1:
+                raise ValueError("--workers must be >= 1")
+
+            storage = open_storage()
+            paths = select_range(storage, args.from_tag, args.to_tag, args.last)
+
+            intervals = iter_timeline(
+                storage,
+                paths,
+                workers=args.workers,
+                events=not args.summary,
+                use_cache=not args.no_cache
+            )
+
+            if args.json:
+                intervals = list(intervals)
+                print(json.dumps({
+                    "snapshots": [p.name for p in paths],
+                    "intervals": intervals,
+                    "totals": summarize(intervals),
+                }, indent=2))
+                sys.exit(0)
+
+            print(f"[+] Timeline of {len(paths)} snapshots ({len(paths) - 1} intervals)")
+
+            seen = []
+            for interval in intervals:
+                print_timeline_interval(interval)
+                interval.pop("events", None)  # printed, no need to keep them
+                seen.append(interval)
+
+            totals = summarize(seen)
+            print(f"\n[=] Total: +{totals['added']}  -{totals['removed']}  ~{totals['changed']}")
+
+            sys.exit(0)
+
+        elif args.command == "history":
+            import json
+            from attackdiff.output import print_history
+
+            storage = open_storage()
+
+            if args.rebuild:
+                result = storage.rebuild_history()
+                print(f"[+] History index rebuilt from {result['added']} snapshot(s)")
+                if not args.host:
+                    sys.exit(0)
+
+            elif not args.host:
+                raise SystemExit("[!] history requires a host (or --rebuild)")
+
+            else:
+                # index snapshots saved before the index existed (or by hand)
+                storage.sync_history()
+
+            timeline = storage.history.timeline(args.host)
+
+            if timeline is None:
+                print(f"[!] {args.host} was not seen in any snapshot")
+                sys.exit(1)
+
+            if args.json:
+                print(json.dumps(timeline, indent=2))
+            else:
+                print_history(timeline)
+
+            sys.exit(0)
+
+        elif args.command == "convert":
+            from attackdiff.storage import load_store_config
+
+            if load_store_config().get("backend") != "json":
+                raise ValueError("Snapshot formats only apply to the json backend")
+
+            storage = open_storage()
+
+            if args.snapshots:
+                paths = [storage.resolve_snapshot(value) for value in args.snapshots]
+            else:
+                paths = storage.list_snapshots()
+
+            converted = 0
+            failed = 0
+
+            for path in paths:
+                try:
+                    target = storage.convert_snapshot(path, args.to)
+                except Exception as e:
+                    print(f"[!] Could not convert {path.name}: {e}")
+                    failed += 1
+                    continue
+
+                if target is not None:
+                    print(f"  {path.name} -> {target.name}")
+                    converted += 1
+
+            print(
+                f"[+] Converted {converted} snapshot(s) to {args.to} "
+                f"({len(paths) - converted - failed} already in that format)"
+            )
+
+            sys.exit(2 if failed else 0)
+
+        elif args.command == "config":
+            from attackdiff.storage import load_store_config, save_store_config
+
+            config = load_store_config()
+
+            if args.format is not None:
+                if config.get("backend") != "json":
+                    raise ValueError("--format only applies to the json backend")
+
+                config["format"] = args.format
+
+            if args.compression is not None:
+                if config.get("backend") != "json":
+                    raise ValueError("--compression only applies to the json backend")
+
+                config["compression"] = None if args.compression == "none" else args.compression
+
+            if config.get("compression") and config.get("format") == "binary":
+                raise ValueError("Binary snapshots cannot be compressed (they are read with mmap)")
+
+            if config.get("format", "json") != "json" and (
+                args.delta_keyframes if args.delta_keyframes is not None
+                else config.get("delta_keyframe_interval")
+            ):
+                raise ValueError("Delta snapshots require --format json")
+
+            if args.delta_keyframes is not None:
+                if args.delta_keyframes < 0:
+                    raise ValueError("--delta-keyframes must be >= 0")
+
+                if args.delta_keyframes and config.get("backend") != "json":
+                    raise ValueError("Delta snapshots are only supported by the json backend")
+
+                config["delta_keyframe_interval"] = args.delta_keyframes or None
+
+            if args.diff_cache_mb is not None:
+                if args.diff_cache_mb < 0:
+                    raise ValueError("--diff-cache-mb must be >= 0")
+
+                config["diff_cache_mb"] = args.diff_cache_mb
+
+            changes = (args.format, args.compression, args.delta_keyframes, args.diff_cache_mb)
+
+            if any(value is not None for value in changes):
+                save_store_config(config)
+                print("[+] Store configuration updated")
+
+            for key, value in config.items():
+                print(f"{key:<25} {value}")
+
+            sys.exit(0)
+
+
+        elif args.command == "daemon":
+            from attackdiff.daemon import Daemon, load_daemon_config
+
+            daemon = Daemon(load_daemon_config(args.config))
+
+            if args.check:
+                daemon.print_schedule()
+                sys.exit(0)
+
+            daemon.run()
+            sys.exit(0)
+
+
         elif args.command == "doctor":
             from attackdiff.doctor import run_doctor
-            exit_code = run_doctor()
+            exit_code = run_doctor(quick=args.quick, workers=args.workers)
             raise SystemExit(exit_code)
 
         
@@ -218,6 +588,14 @@ Example commands :
 
 attackdiff scan --scanner nmap --targets 1.1.1.1 1.1.1.2 --nmap-arg="-sS -p80"
 
+attackdiff scan --scanner nmap --targets 10.0.0.0/16 --workers 16 --shard-size 512
+
+attackdiff scan --scanner nmap --targets 10.0.0.0/16 --workers 16 --adaptive --deep-every 7 --quick-every 12
+
+attackdiff scan --scanner subfinder nmap --targets example.com 203.0.113.0/28
+
+attackdiff import old-scans/ --manifest old-scans/manifest.json --workers 8
+
 attackdiff diff --from file1.json --to file2.json
 
 attackdiff diff --last
@@ -226,6 +604,12 @@ attackdiff diff --from-tag tag1 --to-tag tag2
 
 attackdiff diff --since tag1 --json
 
+attackdiff diff --last --ndjson
+
+attackdiff diff --last --host '*.prod.example.com' --port 22 --port 3389
+
+attackdiff list --cidr 10.0.0.0/16 --service ssh
+
 attackdiff list --short
 
 attackdiff list 
@@ -238,6 +622,24 @@ attackdiff prune --keep-last 10 --tag tag1 --dry-run
 
 attackdiff doctor
 
+attackdiff daemon --config daemon.json --check
+
+attackdiff migrate --to sqlite
+
+attackdiff config --delta-keyframes 24
+
+attackdiff config --format jsonl --delta-keyframes 0
+
+attackdiff convert --to binary
+
+attackdiff config --compression gzip
+
+attackdiff config --diff-cache-mb 512
+
+attackdiff history 10.2.3.4
+
+attackdiff timeline --from-tag baseline --to-tag weekly --workers 4
+
 
 
 Exit code meaning : 
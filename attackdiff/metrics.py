@@ -0,0 +1,279 @@
+"""
+Per-phase metrics (--metrics) and profiling (--profile) of a command run.
+
+Code marks its phases with
+
+    with metrics.phase("save") as p:
+        ...
+        p.count(assets=len(assets))
+
+which costs nothing unless a recorder is active for the current thread
+(set by `instrumented` around a command). A phase that runs several times
+(e.g. "load" for every snapshot, "nmap.parse" for every chunk of nmap output)
+accumulates: calls, wall time, CPU time of the thread running it, the peak
+RSS of the process when it ended, and the counts. Worker threads only record
+into the command's recorder when their job is wrapped with `bind`.
+
+The whole run is recorded as well, with the CPU time of child processes
+(nmap, subfinder) and the exit code, then written as JSON and as a
+Prometheus textfile-collector file.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+_local = threading.local()
+
+
+def _peak_rss() -> int | None:
+    if resource is None:
+        return None
+
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def _children_cpu() -> float | None:
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class _Phase:
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def count(self, **counts: int) -> None:
+        for key, value in counts.items():
+            self.stats["counts"][key] = self.stats["counts"].get(key, 0) + value
+
+
+class _NullPhase:
+    def count(self, **counts: int) -> None:
+        pass
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class Recorder:
+    def __init__(self, command: str):
+        self.command = command
+        self.phases: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        with self._lock:
+            stats = self.phases.setdefault(name, {
+                "calls": 0,
+                "wall_seconds": 0.0,
+                "cpu_seconds": 0.0,
+                "peak_rss_bytes": None,
+                "counts": {},
+            })
+
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+
+        try:
+            yield _Phase(stats)
+        finally:
+            with self._lock:
+                stats["calls"] += 1
+                stats["wall_seconds"] += time.perf_counter() - wall
+                stats["cpu_seconds"] += time.thread_time() - cpu
+                stats["peak_rss_bytes"] = _peak_rss()
+
+
+def current() -> Recorder | None:
+    return getattr(_local, "recorder", None)
+
+
+@contextmanager
+def phase(name: str, **counts: int):
+    recorder = current()
+
+    if recorder is None:
+        yield _NULL_PHASE
+        return
+
+    with recorder.phase(name) as p:
+        p.count(**counts)
+        yield p
+
+
+def bind(fn: Callable) -> Callable:
+    """Wrap fn to record into the calling thread's recorder (for thread pools)."""
+    recorder = current()
+    if recorder is None:
+        return fn
+
+    def bound(*args, **kwargs):
+        previous = current()
+        _local.recorder = recorder
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.recorder = previous
+
+    return bound
+
+
+# -------------------------------
+# Output
+# -------------------------------
+
+def _write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def to_prometheus(report: dict) -> str:
+    command = _label(report["command"])
+    run = report["run"]
+    lines = []
+
+    def metric(name: str, help_text: str, samples: list) -> None:
+        samples = [(labels, value) for labels, value in samples if value is not None]
+        if not samples:
+            return
+        lines.append(f"# HELP attackdiff_{name} {help_text}")
+        lines.append(f"# TYPE attackdiff_{name} gauge")
+        for labels, value in samples:
+            text = ",".join(f'{k}="{_label(str(v))}"' for k, v in {"command": command, **labels}.items())
+            lines.append(f"attackdiff_{name}{{{text}}} {value}")
+
+    metric("run_exit_code", "Exit code of the last run (0 ok, 1 user error, 2 runtime failure)",
+           [({}, report["exit_code"])])
+    metric("run_timestamp_seconds", "Start of the last run (unix time)", [({}, run["started_unix"])])
+    metric("run_wall_seconds", "Wall time of the last run", [({}, run["wall_seconds"])])
+    metric("run_cpu_seconds", "CPU time of the last run (this process)", [({}, run["cpu_seconds"])])
+    metric("run_children_cpu_seconds", "CPU time of the scanner subprocesses of the last run",
+           [({}, run["children_cpu_seconds"])])
+    metric("run_peak_rss_bytes", "Peak RSS of the last run", [({}, run["peak_rss_bytes"])])
+
+    phases = report["phases"]
+    metric("phase_calls", "Times each phase ran",
+           [({"phase": name}, p["calls"]) for name, p in phases.items()])
+    metric("phase_wall_seconds", "Wall time per phase (summed over calls and threads)",
+           [({"phase": name}, round(p["wall_seconds"], 6)) for name, p in phases.items()])
+    metric("phase_cpu_seconds", "CPU time per phase (summed over calls and threads)",
+           [({"phase": name}, round(p["cpu_seconds"], 6)) for name, p in phases.items()])
+    metric("phase_peak_rss_bytes", "Process peak RSS at the end of each phase",
+           [({"phase": name}, p["peak_rss_bytes"]) for name, p in phases.items()])
+    metric("phase_items", "Items (assets, ports, hosts, ...) handled per phase",
+           [({"phase": name, "kind": kind}, value)
+            for name, p in phases.items() for kind, value in p["counts"].items()])
+
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(report: dict, path: str | Path) -> tuple:
+    """
+    JSON to `path`, Prometheus text to the same path with a .prom suffix
+    (path.prom gives path.json and path.prom). Returns both paths.
+    """
+    path = Path(path)
+    prom_path = path.with_suffix(".prom")
+    if path == prom_path:
+        path = path.with_suffix(".json")
+
+    _write_atomic(path, json.dumps(report, indent=2) + "\n")
+    _write_atomic(prom_path, to_prometheus(report))
+    return path, prom_path
+
+
+# -------------------------------
+# Command wrapper
+# -------------------------------
+
+def _exit_status(code) -> int:
+    if code is None:
+        return 0
+    return code if isinstance(code, int) else 1
+
+
+@contextmanager
+def instrumented(command: str, metrics_path: str | None = None, profile_path: str | None = None):
+    """Record (and/or profile) the wrapped command; outputs are written even when it fails."""
+    recorder = Recorder(command) if metrics_path else None
+    profiler = None
+
+    if profile_path:
+        import cProfile
+        profiler = cProfile.Profile()
+
+    previous = current()
+    _local.recorder = recorder
+
+    started = datetime.now(timezone.utc)
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    children_cpu = _children_cpu()
+    exit_code = 0
+
+    if profiler:
+        profiler.enable()
+
+    try:
+        yield recorder
+    except SystemExit as e:
+        exit_code = _exit_status(e.code)
+        raise
+    except BaseException:
+        exit_code = 2
+        raise
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+            print(f"[+] Profile written to {profile_path} (python -m pstats {profile_path})", file=sys.stderr)
+
+        _local.recorder = previous
+
+        if recorder:
+            children_end = _children_cpu()
+            report = {
+                "command": command,
+                "exit_code": exit_code,
+                "run": {
+                    "started": started.isoformat(),
+                    "started_unix": round(started.timestamp(), 3),
+                    "wall_seconds": round(time.perf_counter() - wall, 6),
+                    "cpu_seconds": round(time.process_time() - cpu, 6),
+                    "children_cpu_seconds": (
+                        round(children_end - children_cpu, 6) if children_cpu is not None else None
+                    ),
+                    "peak_rss_bytes": _peak_rss(),
+                },
+                "phases": {
+                    name: {**stats, "wall_seconds": round(stats["wall_seconds"], 6),
+                           "cpu_seconds": round(stats["cpu_seconds"], 6)}
+                    for name, stats in recorder.phases.items()
+                },
+            }
+
+            json_path, prom_path = write_metrics(report, metrics_path)
+            print(f"[+] Metrics written to {json_path} and {prom_path}", file=sys.stderr)
@@ -1,78 +1,268 @@
 import json
+import sys
+from typing import IO, Dict, Iterable, Iterator, Tuple
 
-def diff_to_json(diff: dict) -> str:
-    """Function that outputs the diff in JSON format"""
-    normalized = {
+# diff output is written in chunks of this many lines / entries
+_CHUNK = 1000
+
+_NDJSON_EVENTS = {"new": "added", "missing": "removed", "changed": "changed"}
+
+
+def _as_dict(asset) -> dict:
+    return asset if isinstance(asset, dict) else asset.to_dict()
+
+
+def normalize_diff(diff: dict) -> dict:
+    """
+    Diff with plain dicts instead of Asset objects (the JSON output shape,
+    also what the diff cache stores). Already normalized diffs are returned
+    as they are.
+    """
+    return {
         "new_assets": {
-            aid: asset.to_dict()
+            aid: _as_dict(asset)
             for aid, asset in diff.get("new_assets", {}).items()
         },
         "missing_assets": {
-            aid: asset.to_dict()
+            aid: _as_dict(asset)
             for aid, asset in diff.get("missing_assets", {}).items()
         },
         "changed_assets": diff.get("changed_assets", [])
     }
 
-    return json.dumps(normalized, indent=2)
 
+def iter_diff_events(diff: dict) -> Iterator[Tuple[str, dict]]:
+    """
+    A diff (Asset objects or normalized) as the ("new" | "missing" | "changed",
+    dict) events of jsonl.iter_diff, converting one asset at a time.
+    """
+    for kind in ("new", "missing"):
+        for asset in diff.get(f"{kind}_assets", {}).values():
+            yield kind, _as_dict(asset)
+
+    for record in diff.get("changed_assets", []):
+        yield "changed", record
+
+
+def _chunked_writer(out: IO[str]):
+    """(add, flush): collect text parts and write them to `out` in chunks."""
+    parts = []
+
+    def flush() -> None:
+        if parts:
+            out.write("".join(parts))
+            parts.clear()
+
+    def add(*texts: str) -> None:
+        parts.extend(texts)
+        if len(parts) >= _CHUNK:
+            flush()
+
+    return add, flush
+
+
+def write_ndjson(events: Iterable[Tuple[str, dict]], out: IO[str] = None) -> Dict[str, int]:
+    """
+    One compact JSON object per line and per event, written as the events
+    come (a consumer can start before the diff is complete):
+
+        {"event": "added", "id": ..., "host": ..., "ports": [...], ...}
+        {"event": "removed", "id": ..., "host": ..., ...}
+        {"event": "changed", "host": ..., "ports_added": [...], ...}
+
+    Returns the number of events of each kind.
+    """
+    out = out or sys.stdout
+    add, flush = _chunked_writer(out)
+    counts = dict.fromkeys(_NDJSON_EVENTS, 0)
+    encode = json.JSONEncoder(separators=(",", ":")).encode
+
+    for kind, data in events:
+        counts[kind] += 1
+        if kind == "changed":
+            event = {"event": "changed", **data}
+        else:
+            event = {"event": _NDJSON_EVENTS[kind], "id": data.get("id", data["host"]), **data}
+        add(encode(event), "\n")
+
+        # complete lines reach the consumer at least every chunk
+        if counts[kind] % _CHUNK == 0:
+            flush()
+            out.flush()
+
+    flush()
+    out.flush()
+    return counts
+
+
+_INDENTED = json.JSONEncoder(indent=2).encode
+
+
+def _indented(value, level: int) -> str:
+    """json.dumps(value, indent=2) as nested `level` deep in a document."""
+    return _INDENTED(value).replace("\n", "\n" + "  " * level)
+
+
+def write_json(diff: dict, out: IO[str] = None) -> None:
+    """
+    The diff_to_json document, written entry by entry instead of being
+    built as one string (same bytes, without the trailing newline).
+    """
+    out = out or sys.stdout
+    add, flush = _chunked_writer(out)
+
+    add("{")
+    for key in ("new_assets", "missing_assets", "changed_assets"):
+        items = diff.get(key) or ({} if key != "changed_assets" else [])
+        open_, close = ("[", "]") if key == "changed_assets" else ("{", "}")
+
+        add("," if key != "new_assets" else "", f'\n  "{key}": {open_}')
+
+        if not items:
+            add(close)
+            continue
+
+        if key == "changed_assets":
+            entries = (f"\n    {_indented(record, 2)}" for record in items)
+        else:
+            entries = (
+                f"\n    {_INDENTED(aid)}: {_indented(_as_dict(asset), 2)}"
+                for aid, asset in items.items()
+            )
+
+        for i, entry in enumerate(entries):
+            add("," if i else "", entry)
+
+        add(f"\n  {close}")
+
+    add("\n}")
+    flush()
+
+
+def diff_to_json(diff: dict) -> str:
+    """Function that outputs the diff in JSON format"""
+    return json.dumps(normalize_diff(diff), indent=2)
+
+
+_RULE = "########################################################################"
+
+
+def write_text(diff: dict, out: IO[str] = None) -> None:
+    """CLI output of the diff (Asset objects or normalized dicts), written in chunks."""
+    out = out or sys.stdout
+    add, flush = _chunked_writer(out)
 
-def print_diff(diff: dict):
-    """Function for CLI output of the diff"""
     new = diff.get("new_assets", {})
     removed = diff.get("missing_assets", {})
-    changed = diff.get("changed_assets", {})
-
-    if (
-    not diff["new_assets"]
-    and not diff["missing_assets"]
-    and not diff["changed_assets"]
-    ):
-        print("[=] No changes detected")
+    changed = diff.get("changed_assets", [])
+
+    if not new and not removed and not changed:
+        out.write("[=] No changes detected\n")
         return
 
+    for assets, title, sign in ((new, "[+] New assets", "+"), (removed, "[-] Removed assets", "-")):
+        if not assets:
+            continue
+
+        add(f"{_RULE}\n\n\n{title}\n")
+        for asset in assets.values():
+            asset = _as_dict(asset)
+            add(
+                f"  {sign} {asset['host']} \n"
+                f"         ports : {sorted(asset['ports'])}\n"
+                f"         services : {sorted(asset['services'])}\n"
+            )
+        add(f"\n{_RULE}\n")
 
-    if new:
-        print("########################################################################\n")
-        print("\n[+] New assets")
-        for asset in new.values():
-            print(f"  + {asset.host} \n \
-        ports : {sorted(asset.ports)}\n \
-        services : {sorted(asset.services)}")
-        print("\n########################################################################")
+    if changed:
+        add(f"{_RULE}\n\n\n[!] Changed assets\n")
+        for i in changed:
+            add(f"  ~ {i['host']}\n")
 
+            if i.get("ports_added"):
+                add(f"      + ports : {i['ports_added']}\n")
+            if i.get("services_added"):
+                add(f"      + services : {i['services_added']}\n")
 
-    if removed:
-        print("########################################################################\n")
-        print("\n[-] Removed assets")
-        for asset in removed.values():
-            print(f"  - {asset.host} \n \
-        ports : {sorted(asset.ports)}\n \
-        services : {sorted(asset.services)}")
-        print("\n########################################################################")
+            add("\n\n")
 
+            if i.get("ports_removed"):
+                add(f"      - ports : {i['ports_removed']}\n")
+            if i.get("services_removed"):
+                add(f"      - services : {i['services_removed']}\n")
 
-    if changed:
-        print("########################################################################\n")
-        print("\n[!] Changed assets")
-        for i in changed :
-            print(f"  ~ {i["host"]}")
-
-            added_ports = i.get("ports_added", [])
-            removed_ports = i.get("ports_removed", [])
-            added_services = i.get("services_added", [])
-            removed_services = i.get("services_removed", [])
-
-            if added_ports :
-                print(f"      + ports : {added_ports}")
-            if added_services:
-                print(f"      + services : {added_services}")
-
-            print("\n")
-
-            if removed_ports:
-                print(f"      - ports : {removed_ports}")
-            if removed_services:
-                print(f"      - services : {removed_services}")
-            
-            print("\n")
\ No newline at end of file
+            add("\n\n")
+
+    flush()
+
+
+def print_diff(diff: dict):
+    """Function for CLI output of the diff (Asset objects or normalized dicts)"""
+    write_text(diff, sys.stdout)
+
+
+def print_history(timeline: dict):
+    """CLI output of a host timeline (HostHistory.timeline)"""
+    present = "present in latest snapshot" if timeline["present"] else "not in latest snapshot"
+
+    print(f"[+] History of {timeline['host']}")
+    print(f"    first seen : {timeline['first_seen']}")
+    print(f"    last seen  : {timeline['last_seen']} ({present})")
+    print(f"    seen in    : {timeline['sightings']} / {timeline['snapshots']} snapshots")
+
+    labels = {
+        "first_seen": "+ first seen",
+        "changed": "~ changed",
+        "missing": "- not seen",
+        "seen_again": "+ seen again",
+    }
+
+    for event in timeline["events"]:
+        tag = f" [{event['tag']}]" if event.get("tag") else ""
+        print(f"\n  {event['timestamp']}{tag}  {labels[event['event']]}")
+
+        if event["event"] == "missing":
+            continue
+
+        if event["event"] == "first_seen":
+            print(f"        ports : {event['ports']}")
+            print(f"        services : {event['services']}")
+            continue
+
+        if event["ports_added"]:
+            print(f"      + ports : {event['ports_added']}")
+        if event["services_added"]:
+            print(f"      + services : {event['services_added']}")
+        if event["ports_removed"]:
+            print(f"      - ports : {event['ports_removed']}")
+        if event["services_removed"]:
+            print(f"      - services : {event['services_removed']}")
+
+
+def print_timeline_interval(interval: dict):
+    """CLI output of one timeline interval (timeline.iter_timeline)"""
+    def label(prefix):
+        tag = interval[f"{prefix}_tag"]
+        return f"{interval[f'{prefix}_timestamp']}" + (f" [{tag}]" if tag else "")
+
+    print(
+        f"\n  {label('from')}  ->  {label('to')}   "
+        f"+{interval['added']}  -{interval['removed']}  ~{interval['changed']}"
+    )
+
+    for event in interval.get("events", []):
+        if event["event"] == "added":
+            print(f"      + {event['host']}  ports : {event['ports']}  services : {event['services']}")
+        elif event["event"] == "removed":
+            print(f"      - {event['host']}")
+        else:
+            changes = []
+            if event["ports_added"]:
+                changes.append(f"+ports {event['ports_added']}")
+            if event["ports_removed"]:
+                changes.append(f"-ports {event['ports_removed']}")
+            if event["services_added"]:
+                changes.append(f"+services {event['services_added']}")
+            if event["services_removed"]:
+                changes.append(f"-services {event['services_removed']}")
+            print(f"      ~ {event['host']}  " + "  ".join(changes))
@@ -0,0 +1,186 @@
+"""
+Several scanners in one scan (`--scanner subfinder nmap`).
+
+Each scanner only gets the targets it takes (`accepts(target)`, when it has
+one): domain names for subfinder, addresses, networks and nmap ranges for
+nmap. The scanners run at the same time, one thread each (they mostly wait on
+their subprocesses), so the scan takes as long as the slowest of them. Their
+results are then hash-joined into one snapshot, in a single pass over each
+side:
+
+    build   assets keyed by a name (subfinder subdomains, plugin results)
+            go in a table by name, and by address when they have one
+    probe   assets keyed by an address (nmap hosts) are looked up by address
+            and by the names their scanner reported for it (nmap's
+            <hostnames>: targets given by name, reverse DNS); each named
+            asset they match is merged with them, the others stay keyed by
+            address
+
+A joined asset therefore keeps the name as its id whatever the order of
+--scanner, so successive snapshots diff like with like, and ports measured
+by a port scanner replace the ones a discovery scanner only assumes
+(scanners with `assumed_ports = True`, e.g. subfinder's 80/443) instead of
+being added to them.
+"""
+import ipaddress
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from attackdiff import metrics
+from attackdiff.asset import Asset
+
+
+_NAME = re.compile(r"[A-Za-z0-9_-]+(\.[A-Za-z0-9_-]+)*\.?")
+
+
+def _is_address(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+def is_host_name(target: str) -> bool:
+    """True for DNS names, False for addresses, networks and nmap ranges (10.0.0.1-20)."""
+    try:
+        ipaddress.ip_network(target, strict=False)
+    except ValueError:
+        return _NAME.fullmatch(target) is not None and any(c.isalpha() for c in target)
+    return False
+
+
+def _merge(into: Asset, other: Asset, other_assumed: bool, assumed: set) -> None:
+    """Asset.merge, except that measured ports win over assumed ones."""
+    into_assumed = into.id in assumed
+
+    if into_assumed and not other_assumed:
+        into.ports = ()
+        into.services = ()
+        assumed.discard(into.id)
+    elif other_assumed and not into_assumed:
+        other = Asset(host=other.host, ip=other.ip, sources=other.sources)
+
+    into.merge(other)
+
+
+def join_assets(results: List[tuple]) -> Dict[str, Asset]:
+    """
+    Join scanner results on host name / address.
+
+    `results` holds one (assets, hostnames, assumed_ports) tuple per scanner:
+    its {asset id: Asset}, its {address: host names} aliases and whether its
+    ports are assumed rather than probed. Assets are merged in place.
+    """
+    joined: Dict[str, Asset] = {}
+    assumed: set = set()          # ids of joined assets whose ports are assumed
+    by_name: Dict[str, Asset] = {}
+    by_address: Dict[str, list] = {}
+    probes = []
+
+    # ---- build: named assets ----
+    for assets, hostnames, assumed_ports in results:
+        for asset in assets.values():
+            if _is_address(asset.host):
+                probes.append((asset, hostnames, assumed_ports))
+                continue
+
+            name = asset.host.lower()
+            known = by_name.get(name)
+
+            if known is None:
+                by_name[name] = joined[asset.id] = known = asset
+                if assumed_ports:
+                    assumed.add(asset.id)
+            else:
+                _merge(known, asset, assumed_ports, assumed)
+
+            if known.ip:
+                names = by_address.setdefault(known.ip, [])
+                if name not in names:
+                    names.append(name)
+
+    # ---- probe: address assets ----
+    for asset, hostnames, assumed_ports in probes:
+        names = dict.fromkeys(by_address.get(asset.host, ()))
+        names.update(dict.fromkeys(n for n in hostnames.get(asset.host, ()) if n in by_name))
+
+        for name in names:
+            _merge(by_name[name], asset, assumed_ports, assumed)
+
+        if names:
+            continue
+
+        known = joined.get(asset.id)
+        if known is None:
+            joined[asset.id] = asset
+            if assumed_ports:
+                assumed.add(asset.id)
+        else:
+            _merge(known, asset, assumed_ports, assumed)
+
+    return joined
+
+
+class CombinedScan:
+    """
+    Scanner-like wrapper running several scanners at once, each on the
+    targets it accepts: scan(targets) returns their joined assets,
+    failed_shards the failed shards of all of them, counts the number of
+    assets each scanner found.
+    """
+
+    def __init__(self, scanners: Dict[str, object]):
+        self.scanners = scanners
+        self.failed_shards: list[tuple[int, list[str], str]] = []
+        self.counts: Dict[str, int] = {}
+
+    def route(self, targets: List[str]) -> Dict[str, List[str]]:
+        """{scanner name: the targets it accepts}; scanners without accepts() take them all."""
+        routed = {}
+        for name, scanner in self.scanners.items():
+            accepts = getattr(scanner, "accepts", None)
+            routed[name] = [t for t in targets if accepts is None or accepts(t)]
+        return routed
+
+    def _run(self, name: str, scanner, targets: List[str]) -> Dict[str, Asset]:
+        with metrics.phase(f"scan.{name}") as p:
+            assets = scanner.scan(targets=targets)
+            p.count(assets=len(assets))
+        return assets
+
+    def scan(self, targets: List[str]) -> Dict[str, Asset]:
+        run = metrics.bind(self._run)
+        routed = self.route(targets)
+
+        with ThreadPoolExecutor(max_workers=len(self.scanners)) as pool:
+            futures = {
+                name: pool.submit(run, name, scanner, routed[name])
+                for name, scanner in self.scanners.items()
+                if routed[name]
+            }
+
+        # every scanner has finished here: report the first failure, if any
+        results = []
+        self.counts = dict.fromkeys(self.scanners, 0)
+        for name, future in futures.items():
+            try:
+                assets = future.result()
+            except Exception as e:
+                raise RuntimeError(f"{name} scanner failed: {str(e).strip()}") from e
+
+            scanner = self.scanners[name]
+            self.counts[name] = len(assets)
+            self.failed_shards += getattr(scanner, "failed_shards", [])
+            results.append((
+                assets,
+                getattr(scanner, "hostnames", {}),
+                getattr(scanner, "assumed_ports", False)
+            ))
+
+        with metrics.phase("scan.join") as p:
+            assets = join_assets(results)
+            p.count(assets=len(assets))
+
+        return assets
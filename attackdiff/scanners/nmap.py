@@ -1,17 +1,82 @@
+import io
+import ipaddress
+import itertools
 import subprocess
 import shlex
+import tempfile
 import xml.etree.ElementTree as ET
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import IO, Iterable, Iterator
+from attackdiff import metrics
 from attackdiff.asset import Asset
+from attackdiff.scanners.combined import is_host_name
+
+
+def expand_targets(targets: Iterable[str]) -> Iterator[str]:
+    """
+    Expand CIDR targets into individual addresses (lazily).
+    Anything that is not an IP network (hostnames, nmap ranges) is kept as is.
+    """
+    for target in targets:
+        try:
+            network = ipaddress.ip_network(target, strict=False)
+        except ValueError:
+            yield target
+            continue
+
+        if network.num_addresses == 1:
+            yield str(network.network_address)
+        else:
+            for ip in network.hosts():
+                yield str(ip)
+
+
+def iter_shards(targets: Iterable[str], shard_size: int) -> Iterator[list[str]]:
+    it = iter(targets)
+    while True:
+        shard = list(itertools.islice(it, shard_size))
+        if not shard:
+            return
+        yield shard
 
 
 class NmapScanner:
-    def __init__(self, extra_args: str = ""):
+    def __init__(
+        self,
+        extra_args: str = "",
+        workers: int = 1,
+        shard_size: int = 256
+    ):
+        if workers < 1:
+            raise ValueError("--workers must be >= 1")
+        if shard_size < 1:
+            raise ValueError("--shard-size must be >= 1")
+
         self.extra_args = extra_args
+        self.workers = workers
+        self.shard_size = shard_size
 
-    def scan(self, targets: list[str]) -> dict[str, Asset]:
-        if not isinstance(targets, list):
-            raise TypeError("targets must be a list")
+        # (shard number, targets, error) for shards that failed in the last scan
+        self.failed_shards: list[tuple[int, list[str], str]] = []
 
+        # {address: host names} reported by nmap (targets given by name,
+        # reverse DNS), used to join with other scanners' results
+        self.hostnames: dict[str, tuple[str, ...]] = {}
+
+    @staticmethod
+    def accepts(target: str) -> bool:
+        """Targets taken in a combined scan: addresses, networks, nmap ranges."""
+        return not is_host_name(target)
+
+    @classmethod
+    def from_args(cls, args) -> "NmapScanner":
+        return cls(
+            extra_args=args.nmap_args,
+            workers=args.workers,
+            shard_size=args.shard_size
+        )
+
+    def _build_cmd(self, targets: list[str]) -> list[str]:
         cmd = ["nmap", "-Pn"]
 
         if self.extra_args:
@@ -20,66 +85,225 @@ class NmapScanner:
         cmd += ["-oX", "-"]
         cmd += targets
 
-        print("DEBUG nmap cmd:", " ".join(cmd))
+        return cmd
 
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True
-        )
+    def scan(self, targets: list[str]) -> dict[str, Asset]:
+        self.hostnames = {}
 
-        if result.returncode != 0:
-            raise RuntimeError(result.stderr)
+        if self.workers > 1:
+            return self._scan_sharded(targets)
 
-        return self._parse_xml(result.stdout)
+        assets = {}
 
-    def _parse_xml(self, xml_data: str) -> dict[str, Asset]:
-        root = ET.fromstring(xml_data)
+        for asset in self.iter_scan(targets):
+            assets[asset.id] = asset
+
+        return assets
+
+    def _scan_shard(self, shard: list[str]) -> dict[str, Asset]:
         assets = {}
 
-        for host in root.findall("host"):
-            status = host.find("status").attrib.get("state")
-            addr = host.find("address").attrib.get("addr")
-            print("DEBUG host:", addr, "status:", status)
-            if status != "up":
-                continue
+        for asset in self.iter_scan(shard):
+            assets[asset.id] = asset
 
-            ip = None
-            for addr in host.findall("address"):
-                if addr.attrib.get("addrtype") in ("ipv4", "ipv6"):
-                    ip = addr.attrib.get("addr")
-                    break
+        return assets
 
-            if ip is None:
-                continue  # no usable IP, skip host
+    def _scan_sharded(self, targets: list[str]) -> dict[str, Asset]:
+        """
+        Split targets (CIDRs expanded) into shards of shard_size and scan them
+        with at most `workers` concurrent nmap processes.
 
+        Results are merged with Asset.merge. A failing shard is recorded in
+        failed_shards and does not discard the other shards' results; only
+        if every shard fails is an error raised.
+        """
+        if not isinstance(targets, list):
+            raise TypeError("targets must be a list")
 
-            ports = []
-            services = []
+        self.failed_shards = []
+        results: dict[int, dict[str, Asset]] = {}
+        shards = enumerate(iter_shards(expand_targets(targets), self.shard_size))
 
-            ports_el = host.find("ports")
-            if ports_el is not None:
-                for port in ports_el.findall("port"):
-                    state = port.find("state").attrib.get("state")
-                    if state not in ("open", "open|filtered"):
-                        continue
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            running = {}
+
+            # keep at most `workers` shards in flight so huge CIDRs are
+            # expanded lazily instead of all at once
+            scan_shard = metrics.bind(self._scan_shard)
 
-                    portid = int(port.attrib["portid"])
-                    ports.append(portid)
+            for number, shard in itertools.islice(shards, self.workers):
+                running[pool.submit(scan_shard, shard)] = (number, shard)
 
-                    service = port.find("service")
-                    if service is not None:
-                        services.append(service.attrib.get("name"))
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    number, shard = running.pop(future)
+
+                    try:
+                        results[number] = future.result()
+                    except Exception as e:
+                        self.failed_shards.append((number, shard, str(e).strip()))
+
+                    for next_number, next_shard in itertools.islice(shards, 1):
+                        running[pool.submit(scan_shard, next_shard)] = (next_number, next_shard)
+
+        if self.failed_shards and not results:
+            error = self.failed_shards[0][2]
+            raise RuntimeError(f"all nmap shards failed (first error: {error})")
+
+        assets: dict[str, Asset] = {}
+
+        for number in sorted(results):
+            for aid, asset in results[number].items():
+                if aid in assets:
+                    assets[aid].merge(asset)
+                else:
+                    assets[aid] = asset
+
+        return assets
 
-            asset = Asset(
-                host=ip,
-                ip=ip,
-                ports=ports,
-                services=services,
-                sources=["nmap"]
+    def iter_scan(self, targets: list[str]) -> Iterator[Asset]:
+        """
+        Run nmap and yield each up host as soon as nmap has written it.
+
+        nmap's XML is read from the pipe incrementally, so memory stays flat
+        whatever the number of targets.
+        """
+        if not isinstance(targets, list):
+            raise TypeError("targets must be a list")
+
+        cmd = self._build_cmd(targets)
+
+        # stderr goes to a temp file so a chatty nmap cannot fill the pipe
+        # and block while we are reading stdout
+        with tempfile.TemporaryFile() as stderr:
+            proc = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=stderr
             )
 
+            try:
+                try:
+                    yield from self._iter_hosts(proc.stdout)
+                except ET.ParseError:
+                    # truncated XML: report nmap's own error if it failed
+                    if proc.wait() != 0:
+                        stderr.seek(0)
+                        raise RuntimeError(stderr.read().decode(errors="replace"))
+                    raise
 
+                if proc.wait() != 0:
+                    stderr.seek(0)
+                    raise RuntimeError(stderr.read().decode(errors="replace"))
+
+            finally:
+                if proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
+                proc.stdout.close()
+
+    def _parse_xml(self, xml_data: str) -> dict[str, Asset]:
+        assets = {}
+
+        for asset in self._iter_hosts(io.StringIO(xml_data)):
             assets[asset.id] = asset
 
         return assets
+
+    def _iter_hosts(self, source: IO) -> Iterator[Asset]:
+        """
+        Incrementally parse nmap XML from a file object, yielding one Asset
+        per up host. Each <host> element is discarded once handled.
+
+        Uses XMLPullParser rather than iterparse: iterparse's read(16k) blocks
+        on a pipe until the buffer is full, read1() returns what nmap has
+        written so far.
+        """
+        parser = ET.XMLPullParser(events=("start", "end"))
+        read = getattr(source, "read1", source.read)
+        root = None
+
+        while True:
+            # waiting for nmap vs parsing its output
+            with metrics.phase("nmap.read") as p:
+                chunk = read(64 * 1024)
+                p.count(bytes=len(chunk))
+
+            with metrics.phase("nmap.parse") as p:
+                if chunk:
+                    parser.feed(chunk)
+                else:
+                    parser.close()
+
+                assets = []
+                for event, elem in parser.read_events():
+                    if root is None:
+                        root = elem
+
+                    if event != "end" or elem.tag != "host":
+                        continue
+
+                    asset = self._parse_host(elem)
+
+                    # drop the host subtree (and its now empty node under the root)
+                    elem.clear()
+                    root.clear()
+
+                    if asset is not None:
+                        assets.append(asset)
+
+                p.count(hosts=len(assets))
+
+            yield from assets
+
+            if not chunk:
+                break
+
+    def _parse_host(self, host: ET.Element) -> Asset | None:
+        status = host.find("status").attrib.get("state")
+        if status != "up":
+            return None
+
+        ip = None
+        for addr in host.findall("address"):
+            if addr.attrib.get("addrtype") in ("ipv4", "ipv6"):
+                ip = addr.attrib.get("addr")
+                break
+
+        if ip is None:
+            return None  # no usable IP, skip host
+
+        names = tuple(
+            name.attrib["name"].lower() for name in host.iterfind("hostnames/hostname")
+            if name.attrib.get("name")
+        )
+        if names:
+            # one <host> per target: names resolving to the same address add up
+            self.hostnames[ip] = tuple(dict.fromkeys(self.hostnames.get(ip, ()) + names))
+
+        ports = []
+        services = []
+
+        ports_el = host.find("ports")
+        if ports_el is not None:
+            for port in ports_el.findall("port"):
+                state = port.find("state").attrib.get("state")
+                if state not in ("open", "open|filtered"):
+                    continue
+
+                portid = int(port.attrib["portid"])
+                ports.append(portid)
+
+                service = port.find("service")
+                if service is not None:
+                    services.append(service.attrib.get("name"))
+
+        return Asset(
+            host=ip,
+            ip=ip,
+            ports=ports,
+            services=services,
+            sources=["nmap"]
+        )
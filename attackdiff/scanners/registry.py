@@ -0,0 +1,82 @@
+"""
+Scanner registry.
+
+Scanners are classes with a scan(targets) -> {asset id: Asset} method,
+registered under a name in the "attackdiff.scanners" entry point group:
+
+    [project.entry-points."attackdiff.scanners"]
+    masscan = "attackdiff_masscan:MasscanScanner"
+
+A scanner is built with its `from_args(args)` classmethod when it has one
+(the built-in scanners read their own --nmap-* / --subfinder-* options),
+otherwise with the `--scanner-opt KEY=VALUE` options as keyword arguments.
+
+The built-in scanners are resolved without reading any package metadata,
+and nothing is imported until a scanner is actually used.
+"""
+from importlib import import_module
+
+
+ENTRY_POINT_GROUP = "attackdiff.scanners"
+
+BUILTIN_SCANNERS = {
+    "nmap": "attackdiff.scanners.nmap:NmapScanner",
+    "subfinder": "attackdiff.scanners.subfinder_scanner:SubfinderScanner",
+}
+
+
+def _entry_points() -> dict:
+    """{name: entry point} of the installed scanner plugins."""
+    from importlib import metadata
+
+    eps = metadata.entry_points()
+    if hasattr(eps, "select"):
+        selected = eps.select(group=ENTRY_POINT_GROUP)
+    else:  # Python < 3.10
+        selected = eps.get(ENTRY_POINT_GROUP, [])
+
+    return {ep.name: ep for ep in selected}
+
+
+def scanner_names() -> list:
+    return sorted(set(BUILTIN_SCANNERS) | set(_entry_points()))
+
+
+def load_scanner(name: str) -> type:
+    """The scanner class registered as `name`; ValueError if there is none."""
+    target = BUILTIN_SCANNERS.get(name)
+
+    if target is not None:
+        module, _, attr = target.partition(":")
+        return getattr(import_module(module), attr)
+
+    ep = _entry_points().get(name)
+    if ep is None:
+        raise ValueError(f"Unknown scanner: {name} (available: {', '.join(scanner_names())})")
+
+    return ep.load()
+
+
+def scanner_options(args) -> dict:
+    """--scanner-opt KEY=VALUE options as a dict."""
+    options = {}
+
+    for item in getattr(args, "scanner_opt", None) or []:
+        key, sep, value = item.partition("=")
+        if not sep or not key:
+            raise ValueError(f"--scanner-opt expects KEY=VALUE, got: {item}")
+        options[key.replace("-", "_")] = value
+
+    return options
+
+
+def create_scanner(name: str, args):
+    cls = load_scanner(name)
+
+    if hasattr(cls, "from_args"):
+        return cls.from_args(args)
+
+    try:
+        return cls(**scanner_options(args))
+    except TypeError as e:
+        raise ValueError(f"Bad --scanner-opt for {name}: {e}") from e
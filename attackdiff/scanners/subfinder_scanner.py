@@ -1,88 +1,174 @@
-import subprocess
+import asyncio
 from typing import Dict, List
 from attackdiff.asset import Asset
+from attackdiff.scanners.combined import is_host_name
 import shlex
 
 
 class SubfinderScanner:
     """
     Runs Subfinder for a list of domains and returns discovered subdomains as Assets.
+
+    Subfinder runs once per root domain (at most `concurrency` at a time) and,
+    with httpx enabled, every discovered subdomain is streamed straight into a
+    single long-lived httpx process, so both stages overlap.
     """
 
+    # ports are assumed (80/443), not probed: a port scanner's results for
+    # the same host replace them in a combined scan
+    assumed_ports = True
+
     def __init__(
         self,
         extra_args: str = "",
         use_httpx: bool = False,
-        httpx_args: str = ""
+        httpx_args: str = "",
+        concurrency: int = 4
     ):
+        if concurrency < 1:
+            raise ValueError("--subfinder-concurrency must be >= 1")
+
         self.extra_args = extra_args
         self.use_httpx = use_httpx
         self.httpx_args = httpx_args
+        self.concurrency = concurrency
+
+    @staticmethod
+    def accepts(target: str) -> bool:
+        """Targets taken in a combined scan: domain names."""
+        return is_host_name(target)
+
+    @classmethod
+    def from_args(cls, args) -> "SubfinderScanner":
+        return cls(
+            extra_args=args.subfinder_args,
+            use_httpx=args.httpx,
+            httpx_args=args.httpx_args,
+            concurrency=args.subfinder_concurrency
+        )
 
     def scan(self, targets: list[str]) -> dict[str, Asset]:
-        domains = self._run_subfinder(targets)
-
-        if self.use_httpx:
-            domains = self._run_httpx(domains)
+        domains = asyncio.run(self._scan_async(targets))
 
         assets = {}
         for domain in domains:
-            asset = Asset(
-                host=domain,
-                ports=[80, 443],  # assume HTTP layer
-                services=["http"],
-                sources=["subfinder"] + (["httpx"] if self.use_httpx else [])
-            )
+            asset = self.make_asset(domain)
             assets[asset.id] = asset
 
         return assets
-    
-    
-    
-    def _run_subfinder(self, targets: list[str]) -> list[str]:
-        cmd = ["subfinder", "-silent"]
 
-        if self.extra_args:
-            cmd += shlex.split(self.extra_args)
+    def make_asset(self, domain: str) -> Asset:
+        return Asset(
+            host=domain,
+            ports=[80, 443],  # assume HTTP layer
+            services=["http"],
+            sources=["subfinder"] + (["httpx"] if self.use_httpx else [])
+        )
 
-        for target in targets:
-            cmd += ["-d", target]
 
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True
-        )
 
-        if result.returncode != 0:
-            raise RuntimeError(result.stderr)
+    @staticmethod
+    def _parse_line(line: str | bytes) -> str | None:
+        """One subdomain (or httpx result) per output line."""
+        if isinstance(line, bytes):
+            line = line.decode(errors="replace")
+        line = line.strip()
+        return line or None
 
-        domains = list(set(result.stdout.strip().splitlines()))
-        return domains
-    
+    async def _scan_async(self, targets: list[str]) -> list[str]:
+        httpx = None
+        httpx_reader = None
+        alive: set[str] = set()
 
+        if self.use_httpx:
+            cmd = ["httpx", "-silent"]
 
-    def _run_httpx(self, domains: list[str]) -> list[str]:
-        if not domains:
-            return []
+            if self.httpx_args:
+                cmd += shlex.split(self.httpx_args)
 
-        cmd = ["httpx", "-silent"]
+            httpx = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            httpx_reader = asyncio.ensure_future(
+                self._collect_lines(httpx.stdout, alive)
+            )
+            httpx_errors = asyncio.ensure_future(httpx.stderr.read())
 
-        if self.httpx_args:
-            cmd += shlex.split(self.httpx_args)
+        found: set[str] = set()
+        limit = asyncio.Semaphore(self.concurrency)
 
-        result = subprocess.run(
-            cmd,
-            input="\n".join(domains),
-            capture_output=True,
-            text=True
-        )
+        try:
+            await asyncio.gather(*(
+                self._run_subfinder(target, limit, found, httpx)
+                for target in targets
+            ))
+
+            if httpx is None:
+                return list(found)
+
+            httpx.stdin.close()
+            await httpx_reader
+            stderr = await httpx_errors
+
+            if await httpx.wait() != 0:
+                raise RuntimeError(stderr.decode(errors="replace"))
+
+            return list(alive)
+
+        finally:
+            if httpx is not None and httpx.returncode is None:
+                httpx.kill()
+                await httpx.wait()
+
+    async def _run_subfinder(
+        self,
+        target: str,
+        limit: asyncio.Semaphore,
+        found: set[str],
+        httpx
+    ) -> None:
+        cmd = ["subfinder", "-silent"]
+
+        if self.extra_args:
+            cmd += shlex.split(self.extra_args)
+
+        cmd += ["-d", target]
+
+        async with limit:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            errors = asyncio.ensure_future(proc.stderr.read())
+
+            try:
+                async for line in proc.stdout:
+                    domain = self._parse_line(line)
+                    if domain is None or domain in found:
+                        continue
+
+                    found.add(domain)
 
-        if result.returncode != 0:
-            raise RuntimeError(result.stderr)
+                    if httpx is not None:
+                        httpx.stdin.write(domain.encode() + b"\n")
+                        await httpx.stdin.drain()
 
-        alive = list(set(result.stdout.strip().splitlines()))
-        return alive
+                stderr = await errors
 
+                if await proc.wait() != 0:
+                    raise RuntimeError(stderr.decode(errors="replace"))
 
+            finally:
+                if proc.returncode is None:
+                    proc.kill()
+                    await proc.wait()
 
+    async def _collect_lines(self, stream, into: set[str]) -> None:
+        async for line in stream:
+            value = self._parse_line(line)
+            if value is not None:
+                into.add(value)
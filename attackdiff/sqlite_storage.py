@@ -0,0 +1,426 @@
+import hashlib
+import json
+import sqlite3
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+from attackdiff import metrics
+from attackdiff.asset import Asset
+from attackdiff.compression import strip_codec
+from attackdiff.storage import SnapshotStorage
+
+
+DB_NAME = "snapshots.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshot (
+    id          INTEGER PRIMARY KEY,
+    name        TEXT NOT NULL UNIQUE,
+    timestamp   TEXT NOT NULL,
+    tag         TEXT,
+    scanner     TEXT,
+    asset_count INTEGER NOT NULL,
+    sha256      TEXT
+);
+CREATE INDEX IF NOT EXISTS snapshot_by_tag ON snapshot (tag, name);
+
+CREATE TABLE IF NOT EXISTS asset (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshot (id) ON DELETE CASCADE,
+    asset_id    TEXT NOT NULL,
+    host        TEXT NOT NULL,
+    ip          TEXT,
+    sources     TEXT NOT NULL,
+    first_seen  TEXT,
+    last_seen   TEXT,
+    PRIMARY KEY (snapshot_id, asset_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS port (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshot (id) ON DELETE CASCADE,
+    asset_id    TEXT NOT NULL,
+    pos         INTEGER NOT NULL,
+    port        INTEGER NOT NULL,
+    PRIMARY KEY (snapshot_id, asset_id, pos)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS port_by_number ON port (snapshot_id, port);
+
+CREATE TABLE IF NOT EXISTS service (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshot (id) ON DELETE CASCADE,
+    asset_id    TEXT NOT NULL,
+    pos         INTEGER NOT NULL,
+    name        TEXT NOT NULL,
+    PRIMARY KEY (snapshot_id, asset_id, pos)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS service_by_name ON service (snapshot_id, name);
+"""
+
+
+def snapshot_name(value: str | Path) -> str:
+    """
+    Snapshot names are the snapshot filenames without their suffix, so
+    references to migrated snapshots keep working.
+    """
+    name = strip_codec(value).name
+    for suffix in (".jsonl", ".json", ".snap"):
+        if name.endswith(suffix):
+            return name[: -len(suffix)]
+    return name
+
+
+def assets_sha256(meta: dict, assets_raw: Dict[str, dict]) -> str:
+    """
+    Content hash of a snapshot, computed asset by asset in id order
+    (independent of how the snapshot is laid out on disk).
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps(meta, sort_keys=True).encode("utf-8"))
+    for aid in sorted(assets_raw):
+        h.update(json.dumps(assets_raw[aid], sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+class SqliteSnapshotStorage(SnapshotStorage):
+    """
+    SnapshotStorage backed by a single SQLite database (data/scans/snapshots.db).
+
+    Assets, ports and services live in normalized tables keyed by snapshot,
+    so tag lookups, listing and retention deletes are plain SQL queries and
+    never load whole snapshots.
+
+    Snapshots are referenced by Path objects like the JSON backend; only
+    their .name is meaningful.
+    """
+
+    def __init__(self, base_path: str = "data/scans"):
+        super().__init__(base_path)
+        self.db_path = self.base_path / DB_NAME
+
+        # the daemon shares one instance between its job threads, one job at a time
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+        super().close()
+
+    # -------------------------------
+    # Write path
+    # -------------------------------
+
+    def _insert_snapshot(self, name: str, meta: dict, assets_raw: Dict[str, dict], sha256: str) -> None:
+        """
+        Insert one snapshot. Must be called inside a transaction.
+        """
+        cur = self.conn.execute(
+            "INSERT INTO snapshot (name, timestamp, tag, scanner, asset_count, sha256) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (name, meta["timestamp"], meta.get("tag"), meta.get("scanner"), len(assets_raw), sha256),
+        )
+        sid = cur.lastrowid
+
+        self.conn.executemany(
+            "INSERT INTO asset VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                (sid, aid, d["host"], d.get("ip"), json.dumps(d.get("sources", [])),
+                 d.get("first_seen"), d.get("last_seen"))
+                for aid, d in assets_raw.items()
+            ),
+        )
+        self.conn.executemany(
+            "INSERT INTO port VALUES (?, ?, ?, ?)",
+            (
+                (sid, aid, pos, port)
+                for aid, d in assets_raw.items()
+                for pos, port in enumerate(d.get("ports", []))
+            ),
+        )
+        self.conn.executemany(
+            "INSERT INTO service VALUES (?, ?, ?, ?)",
+            (
+                (sid, aid, pos, service)
+                for aid, d in assets_raw.items()
+                for pos, service in enumerate(d.get("services", []))
+            ),
+        )
+
+    def save_snapshot(
+        self,
+        assets: Dict[str, Asset],
+        tag: str | None = None,
+        scanner: str | None = None,
+        timestamp: str | None = None
+    ) -> Path:
+        timestamp = timestamp or datetime.now(timezone.utc).isoformat()
+        meta = {
+            "timestamp": timestamp,
+            "tag": tag,
+            "scanner": scanner
+        }
+        name = timestamp.replace(":", "-")
+
+        with metrics.phase("save.encode"):
+            assets_raw = {aid: asset.to_dict() for aid, asset in assets.items()}
+
+            with self.conn:
+                self._insert_snapshot(name, meta, assets_raw, assets_sha256(meta, assets_raw))
+
+        self._record_history(name, meta, assets)
+
+        return self.base_path / name
+
+    def import_json_snapshots(self, source: SnapshotStorage, batch_size: int = 50) -> dict:
+        """
+        Bulk-import the snapshots of a JSON store, batch_size snapshots per
+        transaction. Snapshots already present (same name) are skipped, so
+        the import can be re-run safely.
+        """
+        result = {"imported": 0, "skipped": 0, "failed": []}
+        batch = []
+        renamed = []
+
+        def flush():
+            with self.conn:
+                for name, meta, assets_raw in batch:
+                    self._insert_snapshot(name, meta, assets_raw, assets_sha256(meta, assets_raw))
+            result["imported"] += len(batch)
+            batch.clear()
+
+        for path in source.list_snapshots():
+            name = snapshot_name(path)
+
+            if self._snapshot_id(name) is not None:
+                result["skipped"] += 1
+                continue
+
+            try:
+                # replays delta snapshots as well
+                meta, assets_raw = source._load_raw(path)
+                datetime.fromisoformat(meta["timestamp"])
+            except Exception as e:
+                result["failed"].append((path, str(e)))
+                continue
+
+            meta = {
+                "timestamp": meta["timestamp"],
+                "tag": meta.get("tag"),
+                "scanner": meta.get("scanner"),
+            }
+            batch.append((name, meta, assets_raw))
+            renamed.append((path.name, name))
+
+            if len(batch) >= batch_size:
+                flush()
+
+        if batch:
+            flush()
+
+        # same snapshots, new names: keep their history
+        for old, new in renamed:
+            self.history.rename_snapshot(old, new)
+
+        return result
+
+    # -------------------------------
+    # Read path
+    # -------------------------------
+
+    def _snapshot_id(self, value: str | Path) -> int | None:
+        row = self.conn.execute(
+            "SELECT id FROM snapshot WHERE name = ?",
+            (snapshot_name(value),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def resolve_snapshot(self, value: str) -> Path:
+        if self._snapshot_id(value) is not None:
+            return self.base_path / snapshot_name(value)
+
+        # Allow diffing against a standalone JSON file
+        path = Path(value)
+        if path.is_file():
+            return path
+
+        raise FileNotFoundError(f"Snapshot not found: {value}")
+
+    def list_snapshots(self) -> List[Path]:
+        """
+        Return all snapshots (oldest → newest)
+        """
+        return [
+            self.base_path / name
+            for (name,) in self.conn.execute("SELECT name FROM snapshot ORDER BY name")
+        ]
+
+    def load_snapshot(self, path: Path, where=None) -> Dict[str, Asset]:
+        sid = self._snapshot_id(path)
+
+        if sid is None:
+            if Path(path).is_file():
+                return super().load_snapshot(path, where)
+            raise FileNotFoundError(f"Snapshot not found: {path}")
+
+        with metrics.phase("load") as p:
+            assets = self._load_assets(sid, where)
+            p.count(assets=len(assets))
+        return assets
+
+    def find_assets(self, path: Path, ids) -> Dict[str, Asset]:
+        sid = self._snapshot_id(path)
+
+        if sid is None:
+            return super().find_assets(path, ids)
+
+        assets = {}
+        ids = list(ids)
+
+        # bound the number of SQL variables per query
+        for start in range(0, len(ids), 500):
+            assets.update(self._load_assets(sid, ids=ids[start:start + 500]))
+
+        return assets
+
+    def _load_assets(self, sid: int, where=None, ids: List[str] | None = None) -> Dict[str, Asset]:
+        """
+        where: only the assets matching this AssetFilter. Ports and services
+        are selected in SQL (port_by_number index), host names and CIDRs on
+        the rows before an Asset is built. ids: only these assets.
+        """
+        condition = "snapshot_id = ?"
+        params = [sid]
+
+        if ids is not None:
+            condition += f" AND asset_id IN ({', '.join('?' * len(ids))})"
+            params += ids
+
+        if where is not None and where.ports:
+            condition += (
+                " AND asset_id IN (SELECT asset_id FROM port WHERE snapshot_id = ? "
+                f"AND port IN ({', '.join('?' * len(where.ports))}))"
+            )
+            params += [sid, *sorted(where.ports)]
+
+        if where is not None and where.services:
+            condition += (
+                " AND asset_id IN (SELECT asset_id FROM service WHERE snapshot_id = ? "
+                f"AND lower(name) IN ({', '.join('?' * len(where.services))}))"
+            )
+            params += [sid, *sorted(where.services)]
+
+        ports = defaultdict(list)
+        for aid, port in self.conn.execute(
+            f"SELECT asset_id, port FROM port WHERE {condition} ORDER BY asset_id, pos",
+            params
+        ):
+            ports[aid].append(port)
+
+        services = defaultdict(list)
+        for aid, service in self.conn.execute(
+            f"SELECT asset_id, name FROM service WHERE {condition} ORDER BY asset_id, pos",
+            params
+        ):
+            services[aid].append(service)
+
+        assets = {}
+        for aid, host, ip, sources, first_seen, last_seen in self.conn.execute(
+            "SELECT asset_id, host, ip, sources, first_seen, last_seen "
+            f"FROM asset WHERE {condition}",
+            params
+        ):
+            if where is not None and not where.match(host, ip, ports.get(aid, ()), services.get(aid, ())):
+                continue
+
+            assets[aid] = Asset.from_dict({
+                "host": host,
+                "ip": ip,
+                "ports": ports.get(aid, []),
+                "services": services.get(aid, []),
+                "sources": json.loads(sources),
+                "first_seen": first_seen,
+                "last_seen": last_seen,
+            })
+
+        return assets
+
+    def load_meta(self, path: Path) -> dict:
+        row = self.conn.execute(
+            "SELECT timestamp, tag, scanner FROM snapshot WHERE name = ?",
+            (snapshot_name(path),)
+        ).fetchone()
+
+        if row is None:
+            return super().load_meta(path)
+
+        return {"timestamp": row[0], "tag": row[1], "scanner": row[2]}
+
+    def snapshot_entries(self) -> List[dict]:
+        return [
+            {
+                "name": name,
+                "path": self.base_path / name,
+                "timestamp": timestamp,
+                "tag": tag,
+                "scanner": scanner,
+                "assets": asset_count,
+                "size": None,
+                "sha256": sha256,
+            }
+            for name, timestamp, tag, scanner, asset_count, sha256 in self.conn.execute(
+                "SELECT name, timestamp, tag, scanner, asset_count, sha256 "
+                "FROM snapshot ORDER BY name"
+            )
+        ]
+
+    def rebuild_index(self) -> List[dict]:
+        # The snapshot table is the index
+        return self.snapshot_entries()
+
+    def find_snapshot_by_tag(self, tag: str) -> Path:
+        row = self.conn.execute(
+            "SELECT name FROM snapshot WHERE tag = ? ORDER BY name DESC LIMIT 1",
+            (tag,)
+        ).fetchone()
+
+        if row is None:
+            raise RuntimeError(f"No snapshot found with tag '{tag}'")
+
+        return self.base_path / row[0]
+
+    def get_latest_snapshot(self) -> Path:
+        row = self.conn.execute(
+            "SELECT name FROM snapshot ORDER BY name DESC LIMIT 1"
+        ).fetchone()
+
+        if row is None:
+            raise RuntimeError("No snapshots available")
+
+        return self.base_path / row[0]
+
+    # -------------------------------
+    # Retention
+    # -------------------------------
+
+    def _delete_snapshot(self, path: Path) -> None:
+        # asset / port / service rows go with it (ON DELETE CASCADE)
+        self.conn.execute("DELETE FROM snapshot WHERE name = ?", (snapshot_name(path),))
+
+    def _commit_deletes(self) -> None:
+        self.conn.commit()
+        super()._commit_deletes()
+
+    def convert_snapshot(self, path: Path, snapshot_format: str) -> Path | None:
+        raise ValueError("Snapshot formats only apply to the json backend")
+
+    # -------------------------------
+    # Integrity
+    # -------------------------------
+
+    def integrity_problems(self, quick: bool = False) -> List[str]:
+        """SQLite's own page / index consistency check (quick_check skips the indexes)."""
+        pragma = "quick_check" if quick else "integrity_check"
+        rows = [row[0] for row in self.conn.execute(f"PRAGMA {pragma}")]
+        return [] if rows == ["ok"] else rows
@@ -1,75 +1,489 @@
+import glob
 import json
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, List
+from attackdiff import metrics
+from attackdiff.compression import CODECS, open_text, strip_codec
 from attackdiff.asset import Asset
 from datetime import datetime, timezone, timedelta
 
+# Format modules (jsonl, binary, delta), the index, the diff cache and the
+# history index are imported where they are used, so that light commands
+# (list --short, config) do not load them (see benchmarks/import_time.py).
+if TYPE_CHECKING:
+    from attackdiff.diff_cache import DiffCache
+    from attackdiff.filters import AssetFilter
+    from attackdiff.history import HostHistory
+    from attackdiff.index import ChecksumManifest, SnapshotIndex
+
 
 
 class AssetStorage:
-    def __init__(self, path: str):
+    """
+    Running asset inventory: a checkpoint file (`path`, {asset id: asset})
+    plus an append-only journal of the changes made since (`path`.journal,
+    one JSON record per line).
+
+    upsert / upsert_many / remove append to the journal, which is fsync'd
+    every `sync_every` records (save() and close() fsync the rest), so an
+    update costs O(changes) instead of a rewrite of the inventory. Once the
+    journal holds at least `compact_min` records and as many records as the
+    inventory has assets, it is compacted into a new checkpoint, in a
+    background thread unless `background` is False. load() replays the
+    checkpoint, then the journal.
+
+    Changes made directly to `assets` are not journaled.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sync_every: int = 100,
+        compact_min: int = 1000,
+        background: bool = True
+    ):
+        if sync_every < 1:
+            raise ValueError("sync_every must be >= 1")
+
         self.path = Path(path)
+        self.journal_path = self.path.with_name(self.path.name + ".journal")
         self.assets: Dict[str, Asset] = {}
+        self.sync_every = sync_every
+        self.compact_min = compact_min
+        self.background = background
+
+        self._lock = threading.RLock()
+        self._journal = None
+        self._journal_records = 0  # records not compacted yet (journal and its segments)
+        self._unsynced = 0
+        self._compaction = None
+
+    def __enter__(self) -> "AssetStorage":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # -------------------------------
+    # Reading
+    # -------------------------------
 
     def load(self):
-        if not self.path.exists():
-            self.assets = {}
-            return
+        self.wait_for_compaction()
 
-        if self.path.stat().st_size == 0:
+        with self._lock:
+            self._close_journal()
             self.assets = {}
-            return
 
-        with open(self.path, "r") as f:
-            raw = json.load(f)
+            if self.path.exists() and self.path.stat().st_size > 0:
+                with open(self.path, "r") as f:
+                    raw = json.load(f)
 
-        self.assets = {
-            asset_id: Asset.from_dict(data)
-            for asset_id, data in raw.items()
-        }
+                self.assets = {
+                    asset_id: Asset.from_dict(data)
+                    for asset_id, data in raw.items()
+                }
 
+            # segments left by a compaction that did not finish, then the journal
+            records = 0
+            for _, segment in self._segments():
+                records += self._replay(segment)
+            records += self._replay(self.journal_path, live=True)
 
-    def save(self):
+            self._journal_records = records
+
+    def _segments(self) -> List[tuple]:
+        """(number, path) of the rotated journal segments, oldest first."""
+        prefix = self.journal_path.name + "."
+        segments = []
+
+        for path in self.path.parent.glob(glob.escape(prefix) + "*"):
+            number = path.name[len(prefix):]
+            if number.isdigit():
+                segments.append((int(number), path))
+
+        return sorted(segments)
+
+    def _replay(self, path: Path, live: bool = False) -> int:
         """
-        Save current snapshot to disk.
+        Apply the records of a journal file, return how many. A record cut
+        short by a crash ends the replay; in the live journal it is cut off
+        so that new records start on a line of their own.
         """
-        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if not path.exists():
+            return 0
 
-        with open(self.path, "w") as f:
-            json.dump(
-                {aid: asset.to_dict() for aid, asset in self.assets.items()},
-                f,
-                indent=2
-            )
+        count = 0
+        offset = 0
+
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete record")
+                    record = json.loads(line)
+                except ValueError:
+                    print(f"[!] Ignoring damaged journal record in {path.name} at byte {offset}")
+                    break
+
+                if record["op"] == "put":
+                    self.assets[record["id"]] = Asset.from_dict(record["asset"])
+                else:
+                    self.assets.pop(record["id"], None)
+
+                count += 1
+                offset += len(line)
+
+        if live and offset < path.stat().st_size:
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+
+        return count
+
+    # -------------------------------
+    # Updates
+    # -------------------------------
 
     def upsert(self, new_asset: Asset):
         """
         Insert or update an asset based on its ID.
         """
-        existing = self.assets.get(new_asset.id)
+        self.upsert_many([new_asset])
+
+    def upsert_many(self, new_assets) -> None:
+        """Upsert several assets with a single journal write."""
+        records = []
+
+        with self._lock:
+            for new_asset in new_assets:
+                existing = self.assets.get(new_asset.id)
+
+                if existing:
+                    # Preserve first_seen
+                    new_asset.first_seen = existing.first_seen
+
+                self.assets[new_asset.id] = new_asset
+                records.append({"op": "put", "id": new_asset.id, "asset": new_asset.to_dict()})
+
+            self._append(records)
+
+        self._maybe_compact()
+
+    def remove(self, asset_id: str) -> bool:
+        with self._lock:
+            if self.assets.pop(asset_id, None) is None:
+                return False
+            self._append([{"op": "del", "id": asset_id}])
+
+        self._maybe_compact()
+        return True
+
+    def _append(self, records: List[dict]) -> None:
+        if not records:
+            return
 
-        if existing:
-            # Preserve first_seen
-            new_asset.first_seen = existing.first_seen
-            # Update last_seen
-            new_asset.last_seen = new_asset.last_seen
-            self.assets[new_asset.id] = new_asset
+        if self._journal is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+        encode = json.JSONEncoder(separators=(",", ":")).encode
+        self._journal.write("".join(encode(record) + "\n" for record in records))
+        self._journal.flush()  # survives a crash of this process from here
+
+        self._journal_records += len(records)
+        self._unsynced += len(records)
+
+        if self._unsynced >= self.sync_every:
+            self._sync()
+
+    def _sync(self) -> None:
+        if self._journal is not None and self._unsynced:
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+        self._unsynced = 0
+
+    def _close_journal(self) -> None:
+        if self._journal is not None:
+            self._sync()
+            self._journal.close()
+            self._journal = None
+
+    def save(self):
+        """
+        Make every update so far durable (fsync the journal).
+        """
+        with self._lock:
+            self._sync()
+
+    def close(self) -> None:
+        self.wait_for_compaction()
+        with self._lock:
+            self._close_journal()
+
+    # -------------------------------
+    # Compaction
+    # -------------------------------
+
+    def _maybe_compact(self) -> None:
+        if self._compaction is not None and self._compaction.is_alive():
+            return
+
+        if self._journal_records >= max(self.compact_min, len(self.assets)):
+            self.compact(wait=not self.background)
+
+    def compact(self, wait: bool = True) -> None:
+        """
+        Write the inventory as a new checkpoint and drop the journal records
+        it contains. The journal is rotated first, so updates can go on
+        while the checkpoint is written.
+        """
+        self.wait_for_compaction()
+
+        with self._lock:
+            self._close_journal()
+
+            segments = self._segments()
+            last = segments[-1][0] if segments else 0
+
+            if self.journal_path.exists():
+                last += 1
+                os.replace(self.journal_path, self.journal_path.with_name(f"{self.journal_path.name}.{last}"))
+
+            # assets are replaced on upsert, never changed in place: a shallow copy is a snapshot
+            state = dict(self.assets)
+            self._journal_records = 0
+
+        if wait:
+            self._write_checkpoint(state, last)
         else:
-            self.assets[new_asset.id] = new_asset
+            self._compaction = threading.Thread(
+                target=metrics.bind(self._write_checkpoint),
+                args=(state, last),
+                name="inventory-compaction"
+            )
+            self._compaction.start()
+
+    def wait_for_compaction(self) -> None:
+        if self._compaction is not None:
+            self._compaction.join()
+            self._compaction = None
+
+    def _write_checkpoint(self, state: Dict[str, Asset], last_segment: int) -> None:
+        tmp = self.path.with_name(self.path.name + ".tmp")
+
+        try:
+            with metrics.phase("inventory.compact", assets=len(state)):
+                with open(tmp, "w") as f:
+                    json.dump({aid: asset.to_dict() for aid, asset in state.items()}, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                os.replace(tmp, self.path)
+                fsync_dir(self.path.parent)
+
+                # the checkpoint is durable, the segments it contains can go
+                for number, segment in self._segments():
+                    if number <= last_segment:
+                        segment.unlink(missing_ok=True)
+
+        except Exception as e:
+            # the segments are kept and replayed on load, the next compaction covers them
+            tmp.unlink(missing_ok=True)
+            print(f"[!] Inventory compaction failed ({e}), the journal is kept")
+
+
+def fsync_dir(path: Path) -> None:
+    """Make renames in `path` durable (no-op where directories cannot be opened)."""
+    if os.name == "nt":
+        return
+
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# jsonl.SUFFIX / binary.SUFFIX, spelled out so the modules load on use
+SNAPSHOT_FORMATS = {
+    "json": ".json",
+    "jsonl": ".jsonl",
+    "binary": ".snap",
+}
+
+HISTORY_DB_NAME = "history.db"
+
+FORMAT_BY_SUFFIX = {suffix: name for name, suffix in SNAPSHOT_FORMATS.items()}
+
+
+def snapshot_format_of(path: str | Path) -> str | None:
+    """Format of a snapshot file ("json", "jsonl", "binary"), compressed or not."""
+    return FORMAT_BY_SUFFIX.get(strip_codec(path).suffix)
+
+
+def write_document(path: Path, snapshot_format: str, meta: dict, assets: Dict[str, Asset]) -> None:
+    """Write a full (non-delta) snapshot in the given format."""
+    from attackdiff import binary, jsonl
+
+    if snapshot_format == "jsonl":
+        jsonl.write_snapshot(path, meta, assets)
+    elif snapshot_format == "binary":
+        binary.write_snapshot(path, meta, assets)
+    else:
+        snapshot = {
+            "meta": meta,
+            "assets": {aid: asset.to_dict() for aid, asset in assets.items()},
+        }
+        with open_text(path, "w") as f:
+            json.dump(snapshot, f, indent=2)
+
+
+def read_document(path: Path) -> dict:
+    """
+    Read a snapshot file of any format as {"meta": ..., "assets"/"delta": ...}.
+    """
+    from attackdiff import binary, jsonl
+
+    if snapshot_format_of(path) == "jsonl":
+        return {
+            "meta": jsonl.read_meta(path),
+            "assets": {data.get("id", data["host"]): data for data in jsonl.iter_assets(path)},
+        }
+
+    if snapshot_format_of(path) == "binary":
+        return {"meta": binary.read_meta(path), "assets": binary.read_assets(path)}
+
+    with open_text(path, "r") as f:
+        return json.load(f)
 
 
 class SnapshotStorage:
-    def __init__(self, base_path: str = "data/scans"):
+    def __init__(
+        self,
+        base_path: str = "data/scans",
+        keyframe_interval: int | None = None,
+        snapshot_format: str = "json",
+        compression: str | None = None
+    ):
+        """
+        keyframe_interval: when set (> 1), snapshots are stored as deltas
+        against their predecessor, with a full keyframe every N snapshots.
+
+        snapshot_format: format of new snapshots ("json", "jsonl" or "binary",
+        see attackdiff.jsonl / attackdiff.binary). Existing snapshots are
+        read in any format.
+
+        compression: codec for new snapshots ("gzip", "lzma", "bz2" or None,
+        see attackdiff.compression). Compressed and plain snapshots are
+        read alike.
+        """
+        if snapshot_format not in SNAPSHOT_FORMATS:
+            raise ValueError(f"Unknown snapshot format: {snapshot_format}")
+
+        if compression is not None and compression not in CODECS:
+            raise ValueError(f"Unknown compression: {compression}")
+
+        if compression and snapshot_format == "binary":
+            raise ValueError("Binary snapshots cannot be compressed (they are read with mmap)")
+
         self.base_path = Path(base_path)
         self.base_path.mkdir(parents=True, exist_ok=True)
+        self.keyframe_interval = keyframe_interval
+        self.snapshot_format = snapshot_format
+        self.compression = compression
+        self.diff_cache_max_bytes: int | None = None  # None: DiffCache's default
+        self._index = None
+        self._checksums = None
+        self._diff_cache = None
+        self._history = None
+        self._pruned = []
+        self._bulk = False
+
+        # recently loaded snapshots, kept by long-running processes (daemon)
+        self.snapshot_cache_size = 0
+        self._snapshot_cache = OrderedDict()
+
+    def close(self) -> None:
+        if self._history is not None:
+            self._history.close()
+            self._history = None
+
+    @property
+    def index(self) -> "SnapshotIndex":
+        if self._index is None:
+            from attackdiff.index import SnapshotIndex
+            self._index = SnapshotIndex(self.base_path)
+        return self._index
+
+    @property
+    def checksums(self) -> "ChecksumManifest":
+        if self._checksums is None:
+            from attackdiff.index import ChecksumManifest
+            self._checksums = ChecksumManifest(self.base_path)
+        return self._checksums
+
+    @property
+    def diff_cache(self) -> "DiffCache":
+        if self._diff_cache is None:
+            from attackdiff.diff_cache import DiffCache
+            self._diff_cache = DiffCache(self.base_path / ".meta" / "diff-cache")
+            if self.diff_cache_max_bytes is not None:
+                self._diff_cache.max_bytes = self.diff_cache_max_bytes
+        return self._diff_cache
+
+    def _suffix(self, snapshot_format: str) -> str:
+        """Filename suffix of new snapshots in the given format."""
+        suffix = SNAPSHOT_FORMATS[snapshot_format]
+
+        if self.compression and snapshot_format != "binary":
+            suffix += CODECS[self.compression]
+
+        return suffix
+
+    def _tmp_path(self, path: Path) -> Path:
+        """
+        Scratch file for rewriting `path`: same name (and codec) under .meta,
+        so it is never listed as a snapshot, then moved into place.
+        """
+        tmp_dir = self.base_path / ".meta"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        return tmp_dir / path.name
+
+    @contextmanager
+    def bulk(self):
+        """
+        Save many snapshots (import): the index and the checksum manifest
+        are written once at the end instead of after every snapshot.
+        """
+        self._bulk = True
+        try:
+            yield self
+        finally:
+            self._bulk = False
+            self.index.save()
+            self.checksums.save()
 
     def save_snapshot(
         self,
         assets: Dict[str, Asset],
         tag: str | None = None,
-        scanner: str | None = None
+        scanner: str | None = None,
+        timestamp: str | None = None
     ) -> Path:
-        timestamp = datetime.now(timezone.utc).isoformat()
+        """
+        timestamp: ISO timestamp of the snapshot (default: now), for
+        snapshots of scans that ran elsewhere (import).
+        """
+        from attackdiff.index import file_sha256
+
+        timestamp = timestamp or datetime.now(timezone.utc).isoformat()
+
+        if self.snapshot_format != "json":
+            return self._save_full(assets, timestamp, tag, scanner)
 
         snapshot = {
             "meta": {
@@ -83,13 +497,157 @@ class SnapshotStorage:
             }
         }
 
-        filename = timestamp.replace(":", "-") + ".json"
+        if self.keyframe_interval and self.keyframe_interval > 1:
+            snapshot = self._encode_delta(snapshot)
+
+        filename = timestamp.replace(":", "-") + self._suffix("json")
         path = self.base_path / filename
 
-        with open(path, "w") as f:
-            json.dump(snapshot, f, indent=2)
+        if path.exists():
+            raise FileExistsError(f"Snapshot already exists: {path.name}")
+
+        with metrics.phase("save.encode"):
+            with open_text(path, "w") as f:
+                json.dump(snapshot, f, indent=2)
+
+        with metrics.phase("save.index"):
+            sha256 = file_sha256(path)
+            self.index.add(path, {
+                **snapshot["meta"],
+                "assets": len(assets),
+                "sha256": sha256,
+            })
+            if not self._bulk:
+                self.index.save()
+            self._record_checksum(path.name, sha256)
+        self._record_history(path.name, snapshot["meta"], assets)
 
         return path
+
+
+    def _save_full(
+        self,
+        assets: Dict[str, Asset],
+        timestamp: str,
+        tag: str | None,
+        scanner: str | None
+    ) -> Path:
+        from attackdiff.index import file_sha256
+
+        meta = {
+            "timestamp": timestamp,
+            "tag": tag,
+            "scanner": scanner,
+            "assets": len(assets),
+        }
+
+        path = self.base_path / (timestamp.replace(":", "-") + self._suffix(self.snapshot_format))
+
+        if path.exists():
+            raise FileExistsError(f"Snapshot already exists: {path.name}")
+
+        with metrics.phase("save.encode"):
+            write_document(path, self.snapshot_format, meta, assets)
+
+        with metrics.phase("save.index"):
+            sha256 = file_sha256(path)
+            self.index.add(path, {**meta, "sha256": sha256})
+            if not self._bulk:
+                self.index.save()
+            self._record_checksum(path.name, sha256)
+        self._record_history(path.name, meta, assets)
+
+        return path
+
+
+    def _record_checksum(self, name: str, sha256: str | None) -> None:
+        """Record the checksum of a snapshot file the store just wrote."""
+        if sha256:
+            self.checksums.set(name, sha256)
+            if not self._bulk:
+                self.checksums.save()
+
+    # -------------------------------
+    # Per-host history index
+    # -------------------------------
+
+    @property
+    def history(self) -> "HostHistory":
+        if self._history is None:
+            from attackdiff.history import HostHistory
+            self._history = HostHistory(self.base_path / ".meta" / HISTORY_DB_NAME)
+        return self._history
+
+    def _record_history(self, name: str, meta: dict, assets: Dict[str, Asset]) -> None:
+        """
+        Add a saved snapshot to the history index. The snapshot itself is
+        already stored, so a failure here only leaves the index behind
+        (sync_history catches up).
+        """
+        try:
+            with metrics.phase("save.history"):
+                self.history.add_snapshot(name, meta, assets)
+        except Exception as e:
+            print(f"[!] History index not updated ({e}); run: attackdiff history --rebuild")
+
+    def sync_history(self) -> dict:
+        """
+        Bring the history index in line with the stored snapshots: index
+        the missing ones (oldest first) and drop the ones that are gone.
+        """
+        stored = {entry["name"]: entry for entry in self.snapshot_entries() if "error" not in entry}
+        indexed = self.history.snapshot_names()
+
+        removed = indexed - set(stored)
+        if removed:
+            self.history.remove_snapshots(removed)
+
+        added = [name for name in stored if name not in indexed]
+        for name in added:
+            path = stored[name]["path"]
+            self.history.add_snapshot(name, self.load_meta(path), self.load_snapshot(path))
+
+        return {"added": len(added), "removed": len(removed)}
+
+    def rebuild_history(self) -> dict:
+        self.history.clear()
+        return self.sync_history()
+
+
+    def _encode_delta(self, snapshot: dict) -> dict:
+        """
+        Turn a full snapshot document into a delta against the latest stored
+        snapshot, unless the chain is due for a keyframe.
+        """
+        from attackdiff.delta import make_delta
+
+        entries = [e for e in self.snapshot_entries() if "error" not in e]
+        if not entries:
+            return snapshot
+
+        base = entries[-1]
+        chain = base.get("chain", 0) + 1
+
+        if chain >= self.keyframe_interval:
+            return snapshot
+
+        try:
+            _, base_assets = self._load_raw(base["path"])
+        except Exception:
+            # unreadable predecessor → start a new chain
+            return snapshot
+
+        meta = snapshot["meta"]
+
+        return {
+            "meta": {
+                **meta,
+                "base": base["name"],
+                "chain": chain,
+                "assets": len(snapshot["assets"]),
+            },
+            "delta": make_delta(base_assets, snapshot["assets"], meta["timestamp"]),
+        }
     
 
 
@@ -111,28 +669,187 @@ class SnapshotStorage:
         """
         Return a sorted list of all snapshot files (oldest → newest)
         """
-        files = sorted(self.base_path.glob("*.json"))
+        patterns = ["*" + suffix for suffix in SNAPSHOT_FORMATS.values()]
+        patterns += [
+            "*" + SNAPSHOT_FORMATS[fmt] + codec
+            for fmt in ("json", "jsonl")
+            for codec in CODECS.values()
+        ]
+
+        files = sorted(
+            path
+            for pattern in patterns
+            for path in self.base_path.glob(pattern)
+        )
         return files
 
 
-    def load_snapshot(self, path: Path) -> Dict[str, Asset]:
+    def _load_raw(self, path: Path) -> tuple:
+        """
+        Return (meta, {asset_id: asset dict}) for a snapshot file.
+        Delta snapshots are rebuilt by replaying from their keyframe.
+        """
+        from attackdiff.delta import replay
+
+        path = Path(path)
+        raw = read_document(path)
+
+        meta = raw.get("meta", {})
+        deltas = []
+        seen = {path.name}
+
+        while "delta" in raw:
+            deltas.append(raw["delta"])
+            base = raw.get("meta", {}).get("base")
+
+            if not base or base in seen:
+                raise RuntimeError(f"Broken delta chain for {path.name} at {base}")
+            seen.add(base)
+
+            base_path = path.parent / base
+            if not base_path.exists():
+                raise RuntimeError(f"Broken delta chain for {path.name}: missing base {base}")
+
+            raw = read_document(base_path)
+
+        deltas.reverse()
+
+        return meta, replay(raw.get("assets", {}), deltas)
+
+
+    def load_snapshot(self, path: Path, where: "AssetFilter | None" = None) -> Dict[str, Asset]:
         """
         Load a snapshot JSON into Asset objects
+
+        where: only the assets matching this filter, checked on the records
+        as they are read (the others never become Asset objects).
         """
-        with open(path, "r") as f:
-            raw = json.load(f)
+        from attackdiff import binary, jsonl
+
+        key = None
+        if self.snapshot_cache_size:
+            try:
+                st = Path(path).stat()
+                key = (Path(path).name, st.st_size, st.st_mtime_ns)
+            except OSError:
+                pass
+
+        if key in self._snapshot_cache:
+            self._snapshot_cache.move_to_end(key)
+            cached = self._snapshot_cache[key]
+            if where is not None:
+                return {aid: asset for aid, asset in cached.items() if where.matches_asset(asset)}
+            return dict(cached)
+
+        with metrics.phase("load") as p:
+            if snapshot_format_of(path) == "binary":
+                assets = binary.load_assets(path, where)
+            elif snapshot_format_of(path) == "jsonl" and where is not None:
+                # streamed: non-matching lines are skipped as they are read
+                assets = {}
+                for data in jsonl.iter_assets(path, where):
+                    assets[data.get("id", data["host"])] = Asset.from_dict(data)
+            else:
+                _, assets_raw = self._load_raw(path)
+                assets = {
+                    aid: Asset.from_dict(data) for aid, data in assets_raw.items()
+                    if where is None or where.matches(data)
+                }
+            p.count(assets=len(assets))
+
+        # only whole snapshots are cached
+        if key is not None and where is None:
+            self._snapshot_cache[key] = assets
+            while len(self._snapshot_cache) > self.snapshot_cache_size:
+                self._snapshot_cache.popitem(last=False)
+            assets = dict(assets)
+
+        return assets
+
+
+    def find_assets(self, path: Path, ids) -> Dict[str, Asset]:
+        """The assets of a snapshot with one of the given ids."""
+        from attackdiff import binary, jsonl
+
+        ids = set(ids)
+        if not ids:
+            return {}
+
+        if snapshot_format_of(path) == "binary":
+            with binary.BinarySnapshot(path) as snap:
+                found = (snap.find(aid) for aid in ids)
+                return {data["id"]: Asset.from_dict(data) for data in found if data is not None}
+
+        if snapshot_format_of(path) == "jsonl":
+            records = jsonl.iter_assets(path)
+        else:
+            records = self._load_raw(path)[1].values()
+
+        return {
+            data.get("id", data["host"]): Asset.from_dict(data) for data in records
+            if data.get("id", data["host"]) in ids
+        }
+
+    def load_slice(self, old_path: Path, new_path: Path, where: "AssetFilter") -> tuple:
+        """
+        (old assets, new assets) of the assets matching `where` in either
+        snapshot: an asset that gained or lost a filtered port is loaded
+        from both, so it diffs as changed rather than new or missing.
+        """
+        if not where.content:
+            # identity filters select the same assets in both snapshots
+            return self.load_snapshot(old_path, where), self.load_snapshot(new_path, where)
+
+        if snapshot_format_of(old_path) == snapshot_format_of(new_path) == "json" and not self.snapshot_cache_size:
+            # JSON documents are parsed whole anyway: select from both at once
+            with metrics.phase("load") as p:
+                _, old_raw = self._load_raw(old_path)
+                _, new_raw = self._load_raw(new_path)
+
+                ids = {aid for aid, data in old_raw.items() if where.matches(data)}
+                ids.update(aid for aid, data in new_raw.items() if where.matches(data))
 
-        assets_raw = raw.get("assets", {})
+                old = {aid: Asset.from_dict(old_raw[aid]) for aid in ids if aid in old_raw}
+                new = {aid: Asset.from_dict(new_raw[aid]) for aid in ids if aid in new_raw}
+                p.count(assets=len(old) + len(new))
+            return old, new
 
-        return {aid: Asset.from_dict(data) for aid, data in assets_raw.items()}
+        old = self.load_snapshot(old_path, where)
+        new = self.load_snapshot(new_path, where)
 
+        only_old = old.keys() - new.keys()
+        only_new = new.keys() - old.keys()
+
+        old.update(self.find_assets(old_path, only_new))
+        new.update(self.find_assets(new_path, only_old))
+        return old, new
 
     def load_meta(self, path: Path) -> dict:
-        with open(path, "r") as f:
+        from attackdiff import binary, jsonl
+
+        path = Path(path)
+
+        if snapshot_format_of(path) == "jsonl":
+            return jsonl.read_meta(path)
+
+        if snapshot_format_of(path) == "binary":
+            return binary.read_meta(path)
+
+        with open_text(path, "r") as f:
             raw = json.load(f)
         return raw.get("meta", {})
 
 
+    def can_stream_diff(self, old_path: Path, new_path: Path) -> bool:
+        """True when both snapshots can be diffed with jsonl.iter_diff."""
+        return (
+            snapshot_format_of(old_path) == "jsonl"
+            and snapshot_format_of(new_path) == "jsonl"
+            and Path(old_path).exists()
+            and Path(new_path).exists()
+        )
+
+
     def load_last_two_snapshots(self):
         """
         Load the last two snapshots for diffing
@@ -148,12 +865,9 @@ class SnapshotStorage:
         """
         Return the most recent snapshot with the given tag
         """
-        snapshots = self.list_snapshots()
-
-        for path in reversed(snapshots):  # newest first
-            meta = self.load_meta(path)
-            if meta.get("tag") == tag:
-                return path
+        for entry in reversed(self.snapshot_entries()):  # newest first
+            if entry.get("tag") == tag:
+                return entry["path"]
 
         raise RuntimeError(f"No snapshot found with tag '{tag}'")
     
@@ -165,38 +879,227 @@ class SnapshotStorage:
         return snapshots[-1]
     
 
-    def _parse_snapshot_meta(self, path: Path) -> dict:
-        with open(path, "r") as f:
-            raw = json.load(f)
+    def _describe_snapshot(self, path: Path) -> dict:
+        """
+        Build the index entry for a snapshot file (full parse).
+        Only used when the index is missing or stale for this file.
+        """
+        from attackdiff import binary, jsonl
+        from attackdiff.index import file_sha256
+
+        if snapshot_format_of(path) == "jsonl":
+            meta = jsonl.read_meta(path)
+            if "assets" not in meta:
+                meta["assets"] = sum(1 for _ in jsonl.iter_assets(path))
+            raw = {"meta": meta}
+        elif snapshot_format_of(path) == "binary":
+            raw = {"meta": binary.read_meta(path)}
+        else:
+            with open_text(path, "r") as f:
+                raw = json.load(f)
 
         meta = raw.get("meta", {})
 
-        timestamp = meta.get("timestamp")
-        tag = meta.get("tag")
+        entry = {
+            "timestamp": meta.get("timestamp"),
+            "tag": meta.get("tag"),
+            "scanner": meta.get("scanner"),
+            "assets": meta.get("assets", len(raw.get("assets", {}))),
+            "sha256": file_sha256(path),
+        }
+
+        if "delta" in raw:
+            entry["base"] = meta.get("base")
+            entry["chain"] = meta.get("chain", 1)
 
-        created_at = datetime.fromisoformat(timestamp)
+        return entry
 
-        return {
-            "path": path,
-            "created_at": created_at,
-            "tag": tag
-        }
+
+    def snapshot_entries(self) -> List[dict]:
+        """
+        Return index entries for all snapshots (oldest → newest).
+        Each entry has name, path, timestamp, tag, scanner, assets, size and sha256.
+        Corrupted snapshots carry an "error" key instead.
+        """
+        with metrics.phase("index") as p:
+            entries = self.index.refresh(self.list_snapshots(), self._describe_snapshot)
+            p.count(snapshots=len(entries))
+        return entries
+
+
+    def snapshot_sha256(self, path: Path) -> str | None:
+        """Content hash of a stored snapshot, from the index (None if unknown)."""
+        name = Path(path).name
+
+        for entry in self.snapshot_entries():
+            if entry["name"] == name:
+                return entry.get("sha256")
+
+        return None
+
+
+    def rebuild_index(self) -> List[dict]:
+        return self.index.rebuild(self.list_snapshots(), self._describe_snapshot)
 
 
     def list_snapshots_with_meta(self):
         snapshots = []
 
-        for path in self.base_path.glob("*.json"):
-            try:
-                snapshots.append(self._parse_snapshot_meta(path))
-            except Exception:
+        for entry in self.snapshot_entries():
+            if "error" in entry:
                 # corrupted snapshot → skip
                 continue
+            try:
+                created_at = datetime.fromisoformat(entry["timestamp"])
+            except (TypeError, ValueError):
+                continue
+
+            snapshots.append({
+                "path": entry["path"],
+                "created_at": created_at,
+                "tag": entry.get("tag"),
+                "sha256": entry.get("sha256"),
+            })
 
         return snapshots
 
     
 
+    def _delete_snapshot(self, path: Path) -> None:
+        # Deltas based on this snapshot must not lose their base
+        for name, entry in list(self.index.entries.items()):
+            if entry.get("base") == path.name:
+                self._rebase(self.base_path / name, path)
+
+        path.unlink(missing_ok=True)
+        self.index.remove(path.name)
+        self.checksums.remove(path.name)
+
+
+    def _rebase(self, path: Path, removed: Path) -> None:
+        """
+        Rewrite the delta snapshot `path` so it no longer depends on `removed`:
+        it becomes a delta against removed's own base, or a keyframe.
+        """
+        from attackdiff.delta import make_delta
+
+        _, assets = self._load_raw(path)
+
+        with open_text(path, "r") as f:
+            raw = json.load(f)
+        removed_meta = self.load_meta(removed)
+
+        meta = raw["meta"]
+        new_base = removed_meta.get("base")
+
+        if new_base and (self.base_path / new_base).exists():
+            _, base_assets = self._load_raw(self.base_path / new_base)
+            meta["base"] = new_base
+            meta["chain"] = max(removed_meta.get("chain", 1), 1)
+            snapshot = {
+                "meta": meta,
+                "delta": make_delta(base_assets, assets, raw["delta"].get("last_seen")),
+            }
+        else:
+            for key in ("base", "chain", "assets"):
+                meta.pop(key, None)
+            snapshot = {"meta": meta, "assets": assets}
+
+        tmp = self._tmp_path(path)
+        with open_text(tmp, "w") as f:
+            json.dump(snapshot, f, indent=2)
+        tmp.replace(path)
+
+        self.index.remove(path.name)
+        entry = self._describe_snapshot(path)
+        self.index.add(path, entry)
+        self._record_checksum(path.name, entry["sha256"])
+
+
+    def convert_snapshot(self, path: Path, snapshot_format: str) -> Path | None:
+        """
+        Rewrite a snapshot in another format (and the store's compression),
+        as a full snapshot with the same name, and remove the original. Deltas based on it are pointed
+        at the new file. Returns the new path, or None when the snapshot is
+        already stored that way.
+        """
+        path = Path(path)
+        target = path.parent / (strip_codec(path).stem + self._suffix(snapshot_format))
+        entries = {entry["name"]: entry for entry in self.snapshot_entries()}
+        entry = entries.get(path.name, {})
+
+        if target == path and not entry.get("base"):
+            return None
+        if target != path and target.exists():
+            raise RuntimeError(f"{target.name} already exists")
+
+        meta, assets_raw = self._load_raw(path)
+        meta = {key: value for key, value in meta.items() if key not in ("base", "chain")}
+        meta["assets"] = len(assets_raw)
+        assets = {aid: Asset.from_dict(data) for aid, data in assets_raw.items()}
+
+        tmp = self._tmp_path(target)
+        try:
+            write_document(tmp, snapshot_format, meta, assets)
+        except Exception:
+            tmp.unlink(missing_ok=True)
+            raise
+        tmp.replace(target)
+
+        if target != path:
+            for name, dependent in entries.items():
+                if dependent.get("base") == path.name:
+                    self._set_base(self.base_path / name, target.name)
+
+            path.unlink()
+            self.index.remove(path.name)
+            self.checksums.remove(path.name)
+            self.history.rename_snapshot(path.name, target.name)
+
+        self.index.remove(target.name)
+        entry = self._describe_snapshot(target)
+        self.index.add(target, entry)
+        self.index.save()
+        self._record_checksum(target.name, entry["sha256"])
+
+        return target
+
+
+    def _set_base(self, path: Path, base: str) -> None:
+        """Point the delta snapshot `path` at a renamed base with the same assets."""
+        with open_text(path, "r") as f:
+            raw = json.load(f)
+
+        raw["meta"]["base"] = base
+
+        tmp = self._tmp_path(path)
+        with open_text(tmp, "w") as f:
+            json.dump(raw, f, indent=2)
+        tmp.replace(path)
+
+        self.index.remove(path.name)
+        entry = self._describe_snapshot(path)
+        self.index.add(path, entry)
+        self._record_checksum(path.name, entry["sha256"])
+
+
+    def _prune_snapshot(self, snapshot: dict) -> None:
+        self._delete_snapshot(snapshot["path"])
+        # cached diffs of a deleted snapshot can never be asked for again
+        self.diff_cache.invalidate(snapshot.get("sha256"))
+        self._pruned.append(Path(snapshot["path"]).name)
+
+
+    def _commit_deletes(self) -> None:
+        """Called once at the end of prune, after all deletions."""
+        self.index.save()
+        self.checksums.save()
+
+        if self._pruned:
+            self.history.remove_snapshots(self._pruned)
+            self._pruned = []
+
+
     def prune(
         self,
         keep_last: int | None = None,
@@ -256,7 +1159,9 @@ class SnapshotStorage:
                         "created_at": s["created_at"],
                     })
                     if not dry_run:
-                        s["path"].unlink(missing_ok=True)
+                        self._prune_snapshot(s)
+
+            self._commit_deletes()
 
             return {
                 "dry_run": dry_run,
@@ -320,7 +1225,9 @@ class SnapshotStorage:
                     "created_at": s["created_at"],
                 })
                 if not dry_run:
-                    s["path"].unlink(missing_ok=True)
+                    self._prune_snapshot(s)
+
+        self._commit_deletes()
 
         return {
             "dry_run": dry_run,
@@ -338,3 +1245,85 @@ class SnapshotStorage:
 
 
 
+
+
+# -------------------------------
+# Store configuration / backend selection
+# -------------------------------
+
+STORE_CONFIG_NAME = "store.json"
+
+DEFAULT_STORE_CONFIG = {
+    "backend": "json",
+}
+
+
+def store_config_path(base_path: str | Path) -> Path:
+    return Path(base_path) / ".meta" / STORE_CONFIG_NAME
+
+
+def load_store_config(base_path: str | Path = "data/scans") -> dict:
+    """
+    Return the per-store settings (backend, ...) saved in .meta/store.json.
+    A store without a config file uses the defaults (plain JSON files).
+    """
+    config = dict(DEFAULT_STORE_CONFIG)
+    path = store_config_path(base_path)
+
+    if path.exists():
+        with open(path, "r") as f:
+            config.update(json.load(f))
+
+    return config
+
+
+def save_store_config(config: dict, base_path: str | Path = "data/scans") -> None:
+    path = store_config_path(base_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(path, "w") as f:
+        json.dump(config, f, indent=2)
+
+
+# Set by the daemon (see attackdiff.daemon.StorePool): storages are then
+# kept open between jobs, and locked per store, instead of opened per command.
+_store_pool = None
+
+
+def set_store_pool(pool) -> None:
+    global _store_pool
+    _store_pool = pool
+
+
+def open_storage(base_path: str = "data/scans", shared: bool = True) -> SnapshotStorage:
+    """
+    Open the snapshot store at base_path with the backend it is configured for.
+
+    shared: use the store pool when one is set (daemon); False always opens
+    a new instance.
+    """
+    if shared and _store_pool is not None:
+        return _store_pool.open(base_path)
+
+    config = load_store_config(base_path)
+    backend = config.get("backend", "json")
+
+    if backend == "json":
+        storage = SnapshotStorage(
+            base_path,
+            keyframe_interval=config.get("delta_keyframe_interval"),
+            snapshot_format=config.get("format", "json"),
+            compression=config.get("compression")
+        )
+
+    elif backend == "sqlite":
+        from attackdiff.sqlite_storage import SqliteSnapshotStorage
+        storage = SqliteSnapshotStorage(base_path)
+
+    else:
+        raise ValueError(f"Unknown storage backend in {store_config_path(base_path)}: {backend}")
+
+    if config.get("diff_cache_mb") is not None:
+        storage.diff_cache_max_bytes = config["diff_cache_mb"] * 1024 * 1024
+
+    return storage
@@ -0,0 +1,167 @@
+"""
+Churn across a range of snapshots.
+
+Consecutive snapshots are diffed in one pass over the range: each snapshot
+is loaded once and only the previous one is kept in memory. With workers > 1
+the pairwise diffs run in a process pool instead (each worker loads both
+snapshots of its pair). Diffs already in the diff cache are reused either
+way, and new ones are added to it.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from attackdiff.diff import diff_assets
+from attackdiff.jsonl import collect_diff, iter_diff
+from attackdiff.output import normalize_diff
+from attackdiff.storage import SnapshotStorage, open_storage
+
+
+def select_range(
+    storage: SnapshotStorage,
+    from_tag: str | None = None,
+    to_tag: str | None = None,
+    last: int | None = None
+) -> List[Path]:
+    """Snapshots from the from_tag snapshot to the to_tag one (or the last N), oldest first."""
+    snapshots = storage.list_snapshots()
+
+    if last is not None:
+        if last < 2:
+            raise ValueError("--last needs at least 2 snapshots")
+        selected = snapshots[-last:]
+    else:
+        names = [p.name for p in snapshots]
+        start = names.index(storage.find_snapshot_by_tag(from_tag).name)
+        end = names.index(storage.find_snapshot_by_tag(to_tag).name)
+
+        if start >= end:
+            raise ValueError(f"Snapshot tagged '{from_tag}' is not older than the one tagged '{to_tag}'")
+        selected = snapshots[start:end + 1]
+
+    if len(selected) < 2:
+        raise RuntimeError("Not enough snapshots for a timeline")
+
+    return selected
+
+
+def _events(diff: dict) -> List[dict]:
+    events = [
+        {"event": "added", "host": a["host"], "ports": a["ports"], "services": a["services"]}
+        for a in diff["new_assets"].values()
+    ]
+    events += [
+        {"event": "removed", "host": a["host"], "ports": a["ports"], "services": a["services"]}
+        for a in diff["missing_assets"].values()
+    ]
+    events += [{"event": "changed", **record} for record in diff["changed_assets"]]
+
+    events.sort(key=lambda e: (e["host"], e["event"]))
+    return events
+
+
+def _diff_pair(base_path: str, old: str, new: str) -> dict:
+    """Process pool job: diff two snapshots of the store at base_path."""
+    storage = open_storage(base_path, shared=False)
+
+    if storage.can_stream_diff(old, new):
+        return normalize_diff(collect_diff(iter_diff(old, new)))
+
+    return normalize_diff(diff_assets(storage.load_snapshot(old), storage.load_snapshot(new)))
+
+
+def iter_timeline(
+    storage: SnapshotStorage,
+    paths: List[Path],
+    workers: int = 1,
+    events: bool = True,
+    use_cache: bool = True
+) -> Iterator[dict]:
+    """
+    Yield one interval per consecutive pair of `paths`:
+
+        {"from", "to", "from_timestamp", "to_timestamp", "from_tag", "to_tag",
+         "added", "removed", "changed", "events": [...]}
+
+    events: include the per-host events (added / removed / changed).
+    """
+    entries = {entry["name"]: entry for entry in storage.snapshot_entries()}
+    cache = storage.diff_cache if use_cache and storage.diff_cache.enabled else None
+    pairs = list(zip(paths, paths[1:]))
+
+    def cache_key(old: Path, new: Path) -> str | None:
+        old_sha = entries.get(old.name, {}).get("sha256")
+        new_sha = entries.get(new.name, {}).get("sha256")
+        if cache is None or not (old_sha and new_sha):
+            return None
+        return cache.key(old_sha, new_sha)
+
+    def interval(old: Path, new: Path, diff: dict) -> dict:
+        old_entry = entries.get(old.name, {})
+        new_entry = entries.get(new.name, {})
+
+        result = {
+            "from": old.name,
+            "to": new.name,
+            "from_timestamp": old_entry.get("timestamp"),
+            "to_timestamp": new_entry.get("timestamp"),
+            "from_tag": old_entry.get("tag"),
+            "to_tag": new_entry.get("tag"),
+            "added": len(diff["new_assets"]),
+            "removed": len(diff["missing_assets"]),
+            "changed": len(diff["changed_assets"]),
+        }
+        if events:
+            result["events"] = _events(diff)
+        return result
+
+    keys = [cache_key(old, new) for old, new in pairs]
+    cached = [cache.get(key) if key else None for key in keys]
+
+    # ---- process pool: pairs are independent ----
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                None if diff is not None
+                else pool.submit(_diff_pair, str(storage.base_path), str(old), str(new))
+                for (old, new), diff in zip(pairs, cached)
+            ]
+
+            for (old, new), key, diff, future in zip(pairs, keys, cached, futures):
+                if diff is None:
+                    diff = future.result()
+                    if key:
+                        cache.put(key, diff)
+                yield interval(old, new, diff)
+        return
+
+    # ---- single pass: each snapshot loaded once, one previous state kept ----
+    previous = None  # assets of the previous snapshot, when loaded
+
+    for (old, new), key, diff in zip(pairs, keys, cached):
+        if diff is None:
+            if storage.can_stream_diff(old, new):
+                diff = collect_diff(iter_diff(old, new))
+                current = None
+            else:
+                if previous is None:
+                    previous = storage.load_snapshot(old)
+                current = storage.load_snapshot(new)
+                diff = diff_assets(previous, current)
+
+            diff = normalize_diff(diff)
+            if key:
+                cache.put(key, diff)
+        else:
+            current = None
+
+        previous = current
+        yield interval(old, new, diff)
+
+
+def summarize(intervals: List[dict]) -> Dict[str, int]:
+    return {
+        "added": sum(i["added"] for i in intervals),
+        "removed": sum(i["removed"] for i in intervals),
+        "changed": sum(i["changed"] for i in intervals),
+    }
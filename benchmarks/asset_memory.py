@@ -0,0 +1,151 @@
+"""
+Memory / time comparison of the compact Asset against the previous
+dict-based implementation.
+
+    python benchmarks/asset_memory.py [--assets 500000]
+
+Builds a synthetic snapshot (as parsed from JSON), then measures
+Asset.from_dict for every asset, to_dict round-trip and diff_assets, for
+both implementations. Memory is what the assets retain (tracemalloc) once
+the parsed JSON has been released.
+"""
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from attackdiff.asset import Asset  # noqa: E402
+from attackdiff.diff import diff_assets  # noqa: E402
+
+
+class LegacyAsset:
+    """The Asset class as it was before __slots__ (kept for comparison)."""
+
+    def __init__(
+        self,
+        host: str,
+        ip: Optional[str] = None,
+        ports: Optional[List[int]] = None,
+        services: Optional[List[str]] = None,
+        sources: Optional[List[str]] = None,
+    ):
+        self.id = host
+        self.host = host
+        self.ip = ip
+        self.ports = ports or []
+        self.services = services or []
+        self.sources = sources or []
+
+        now = datetime.now(timezone.utc).isoformat()
+        self.first_seen = now
+        self.last_seen = now
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LegacyAsset":
+        asset = cls(
+            host=data["host"],
+            ip=data.get("ip"),
+            ports=data.get("ports", []),
+            services=data.get("services", []),
+            sources=data.get("sources", []),
+        )
+        asset.first_seen = data.get("first_seen", asset.first_seen)
+        asset.last_seen = data.get("last_seen", asset.last_seen)
+        return asset
+
+
+SERVICES = ["http", "https", "ssh", "smtp", "domain", "ms-wbt-server", "mysql", "rdp"]
+PORTS = [22, 25, 53, 80, 443, 3306, 3389, 8080, 8443]
+
+
+def make_raw(count: int, seed: int = 1) -> dict:
+    """Synthetic snapshot assets, fresh objects like json.load produces."""
+    rng = random.Random(seed)
+    ts = "2026-01-01T00:00:00.000000+00:00"
+    raw = {}
+
+    for i in range(count):
+        host = f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"
+        n = rng.randint(1, 4)
+        ports = sorted(rng.sample(PORTS, n))
+        raw[host] = {
+            "id": host,
+            "host": host,
+            "ip": host,
+            "ports": [int(str(p)) for p in ports],  # distinct int objects, as from JSON
+            "services": ["".join(list(s)) for s in rng.sample(SERVICES, n)],
+            "sources": ["".join(list("nmap"))],
+            "first_seen": ts[:20] + f"{i % 1000000:06d}" + ts[26:],
+            "last_seen": ts,
+        }
+
+    return raw
+
+
+def measure(cls, count: int) -> dict:
+    """
+    Time is measured on a plain run; memory on a separate run under
+    tracemalloc and is what the assets retain once the parsed JSON is gone,
+    as in load_snapshot (the legacy class keeps the parsed lists alive).
+    """
+    raw = make_raw(count)
+
+    gc.collect()
+    start = time.perf_counter()
+    assets = {aid: cls.from_dict(d) for aid, d in raw.items()}
+    load_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    diff_assets(assets, assets)
+    diff_s = time.perf_counter() - start
+
+    del raw, assets
+    gc.collect()
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+
+    raw = make_raw(count)
+    assets = {aid: cls.from_dict(d) for aid, d in raw.items()}
+
+    del raw
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+
+    return {"assets": assets, "load_s": load_s, "diff_s": diff_s, "bytes": retained}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--assets", type=int, default=200_000)
+    args = parser.parse_args()
+
+    legacy = measure(LegacyAsset, args.assets)
+    del legacy["assets"]
+    compact = measure(Asset, args.assets)
+    raw = make_raw(args.assets)
+
+    # round-trip must be identical
+    sample = list(raw)[:: max(1, len(raw) // 1000)]
+    for aid in sample:
+        assert compact["assets"][aid].to_dict() == raw[aid], aid
+
+    print(f"{args.assets} assets (Python {sys.version.split()[0]})")
+    print(f"{'':<10} {'from_dict':>12} {'diff_assets':>12} {'memory':>12} {'per asset':>10}")
+    for name, r in (("legacy", legacy), ("compact", compact)):
+        print(
+            f"{name:<10} {r['load_s']:>11.2f}s {r['diff_s']:>11.2f}s "
+            f"{r['bytes'] / 1e6:>10.1f}MB {r['bytes'] / args.assets:>9.0f}B"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Size / speed trade-offs of the snapshot formats and compression codecs.
+
+    python benchmarks/compression.py [--assets 100000] [--codecs gzip lzma bz2]
+
+Saves the same synthetic snapshot with every format / codec combination into
+a temporary store and measures save_snapshot, load_meta and load_snapshot
+(files are freshly written, so reads are served from the page cache).
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from asset_memory import make_raw  # noqa: E402
+from attackdiff.asset import Asset  # noqa: E402
+from attackdiff.storage import SnapshotStorage  # noqa: E402
+
+
+def measure(assets: dict, snapshot_format: str, compression: str | None) -> dict:
+    tmp = Path(tempfile.mkdtemp(prefix="attackdiff-bench-"))
+
+    try:
+        storage = SnapshotStorage(tmp, snapshot_format=snapshot_format, compression=compression)
+
+        start = time.perf_counter()
+        path = storage.save_snapshot(assets)
+        save_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        storage.load_meta(path)
+        meta_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        loaded = storage.load_snapshot(path)
+        load_s = time.perf_counter() - start
+
+        assert len(loaded) == len(assets)
+
+        return {
+            "size": path.stat().st_size,
+            "save_s": save_s,
+            "meta_s": meta_s,
+            "load_s": load_s,
+        }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--assets", type=int, default=100_000)
+    parser.add_argument("--codecs", nargs="+", default=["gzip", "lzma", "bz2"])
+    args = parser.parse_args()
+
+    assets = {aid: Asset.from_dict(data) for aid, data in make_raw(args.assets).items()}
+
+    cases = [("json", None), ("jsonl", None), ("binary", None)]
+    cases += [(fmt, codec) for fmt in ("json", "jsonl") for codec in args.codecs]
+
+    print(f"{args.assets} assets (Python {sys.version.split()[0]})")
+    print(f"{'format':<14} {'size':>10} {'ratio':>7} {'save':>8} {'load_meta':>10} {'load':>8}")
+
+    baseline = None
+    for snapshot_format, compression in cases:
+        r = measure(assets, snapshot_format, compression)
+        baseline = baseline or r["size"]
+        name = snapshot_format + (f"+{compression}" if compression else "")
+
+        print(
+            f"{name:<14} {r['size'] / 1e6:>8.1f}MB {baseline / r['size']:>6.1f}x "
+            f"{r['save_s']:>7.2f}s {r['meta_s']:>9.4f}s {r['load_s']:>7.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
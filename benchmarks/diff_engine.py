@@ -0,0 +1,110 @@
+"""
+Compare the bulk diff engine (attackdiff.diff.diff_assets) with the previous
+per-asset loop, and check that both produce the same result.
+
+    python benchmarks/diff_engine.py [--assets 200000] [--churn 0.01]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from attackdiff import bulk_diff  # noqa: E402
+from attackdiff.asset import Asset  # noqa: E402
+from attackdiff.diff import diff_assets  # noqa: E402
+
+
+def reference_changed_assets(old_assets, new_assets):
+    """The per-asset loop diff_assets used before the bulk engine."""
+    changed_assets = []
+
+    for aid in set(old_assets) & set(new_assets):
+        old = old_assets[aid]
+        new = new_assets[aid]
+
+        old_ports = set(old.ports)
+        new_ports = set(new.ports)
+
+        ports_added = sorted(new_ports - old_ports)
+        ports_removed = sorted(old_ports - new_ports)
+
+        old_services = set(old.services)
+        new_services = set(new.services)
+
+        services_added = sorted(new_services - old_services)
+        services_removed = sorted(old_services - new_services)
+
+        if ports_added or ports_removed or services_added or services_removed:
+            changed_assets.append({
+                "host": new.host,
+                "ports_added": ports_added,
+                "ports_removed": ports_removed,
+                "services_added": services_added,
+                "services_removed": services_removed
+            })
+
+    return changed_assets
+
+
+SERVICES = ["http", "https", "ssh", "smtp", "domain", "ms-wbt-server", "mysql", "rdp"]
+PORTS = [22, 25, 53, 80, 443, 3306, 3389, 8080, 8443]
+
+
+def make_pair(count: int, churn: float, seed: int = 1):
+    rng = random.Random(seed)
+    old, new = {}, {}
+
+    for i in range(count):
+        host = f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"
+        n = rng.randint(1, 4)
+        ports = sorted(rng.sample(PORTS, n))
+        services = rng.sample(SERVICES, n)
+        old[host] = Asset.from_dict({
+            "host": host, "ip": host, "ports": ports, "services": services,
+            "sources": ["nmap"], "first_seen": "x", "last_seen": "x",
+        })
+
+        if rng.random() < churn:
+            ports = sorted(set(ports) ^ {rng.choice(PORTS), rng.randint(1, 65535)})
+            services = services[1:] + [rng.choice(SERVICES)]
+        elif rng.random() < 0.05:
+            # same sets, different order: must not count as a change
+            ports = list(reversed(ports))
+        new[host] = Asset.from_dict({
+            "host": host, "ip": host, "ports": ports, "services": services,
+            "sources": ["nmap"], "first_seen": "y", "last_seen": "y",
+        })
+
+    return old, new
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--assets", type=int, default=200_000)
+    parser.add_argument("--churn", type=float, default=0.01)
+    args = parser.parse_args()
+
+    old, new = make_pair(args.assets, args.churn)
+
+    start = time.perf_counter()
+    expected = reference_changed_assets(old, new)
+    reference_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = diff_assets(old, new)["changed_assets"]
+    bulk_s = time.perf_counter() - start
+
+    key = lambda r: r["host"]  # noqa: E731
+    assert sorted(result, key=key) == sorted(expected, key=key), "bulk diff differs from reference"
+
+    numpy = "numpy" if bulk_diff._load_numpy() else "pure python"
+    print(f"{args.assets} assets, {len(expected)} changed ({numpy})")
+    print(f"reference loop  {reference_s:.3f}s")
+    print(f"bulk engine     {bulk_s:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
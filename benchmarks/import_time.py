@@ -0,0 +1,148 @@
+"""
+CLI startup budget: time and modules imported by light commands.
+
+    python benchmarks/import_time.py [--budget-ms 100] [--repeat 11]
+
+Runs each command below in a fresh interpreter, in a temporary store with a
+few small snapshots, and compares its median wall time with that of a bare
+`python -c pass`. A command fails the check when the difference is above
+--budget-ms, or when it imported one of the FORBIDDEN modules (scanners, numpy,
+asyncio, sqlite3, compression codecs...): those belong to the commands that
+use them and should only be imported in their branch of main.run(). Commands
+that read no snapshot must not import the SNAPSHOT_MODULES either.
+Exits with 1 if any command fails.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from attackdiff.asset import Asset  # noqa: E402
+from attackdiff.storage import SnapshotStorage  # noqa: E402
+
+COMMANDS = [
+    ["list", "--short"],
+    ["list"],
+    ["prune", "--keep-last", "10", "--dry-run"],
+    ["config"],
+    ["diff", "--last", "--no-cache"],
+]
+
+# (bz2 and lzma are not listed: argparse imports them through shutil)
+FORBIDDEN = (
+    "asyncio",
+    "numpy",
+    "concurrent.futures",
+    "sqlite3",
+    "xml.etree",
+    "gzip",
+    "attackdiff.scanners",
+    "attackdiff.adaptive",
+    "attackdiff.daemon",
+    "attackdiff.sqlite_storage",
+    "attackdiff.timeline",
+    "attackdiff.doctor",
+)
+
+# snapshot formats, diff cache, history index: only for commands reading snapshots
+SNAPSHOT_MODULES = (
+    "attackdiff.jsonl",
+    "attackdiff.binary",
+    "attackdiff.delta",
+    "attackdiff.diff_cache",
+    "attackdiff.history",
+)
+READS_SNAPSHOTS = {"diff"}
+
+# runs a command, then writes the modules it imported to argv[1]
+DRIVER = """
+import sys
+from attackdiff.main import main
+try:
+    main(sys.argv[2:])
+except SystemExit:
+    pass
+with open(sys.argv[1], "w") as f:
+    f.write("\\n".join(sys.modules))
+"""
+
+
+def make_store(base: Path) -> None:
+    storage = SnapshotStorage(base / "data" / "scans")
+
+    for round_ in range(3):
+        assets = {}
+        for number in range(200):
+            host = f"10.0.{number // 256}.{number % 256}"
+            asset = Asset(host=host, ports=[22, 443 + (number + round_) % 3], services=["ssh", "https"])
+            assets[asset.id] = asset
+        storage.save_snapshot(assets, tag="baseline" if round_ == 0 else None, scanner="nmap")
+
+    storage.close()
+
+
+def wall_time(cmd: list, cwd: Path, env: dict) -> float:
+    start = time.perf_counter()
+    subprocess.run(cmd, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    return time.perf_counter() - start
+
+
+def median_time(cmd: list, cwd: Path, env: dict, repeat: int) -> float:
+    wall_time(cmd, cwd, env)  # warm up (bytecode caches, page cache)
+    return statistics.median(wall_time(cmd, cwd, env) for _ in range(repeat))
+
+
+def forbidden_imports(command: list, modules: list) -> list:
+    forbidden = FORBIDDEN if command[0] in READS_SNAPSHOTS else FORBIDDEN + SNAPSHOT_MODULES
+    return [
+        f for f in forbidden
+        if any(m == f or m.startswith(f + ".") for m in modules)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=100.0,
+                        help="Allowed startup over a bare interpreter, per command (default: 100)")
+    parser.add_argument("--repeat", type=int, default=11)
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    failures = 0
+
+    with tempfile.TemporaryDirectory(prefix="attackdiff-import-") as tmp:
+        tmp = Path(tmp)
+        make_store(tmp)
+        modules_path = tmp / "modules.txt"
+
+        bare = median_time([sys.executable, "-c", "pass"], tmp, env, args.repeat)
+        print(f"bare interpreter: {bare * 1000:.1f} ms\n")
+        print(f"{'command':<36} {'ms':>7} {'over':>7}  forbidden imports")
+
+        for command in COMMANDS:
+            cmd = [sys.executable, "-c", DRIVER, str(modules_path)] + command
+            elapsed = median_time(cmd, tmp, env, args.repeat)
+            over = (elapsed - bare) * 1000
+
+            modules = modules_path.read_text().split("\n")
+            forbidden = forbidden_imports(command, modules)
+
+            failed = over > args.budget_ms or forbidden
+            failures += bool(failed)
+
+            flag = "  <-- over budget" if over > args.budget_ms else ""
+            print(f"{' '.join(command):<36} {elapsed * 1000:>7.1f} {over:>7.1f}  {', '.join(forbidden) or '-'}{flag}")
+
+    print(f"\n{failures} command(s) failed the {args.budget_ms:.0f} ms budget / import check")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
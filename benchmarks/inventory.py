@@ -0,0 +1,97 @@
+"""
+Compare the journaled AssetStorage with the previous full-file rewrite on
+a stream of small inventory updates, and check that a reload gives the same
+inventory.
+
+    python benchmarks/inventory.py [--assets 100000] [--updates 20] [--batch 50]
+
+Each update upserts --batch assets of an inventory of --assets and then
+saves, as a scanner feeding the inventory continuously would.
+"""
+import argparse
+import json
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from attackdiff.asset import Asset  # noqa: E402
+from attackdiff.storage import AssetStorage  # noqa: E402
+
+
+def make_asset(number: int, rng: random.Random) -> Asset:
+    host = f"10.{(number >> 16) & 255}.{(number >> 8) & 255}.{number & 255}"
+    ports = sorted(rng.sample([22, 80, 443, 3389, 8080, 8443], rng.randint(1, 3)))
+    return Asset(host=host, ports=ports, services=[f"s{p}" for p in ports], sources=["nmap"])
+
+
+def rewrite_save(path: Path, assets: dict) -> None:
+    """AssetStorage.save before the journal: the whole inventory every time."""
+    with open(path, "w") as f:
+        json.dump({aid: asset.to_dict() for aid, asset in assets.items()}, f, indent=2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--assets", type=int, default=100_000)
+    parser.add_argument("--updates", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    base = {a.id: a for a in (make_asset(n, rng) for n in range(args.assets))}
+    updates = [
+        [make_asset(rng.randrange(args.assets), rng) for _ in range(args.batch)]
+        for _ in range(args.updates)
+    ]
+
+    tmp = Path(tempfile.mkdtemp(prefix="attackdiff-inventory-"))
+
+    try:
+        # ---- previous behaviour: upsert, then rewrite the file ----
+        assets = dict(base)
+        start = time.perf_counter()
+        for batch in updates:
+            for asset in batch:
+                assets[asset.id] = asset
+            rewrite_save(tmp / "rewrite.json", assets)
+        rewrite_s = time.perf_counter() - start
+
+        # ---- journal ----
+        rewrite_save(tmp / "journal.json", base)
+        storage = AssetStorage(tmp / "journal.json")
+        storage.load()
+
+        start = time.perf_counter()
+        for batch in updates:
+            storage.upsert_many(batch)
+            storage.save()
+        journal_s = time.perf_counter() - start
+        storage.close()
+
+        expected = {aid: asset.to_dict() for aid, asset in storage.assets.items()}
+        reloaded = AssetStorage(tmp / "journal.json")
+        start = time.perf_counter()
+        reloaded.load()
+        load_s = time.perf_counter() - start
+
+        same = {aid: asset.to_dict() for aid, asset in reloaded.assets.items()} == expected
+
+        print(f"{args.updates} updates of {args.batch} assets, inventory of {args.assets}")
+        print(f"  full rewrite  {rewrite_s:8.2f} s  {rewrite_s / args.updates * 1000:8.2f} ms/update")
+        print(f"  journal       {journal_s:8.2f} s  {journal_s / args.updates * 1000:8.2f} ms/update")
+        print(f"  reload (checkpoint + {reloaded._journal_records} journal records) {load_s:.2f} s, "
+              f"same inventory: {same}")
+
+        sys.exit(0 if same else 1)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
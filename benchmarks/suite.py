@@ -0,0 +1,346 @@
+"""
+Storage / diff / prune benchmark suite on synthetic snapshot histories.
+
+    python benchmarks/suite.py [--assets 1000 10000 100000] [--snapshots 10]
+                               [--stores json jsonl binary sqlite] [--output results.json]
+    python benchmarks/suite.py --compare base.json head.json [--threshold 0.15]
+
+For every store kind and asset count, a history generated by
+synthetic.SyntheticHistory (deterministic for a given seed) is saved into a
+temporary store, then each operation is timed (best of --repeat runs) and,
+unless --no-memory, run once more under tracemalloc for its peak Python heap
+(memory-mapped binary snapshots are not counted):
+
+    save        save_snapshot, mean per snapshot (memory: the last one)
+    load        load_snapshot of the latest snapshot
+    list        list_snapshots_with_meta (index up to date)
+    list_cold   the same with the index rebuilt from the snapshots
+    tag_lookup  find_snapshot_by_tag of the oldest tag
+    diff        load the last two snapshots and diff_assets them
+    diff_only   diff_assets of the two loaded snapshots
+    diff_filtered  diff of the assets in FILTER_CIDR only (load_slice with an
+                AssetFilter, as diff --cidr)
+    prune       prune(keep_last=snapshots // 2) on a copy of the store
+
+Operations other than save and prune use a new storage instance per run, as
+a CLI invocation would. Results are written as JSON; --compare reports the
+operations that got slower (or use more memory) by more than --threshold
+and exits with 1 if there are any.
+
+For every asset count, the bulk diff engine is also timed against the
+per-asset loop it replaced (diff_engine.py) at 1% and 50% churn: the suite
+exits with 1 if the engine is slower by more than --threshold.
+"""
+import argparse
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from diff_engine import make_pair, reference_changed_assets  # noqa: E402
+from synthetic import PORT_PROFILES, SyntheticHistory  # noqa: E402
+from attackdiff import bulk_diff  # noqa: E402
+from attackdiff.diff import diff_assets  # noqa: E402
+from attackdiff.filters import AssetFilter  # noqa: E402
+from attackdiff.sqlite_storage import SqliteSnapshotStorage  # noqa: E402
+from attackdiff.storage import SnapshotStorage  # noqa: E402
+
+STORES = ("json", "jsonl", "binary", "sqlite")
+
+# slice of diff_filtered: the first 256 synthetic addresses
+FILTER_CIDR = "10.0.0.0/24"
+
+# below this, time differences are noise
+NOISE_FLOOR_S = 0.002
+
+# share of changed hosts in the diff engine check
+ENGINE_CHURN = (0.01, 0.5)
+
+
+def open_store(kind: str, path: Path) -> SnapshotStorage:
+    if kind == "sqlite":
+        return SqliteSnapshotStorage(path)
+    return SnapshotStorage(path, snapshot_format=kind)
+
+
+def measure(run: Callable, repeat: int, memory: bool, setup: Callable | None = None) -> dict:
+    """Best time of `repeat` runs, then the peak heap of one more (setup is not measured)."""
+    times = []
+
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        run(arg)
+        times.append(time.perf_counter() - start)
+
+    result = {"seconds": min(times), "runs": [round(t, 6) for t in times]}
+
+    if memory:
+        arg = setup() if setup else None
+        tracemalloc.start()
+        try:
+            run(arg)
+            result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return result
+
+
+def bench_store(kind: str, history: SyntheticHistory, repeat: int, memory: bool) -> Dict[str, dict]:
+    tmp = Path(tempfile.mkdtemp(prefix="attackdiff-suite-"))
+    results = {}
+
+    try:
+        base = tmp / "store"
+
+        # ---- save: the whole history, mean per snapshot ----
+        storage = open_store(kind, base)
+        tags = []
+        start = time.perf_counter()
+        for tag, assets in history:
+            storage.save_snapshot(assets, tag=tag, scanner="nmap")
+            tags.append(tag)
+        elapsed = time.perf_counter() - start
+        storage.close()
+
+        results["save"] = {"seconds": elapsed / history.snapshots, "snapshots": history.snapshots}
+
+        if memory:
+            scratch = open_store(kind, tmp / "scratch")
+            tracemalloc.start()
+            try:
+                scratch.save_snapshot(assets, tag=tag, scanner="nmap")
+                results["save"]["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+                scratch.close()
+
+        def fresh(_=None) -> SnapshotStorage:
+            return open_store(kind, base)
+
+        def load(_):
+            storage = fresh()
+            storage.load_snapshot(storage.get_latest_snapshot())
+
+        def list_snapshots(_):
+            fresh().list_snapshots_with_meta()
+
+        def list_cold(_):
+            storage = fresh()
+            storage.index.path.unlink(missing_ok=True)
+            storage.list_snapshots_with_meta()
+            storage.index.save()
+
+        tag = next((t for t in tags if t), None)
+
+        def tag_lookup(_):
+            fresh().find_snapshot_by_tag(tag)
+
+        def diff(_):
+            old, new = fresh().load_last_two_snapshots()
+            diff_assets(old, new)
+
+        results["load"] = measure(load, repeat, memory)
+        results["list"] = measure(list_snapshots, repeat, memory)
+        results["list_cold"] = measure(list_cold, repeat, memory)
+        if tag:
+            results["tag_lookup"] = measure(tag_lookup, repeat, memory)
+        results["diff"] = measure(diff, repeat, memory)
+
+        old, new = fresh().load_last_two_snapshots()
+        results["diff_only"] = measure(lambda _: diff_assets(old, new), repeat, memory)
+        del old, new
+
+        where = AssetFilter(cidrs=[FILTER_CIDR])
+
+        def diff_filtered(_):
+            storage = fresh()
+            old_path, new_path = storage.list_snapshots()[-2:]
+            diff_assets(*storage.load_slice(old_path, new_path, where))
+
+        results["diff_filtered"] = measure(diff_filtered, repeat, memory)
+
+        # ---- prune: each run on its own copy ----
+        copies = iter(range(repeat + 1))
+
+        def copy_store() -> SnapshotStorage:
+            target = tmp / f"prune-{next(copies)}"
+            shutil.copytree(base, target)
+            return open_store(kind, target)
+
+        def prune(storage):
+            storage.prune(keep_last=history.snapshots // 2)
+            storage.close()
+
+        results["prune"] = measure(prune, repeat, memory, setup=copy_store)
+
+        return results
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def bench_diff_engine(count: int, repeat: int, threshold: float) -> Dict[str, dict]:
+    """
+    bulk_diff.changed_assets against the per-asset loop it replaced, per
+    ENGINE_CHURN; "slower" when the engine lost by more than threshold.
+    """
+    results = {}
+
+    for churn in ENGINE_CHURN:
+        old, new = make_pair(count, churn)
+        common = set(old) & set(new)
+
+        engine = measure(lambda _: bulk_diff.changed_assets(old, new, common), repeat, False)
+        baseline = measure(lambda _: reference_changed_assets(old, new), repeat, False)
+
+        lost = engine["seconds"] - baseline["seconds"]
+        engine["baseline_seconds"] = baseline["seconds"]
+        engine["slower"] = lost > baseline["seconds"] * threshold and lost > NOISE_FLOOR_S
+        results[f"churn_{churn:g}"] = engine
+
+    return results
+
+
+def git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run(args) -> dict:
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "options": {
+                k: v for k, v in vars(args).items()
+                if k not in ("compare", "output", "threshold")
+            },
+        },
+        "results": {},
+    }
+
+    print(f"{'case':<28} {'seconds':>10} {'peak MB':>9}")
+
+    for count in args.assets:
+        history = SyntheticHistory(
+            assets=count,
+            snapshots=args.snapshots,
+            churn=args.churn,
+            host_churn=args.host_churn,
+            ports_mean=args.ports_mean,
+            profile=args.profile,
+            tags=args.tags,
+            seed=args.seed
+        )
+
+        for kind in args.stores:
+            for op, result in bench_store(kind, history, args.repeat, not args.no_memory).items():
+                key = f"{kind}/{count}/{op}"
+                report["results"][key] = result
+
+                peak = result.get("peak_bytes")
+                peak = f"{peak / 1e6:9.1f}" if peak is not None else f"{'-':>9}"
+                print(f"{key:<28} {result['seconds']:>10.4f} {peak}", flush=True)
+
+        for case, result in bench_diff_engine(count, args.repeat, args.threshold).items():
+            key = f"diff_engine/{count}/{case}"
+            report["results"][key] = result
+
+            flag = "  <-- slower than the per-asset loop" if result["slower"] else ""
+            print(
+                f"{key:<28} {result['seconds']:>10.4f} {'-':>9}  "
+                f"(per-asset loop {result['baseline_seconds']:.4f}){flag}",
+                flush=True
+            )
+
+    return report
+
+
+def compare(base_path: str, head_path: str, threshold: float) -> int:
+    with open(base_path) as f:
+        base = json.load(f)["results"]
+    with open(head_path) as f:
+        head = json.load(f)["results"]
+
+    regressions = 0
+    print(f"{'case':<28} {'base s':>9} {'head s':>9} {'time':>7} {'memory':>7}")
+
+    for key in sorted(base.keys() & head.keys()):
+        old, new = base[key], head[key]
+        time_ratio = new["seconds"] / old["seconds"] if old["seconds"] else 1.0
+
+        mem_ratio = None
+        if old.get("peak_bytes") and new.get("peak_bytes") is not None:
+            mem_ratio = new["peak_bytes"] / old["peak_bytes"]
+
+        slower = time_ratio > 1 + threshold and new["seconds"] - old["seconds"] > NOISE_FLOOR_S
+        bigger = mem_ratio is not None and mem_ratio > 1 + threshold
+        flag = "  <-- regression" if slower or bigger else ""
+        regressions += bool(flag)
+
+        mem = f"{mem_ratio:>6.2f}x" if mem_ratio is not None else f"{'-':>7}"
+        print(f"{key:<28} {old['seconds']:>9.4f} {new['seconds']:>9.4f} {time_ratio:>6.2f}x {mem}{flag}")
+
+    for key in sorted(base.keys() ^ head.keys()):
+        print(f"{key:<28} only in {'base' if key in base else 'head'}")
+
+    print(f"\n{regressions} regression(s) above {threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--assets", type=int, nargs="+", default=[1000, 10_000, 100_000])
+    parser.add_argument("--snapshots", type=int, default=10)
+    parser.add_argument("--churn", type=float, default=0.01, help="Hosts whose ports change per snapshot")
+    parser.add_argument("--host-churn", type=float, default=0.002, help="Hosts replaced per snapshot")
+    parser.add_argument("--ports-mean", type=float, default=3.0, help="Mean open ports per host")
+    parser.add_argument("--profile", choices=sorted(PORT_PROFILES), default="mixed")
+    parser.add_argument("--tags", default="none:0.7,daily:0.2,baseline:0.1", help="Weighted tag mix")
+    parser.add_argument("--stores", nargs="+", choices=STORES, default=["json", "jsonl", "binary"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc runs")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "HEAD"))
+    parser.add_argument("--threshold", type=float, default=0.15)
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(*args.compare, args.threshold))
+
+    if args.snapshots < 2:
+        parser.error("--snapshots must be >= 2")
+
+    report = run(args)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    slower = [key for key, result in report["results"].items() if result.get("slower")]
+    if slower:
+        print(f"[!] Bulk diff engine slower than the per-asset loop: {', '.join(slower)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Deterministic synthetic snapshot histories for the benchmarks.
+
+    history = SyntheticHistory(assets=100_000, snapshots=10, churn=0.01)
+    for tag, assets in history:
+        storage.save_snapshot(assets, tag=tag, scanner="nmap")
+
+The same arguments (and seed) always produce the same snapshots. Each host
+gets 1 + a geometric number of open ports drawn from a weighted port profile
+(plus a tail of random high ports), and between two snapshots:
+
+    churn       fraction of hosts whose ports change (one port opened or closed)
+    host_churn  fraction of hosts replaced by new ones (removed + added)
+
+Tags are drawn from a weighted mix, e.g. "none:0.7,daily:0.2,baseline:0.1".
+Hosts that did not change keep the same Asset object from one snapshot to
+the next, as carried-forward assets do.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Tuple
+
+from attackdiff.asset import Asset
+
+
+# (port, service, weight)
+PORT_PROFILES = {
+    "web": [
+        (443, "https", 40), (80, "http", 35), (8443, "https-alt", 8),
+        (8080, "http-proxy", 8), (22, "ssh", 6), (8000, "http-alt", 3),
+    ],
+    "enterprise": [
+        (445, "microsoft-ds", 20), (135, "msrpc", 15), (3389, "ms-wbt-server", 15),
+        (443, "https", 15), (22, "ssh", 10), (80, "http", 10), (1433, "ms-sql-s", 5),
+        (389, "ldap", 5), (25, "smtp", 3), (53, "domain", 2),
+    ],
+    "mixed": [
+        (443, "https", 25), (80, "http", 22), (22, "ssh", 15), (3389, "ms-wbt-server", 6),
+        (445, "microsoft-ds", 5), (8080, "http-proxy", 5), (8443, "https-alt", 4),
+        (25, "smtp", 4), (53, "domain", 4), (3306, "mysql", 3), (5432, "postgresql", 2),
+        (21, "ftp", 2), (6379, "redis", 1), (9200, "wap-wsp", 1), (27017, "mongod", 1),
+    ],
+}
+
+# share of ports drawn uniformly from the high range instead of the profile
+TAIL_SHARE = 0.05
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def parse_tag_mix(text: str) -> List[Tuple[str | None, float]]:
+    """ "none:0.7,daily:0.3" -> [(None, 0.7), ("daily", 0.3)] """
+    mix = []
+
+    for part in text.split(","):
+        name, _, weight = part.strip().partition(":")
+        mix.append((None if name in ("", "none") else name, float(weight or 1)))
+
+    return mix
+
+
+def ip_of(number: int) -> str:
+    return f"10.{(number >> 16) & 255}.{(number >> 8) & 255}.{number & 255}"
+
+
+class SyntheticHistory:
+    def __init__(
+        self,
+        assets: int,
+        snapshots: int,
+        churn: float = 0.01,
+        host_churn: float = 0.002,
+        ports_mean: float = 3.0,
+        profile: str = "mixed",
+        tags: str = "none:0.7,daily:0.2,baseline:0.1",
+        seed: int = 1
+    ):
+        if assets > 1 << 24:
+            raise ValueError("at most 16M assets (10.0.0.0/8)")
+        if profile not in PORT_PROFILES:
+            raise ValueError(f"Unknown port profile: {profile}")
+
+        self.assets = assets
+        self.snapshots = snapshots
+        self.churn = churn
+        self.host_churn = host_churn
+        self.ports_mean = ports_mean
+        self.profile = profile
+        self.tag_mix = parse_tag_mix(tags)
+        self.seed = seed
+
+        table = PORT_PROFILES[profile]
+        self._ports = [p for p, _, _ in table]
+        self._weights = [w for _, _, w in table]
+        self._service = {p: s for p, s, _ in table}
+
+    def _port(self, rng: random.Random) -> int:
+        if rng.random() < TAIL_SHARE:
+            return rng.randint(1024, 65535)
+        return rng.choices(self._ports, self._weights)[0]
+
+    def _port_count(self, rng: random.Random) -> int:
+        # 1 + geometric with mean ports_mean - 1, capped
+        p = 1 / max(self.ports_mean, 1.0)
+        count = 1
+        while count < 30 and rng.random() > p:
+            count += 1
+        return count
+
+    def _asset(self, host: str, ports, timestamp: str, first_seen: str) -> Asset:
+        ports = sorted(ports)
+        return Asset.restore(
+            host, host, ports,
+            [self._service.get(p, "unknown") for p in ports],
+            ("nmap",), first_seen, timestamp
+        )
+
+    def __iter__(self) -> Iterator[Tuple[str | None, Dict[str, Asset]]]:
+        rng = random.Random(self.seed)
+        tags = [t for t, _ in self.tag_mix]
+        tag_weights = [w for _, w in self.tag_mix]
+
+        timestamp = START.isoformat()
+        current: Dict[str, Asset] = {}
+
+        for number in range(self.assets):
+            host = ip_of(number)
+            ports = {self._port(rng) for _ in range(self._port_count(rng))}
+            current[host] = self._asset(host, ports, timestamp, timestamp)
+
+        next_number = self.assets
+
+        for index in range(self.snapshots):
+            if index:
+                timestamp = (START + timedelta(days=index)).isoformat()
+                current = dict(current)
+                hosts = list(current)
+
+                for host in rng.sample(hosts, int(len(hosts) * self.churn)):
+                    old = current[host]
+                    ports = set(old.ports)
+                    if len(ports) > 1 and rng.random() < 0.5:
+                        ports.discard(rng.choice(old.ports))
+                    else:
+                        ports.add(self._port(rng))
+                    current[host] = self._asset(host, ports, timestamp, old.first_seen)
+
+                replaced = int(len(hosts) * self.host_churn)
+                for host in rng.sample(hosts, replaced):
+                    del current[host]
+                for _ in range(replaced):
+                    host = ip_of(next_number % (1 << 24))
+                    next_number += 1
+                    ports = {self._port(rng) for _ in range(self._port_count(rng))}
+                    current[host] = self._asset(host, ports, timestamp, timestamp)
+
+            yield rng.choices(tags, tag_weights)[0], current
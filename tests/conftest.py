@@ -0,0 +1,12 @@
+import pytest
+
+from attackdiff.storage import SnapshotStorage
+
+
+@pytest.fixture
+def make_storage(tmp_path):
+    """SnapshotStorage factory; the stores of a test share one fresh directory."""
+    def make(**options):
+        return SnapshotStorage(tmp_path / "scans", **options)
+
+    return make
@@ -0,0 +1,124 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from attackdiff.adaptive import AdaptiveScan
+from attackdiff.asset import Asset
+from attackdiff.scanners.nmap import NmapScanner
+
+
+TARGETS = ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+
+
+class FakeNmap(NmapScanner):
+    """NmapScanner answering from a dict of up hosts instead of running nmap."""
+
+    def __init__(self, up):
+        super().__init__()
+        self.up = up
+        self.scanned = []
+
+    def scan(self, targets):
+        self.scanned += targets
+        return {
+            host: Asset(host=host, ports=self.up[host], sources=["nmap"])
+            for host in targets if host in self.up
+        }
+
+
+def adaptive_scan(storage, up):
+    nmap = FakeNmap(up)
+    adaptive = AdaptiveScan(storage, nmap)
+    assets = adaptive.scan(TARGETS)
+    storage.save_snapshot(assets, scanner="nmap")
+    adaptive.save_state()
+    return adaptive, nmap, assets
+
+
+def test_carry_forward_skips_other_scanners_snapshots(make_storage):
+    storage = make_storage()
+    up = {"10.0.0.1": [22], "10.0.0.2": [80, 443], "10.0.0.3": [3389]}
+
+    _, nmap, _ = adaptive_scan(storage, up)
+    assert sorted(nmap.scanned) == TARGETS
+
+    sub = Asset(host="www.example.com", ports=[80, 443], sources=["subfinder"])
+    storage.save_snapshot({sub.id: sub}, scanner="subfinder")
+
+    adaptive, nmap, assets = adaptive_scan(storage, up)
+
+    assert nmap.scanned == []
+    assert sorted(adaptive.plan["carry"]) == TARGETS
+    assert sorted(assets) == TARGETS
+    assert assets["10.0.0.2"].ports == (80, 443)
+
+
+def test_down_host_is_not_rescanned(make_storage):
+    storage = make_storage()
+    adaptive_scan(storage, {"10.0.0.1": [22]})
+
+    adaptive, nmap, assets = adaptive_scan(storage, {"10.0.0.1": [22]})
+
+    assert nmap.scanned == []
+    assert adaptive.plan == {"deep": [], "quick": [], "carry": ["10.0.0.1"]}
+    assert list(assets) == ["10.0.0.1"]
+
+
+def test_host_without_previous_data_is_deep_scanned(make_storage):
+    storage = make_storage()
+    adaptive = AdaptiveScan(storage, FakeNmap({}))
+    now = datetime.now(timezone.utc)
+    adaptive.last_deep = {host: (now - timedelta(hours=1)).isoformat() for host in TARGETS}
+
+    # no nmap snapshot at all
+    assert adaptive.make_plan(TARGETS, {}, now, None)["deep"] == TARGETS
+
+    # an nmap snapshot older than the last deep scans
+    plan = adaptive.make_plan(TARGETS, {}, now, now - timedelta(days=1))
+    assert plan["deep"] == TARGETS
+    assert adaptive.reasons["new"] == 3
+
+
+def test_stale_host_is_quick_checked_on_delta_store(make_storage, monkeypatch):
+    storage = make_storage(keyframe_interval=5)
+    up = {"10.0.0.1": [22], "10.0.0.2": [80, 443], "10.0.0.3": [3389]}
+    adaptive_scan(storage, up)
+
+    # carried runs: delta snapshots restamp every last_seen
+    for _ in range(2):
+        adaptive, nmap, _ = adaptive_scan(storage, up)
+        assert nmap.scanned == []
+    with open(storage.list_snapshots()[-1]) as f:
+        assert "delta" in json.load(f)
+
+    # 10.0.0.2 last checked two days ago, deep scanned within --deep-every
+    old = (datetime.now(timezone.utc) - timedelta(days=2)).isoformat()
+    adaptive.last_deep["10.0.0.2"] = adaptive.last_checked["10.0.0.2"] = old
+    adaptive.save_state()
+
+    quick = []
+
+    class QuickNmap(FakeNmap):
+        def __init__(self, **options):
+            super().__init__(up)
+            quick.append(self)
+
+    monkeypatch.setattr("attackdiff.adaptive.NmapScanner", QuickNmap)
+    adaptive, nmap, assets = adaptive_scan(storage, up)
+
+    assert adaptive.plan["quick"] == ["10.0.0.2"]
+    assert quick[0].scanned == ["10.0.0.2"] and nmap.scanned == []
+    assert assets["10.0.0.2"].ports == (80, 443)
+    assert adaptive.last_checked["10.0.0.2"] > old
+    assert adaptive.last_deep["10.0.0.2"] == old
+
+
+def test_deep_scan_times_only_state_is_read(make_storage):
+    storage = make_storage()
+    stamp = datetime.now(timezone.utc).isoformat()
+    state = storage.base_path / ".meta" / "adaptive.json"
+    state.parent.mkdir(parents=True, exist_ok=True)
+    state.write_text(f'{{"10.0.0.1": "{stamp}"}}')
+
+    adaptive = AdaptiveScan(storage, FakeNmap({}))
+
+    assert adaptive.last_deep == adaptive.last_checked == {"10.0.0.1": stamp}
@@ -0,0 +1,61 @@
+from attackdiff import binary
+from attackdiff.asset import Asset
+
+
+def make_assets():
+    assets = [
+        Asset(host="10.0.0.1", ip="10.0.0.1", ports=[22, 443], services=["ssh", "https"], sources=["nmap"]),
+        Asset(host="www.example.com", ports=[80, 443], services=["http"], sources=["subfinder"]),
+        Asset(host="10.0.0.2", ip="10.0.0.2", sources=["nmap"]),
+    ]
+    return {asset.id: asset for asset in assets}
+
+
+def as_dicts(assets):
+    return {aid: asset.to_dict() for aid, asset in assets.items()}
+
+
+def test_round_trip(make_storage):
+    storage = make_storage(snapshot_format="binary")
+    assets = make_assets()
+
+    path = storage.save_snapshot(assets, tag="baseline", scanner="nmap")
+
+    assert path.suffix == binary.SUFFIX
+    assert as_dicts(storage.load_snapshot(path)) == as_dicts(assets)
+    assert storage.load_meta(path)["tag"] == "baseline"
+
+
+def test_find(make_storage):
+    storage = make_storage(snapshot_format="binary")
+    assets = make_assets()
+    path = storage.save_snapshot(assets)
+
+    with binary.BinarySnapshot(path) as snap:
+        assert len(snap) == 3
+        assert snap.find("www.example.com") == assets["www.example.com"].to_dict()
+        assert snap.find("10.0.0.9") is None
+
+
+def test_convert_from_json(make_storage):
+    storage = make_storage()
+    assets = make_assets()
+    path = storage.save_snapshot(assets, tag="baseline")
+
+    converted = storage.convert_snapshot(path, "binary")
+
+    assert converted.suffix == binary.SUFFIX
+    assert not path.exists()
+    assert storage.list_snapshots() == [converted]
+    assert as_dicts(storage.load_snapshot(converted)) == as_dicts(assets)
+    assert storage.convert_snapshot(converted, "binary") is None
+
+
+def test_unnamed_service(make_storage):
+    # nmap writes <service> without a name for some ports
+    storage = make_storage(snapshot_format="binary")
+    asset = Asset(host="10.0.0.1", ip="10.0.0.1", ports=[22, 8000], services=["ssh", None], sources=["nmap"])
+    path = storage.save_snapshot({asset.id: asset})
+
+    assert storage.load_snapshot(path)["10.0.0.1"].to_dict() == asset.to_dict()
+    assert binary.read_assets(path)["10.0.0.1"]["services"] == ["ssh", None]
@@ -0,0 +1,21 @@
+import pytest
+
+from attackdiff import bulk_diff
+from benchmarks.diff_engine import make_pair, reference_changed_assets
+
+
+def by_host(records):
+    return sorted(records, key=lambda r: r["host"])
+
+
+@pytest.mark.parametrize("churn", [0.0, 0.01, 0.5])
+@pytest.mark.parametrize("fallback", [0.0, bulk_diff.FALLBACK_CHURN, 1.0])
+def test_changed_assets_match_per_asset_loop(monkeypatch, churn, fallback):
+    monkeypatch.setattr(bulk_diff, "FALLBACK_CHURN", fallback)
+    old, new = make_pair(5000, churn)
+    ids = sorted(set(old) & set(new))
+
+    changed = bulk_diff.changed_assets(old, new, ids)
+
+    assert by_host(changed) == by_host(reference_changed_assets(old, new))
+    assert [r["host"] for r in changed] == sorted(r["host"] for r in changed)  # order of ids
@@ -0,0 +1,83 @@
+from attackdiff.asset import Asset
+from attackdiff.scanners.combined import CombinedScan, is_host_name
+from attackdiff.scanners.nmap import NmapScanner
+from attackdiff.scanners.subfinder_scanner import SubfinderScanner
+
+
+class FakeNmap(NmapScanner):
+    def __init__(self):
+        super().__init__()
+        self.scanned = None
+
+    def scan(self, targets):
+        self.scanned = targets
+        self.hostnames = {"10.0.0.1": ("www.example.com",)}
+        return {
+            "10.0.0.1": Asset(host="10.0.0.1", ip="10.0.0.1", ports=[22, 8443], sources=["nmap"]),
+            "10.0.0.2": Asset(host="10.0.0.2", ip="10.0.0.2", ports=[25], sources=["nmap"]),
+        }
+
+
+class FakeSubfinder(SubfinderScanner):
+    def __init__(self):
+        super().__init__()
+        self.scanned = None
+
+    def scan(self, targets):
+        self.scanned = targets
+        assets = [self.make_asset("www.example.com"), self.make_asset("api.example.com")]
+        return {asset.id: asset for asset in assets}
+
+
+class Plugin:
+    def __init__(self):
+        self.scanned = None
+
+    def scan(self, targets):
+        self.scanned = targets
+        return {}
+
+
+def test_is_host_name():
+    assert is_host_name("example.com")
+    assert is_host_name("localhost")
+    assert not is_host_name("10.0.0.1")
+    assert not is_host_name("10.0.0.0/28")
+    assert not is_host_name("10.0.0.1-20")
+    assert not is_host_name("2001:db8::/64")
+
+
+def test_targets_are_routed_by_kind():
+    nmap, subfinder, plugin = FakeNmap(), FakeSubfinder(), Plugin()
+    scan = CombinedScan({"subfinder": subfinder, "nmap": nmap, "plugin": plugin})
+    targets = ["example.com", "10.0.0.0/28", "10.0.0.1-20"]
+
+    scan.scan(targets)
+
+    assert subfinder.scanned == ["example.com"]
+    assert nmap.scanned == ["10.0.0.0/28", "10.0.0.1-20"]
+    assert plugin.scanned == targets
+
+
+def test_scanner_without_targets_is_not_run():
+    nmap, subfinder = FakeNmap(), FakeSubfinder()
+    scan = CombinedScan({"subfinder": subfinder, "nmap": nmap})
+
+    assets = scan.scan(["example.com"])
+
+    assert nmap.scanned is None
+    assert scan.counts == {"subfinder": 2, "nmap": 0}
+    assert sorted(assets) == ["api.example.com", "www.example.com"]
+
+
+def test_join_on_reverse_dns_name():
+    scan = CombinedScan({"subfinder": FakeSubfinder(), "nmap": FakeNmap()})
+
+    assets = scan.scan(["example.com", "10.0.0.0/30"])
+
+    assert sorted(assets) == ["10.0.0.2", "api.example.com", "www.example.com"]
+    www = assets["www.example.com"]
+    assert www.ip == "10.0.0.1"
+    assert www.ports == (22, 8443)           # measured ports replace the assumed 80/443
+    assert set(www.sources) == {"subfinder", "nmap"}
+    assert assets["api.example.com"].ports == (80, 443)
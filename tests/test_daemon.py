@@ -0,0 +1,70 @@
+import threading
+from datetime import datetime
+
+import pytest
+
+from attackdiff.daemon import JOB_STORE, CronSchedule, Daemon, StorePool
+
+
+@pytest.mark.parametrize("expression, after, expected", [
+    # steps
+    ("*/15 * * * *", datetime(2026, 10, 16, 10, 7), datetime(2026, 10, 16, 10, 15)),
+    ("0 */6 * * *", datetime(2026, 10, 16, 7, 0), datetime(2026, 10, 16, 12, 0)),
+    # ranges (Friday evening -> Monday morning)
+    ("30 9-17 * * 1-5", datetime(2026, 10, 16, 17, 30), datetime(2026, 10, 19, 9, 30)),
+    # day of month OR day of week when both are restricted (Sunday the 13th)
+    ("0 0 13 * 5", datetime(2026, 12, 11, 0, 0), datetime(2026, 12, 13, 0, 0)),
+    ("0 0 13 * 5", datetime(2026, 12, 13, 0, 0), datetime(2026, 12, 18, 0, 0)),
+    ("0 0 13 * *", datetime(2026, 12, 11, 0, 0), datetime(2026, 12, 13, 0, 0)),
+    # Sunday as 7
+    ("0 0 * * 7", datetime(2026, 10, 16, 0, 0), datetime(2026, 10, 18, 0, 0)),
+    # month and year rollover
+    ("0 0 31 * *", datetime(2026, 10, 31, 0, 0), datetime(2026, 12, 31, 0, 0)),
+    ("59 23 * * *", datetime(2026, 12, 31, 23, 59), datetime(2027, 1, 1, 23, 59)),
+    ("0 12 29 2 *", datetime(2026, 3, 1, 0, 0), datetime(2028, 2, 29, 12, 0)),
+])
+def test_next_after(expression, after, expected):
+    assert CronSchedule(expression).next_after(after) == expected
+
+
+def try_lock(pool, key):
+    """Whether another thread could lock the store now."""
+    result = []
+
+    def attempt():
+        lock = pool._locks[key]
+        result.append(lock.acquire(blocking=False))
+        if result[0]:
+            lock.release()
+
+    thread = threading.Thread(target=attempt)
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def test_job_locks_store_before_it_runs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    daemon = Daemon({"jobs": [], "workers": 1, "log": None, "snapshot_cache": 0})
+    key = str((tmp_path / JOB_STORE).resolve())
+    free = []
+
+    # nothing opened yet (e.g. a scanner still running)
+    monkeypatch.setattr("attackdiff.main.main", lambda args: free.append(try_lock(daemon.stores, key)))
+
+    assert daemon.run_job({"name": "scan", "args": ["scan"]}) == 0
+    assert free == [False]
+    assert try_lock(daemon.stores, key)
+
+
+def test_open_reuses_store_within_a_job(tmp_path):
+    pool = StorePool()
+    key = pool.lock(tmp_path / "scans")
+
+    storage = pool.open(tmp_path / "scans")
+    assert pool.open(str(tmp_path / "scans")) is storage
+    assert not try_lock(pool, key)
+    pool.release()
+
+    assert try_lock(pool, key)
+    pool.close()
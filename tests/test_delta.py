@@ -0,0 +1,105 @@
+import json
+
+from attackdiff.asset import Asset
+
+
+def state(assets):
+    return {aid: asset.to_dict() for aid, asset in assets.items()}
+
+
+def make_round(number):
+    """
+    Snapshot `number`: hosts come and go, some change ports, most stay.
+    Most assets are seen at the snapshot time; 10.0.0.5 keeps an older
+    last_seen (carried forward) and 10.0.0.6 a first_seen of its own.
+    """
+    timestamp = f"2026-01-{number + 1:02d}T00:00:00+00:00"
+    assets = {}
+    for i in range(number, number + 8):
+        ports = [22, 80 + i % 3] if i % 4 else [443 + number]
+        asset = Asset(
+            host=f"10.0.0.{i}",
+            ports=ports,
+            services=["ssh"],
+            first_seen=f"2025-{number + 1:02d}-01T00:00:00+00:00" if i == 6 else "2025-01-01T00:00:00+00:00",
+            last_seen="2025-12-01T00:00:00+00:00" if i == 5 else timestamp,
+        )
+        assets[asset.id] = asset
+    return timestamp, assets
+
+
+def save_rounds(storage, rounds, tags=()):
+    saved = []
+    for number in range(rounds):
+        timestamp, assets = make_round(number)
+        path = storage.save_snapshot(
+            assets,
+            tag=tags[number] if number < len(tags) else None,
+            scanner="nmap",
+            timestamp=timestamp
+        )
+        saved.append((path, state(assets)))
+    return saved
+
+
+def is_delta(path):
+    with open(path) as f:
+        return "delta" in json.load(f)
+
+
+def test_delta_chain_replays_every_snapshot(make_storage):
+    storage = make_storage(keyframe_interval=3)
+    saved = save_rounds(storage, 7)
+
+    assert [is_delta(path) for path, _ in saved] == [False, True, True, False, True, True, False]
+    for path, expected in saved:
+        assert state(storage.load_snapshot(path)) == expected
+
+
+def test_prune_rebases_deltas_on_deleted_keyframe(make_storage):
+    storage = make_storage(keyframe_interval=4)
+    saved = save_rounds(storage, 4)
+
+    storage.prune(keep_last=2)
+
+    kept = saved[2:]
+    assert storage.list_snapshots() == [path for path, _ in kept]
+    assert not is_delta(kept[0][0])  # became the keyframe of the chain
+    for path, expected in kept:
+        assert state(storage.load_snapshot(path)) == expected
+
+
+def test_prune_rebases_delta_past_deleted_middle_snapshot(make_storage):
+    storage = make_storage(keyframe_interval=4)
+    saved = save_rounds(storage, 4, tags=("base", "tmp", "tmp", "keep"))
+
+    storage.prune(tag="tmp", keep_last=0)
+
+    kept = [saved[0], saved[3]]
+    assert storage.list_snapshots() == [path for path, _ in kept]
+    assert is_delta(kept[1][0])
+    with open(kept[1][0]) as f:
+        assert json.load(f)["meta"]["base"] == kept[0][0].name
+    for path, expected in kept:
+        assert state(storage.load_snapshot(path)) == expected
+
+
+def test_unchanged_asset_keeps_its_timestamps(make_storage):
+    storage = make_storage(keyframe_interval=10)
+    saved = []
+    for day, (first_seen, last_seen) in enumerate((
+        ("2020-01-01T00:00:00+00:00", "2021-01-01T00:00:00+00:00"),
+        ("2021-01-01T00:00:00+00:00", "2021-06-01T00:00:00+00:00"),
+        ("2021-01-01T00:00:00+00:00", "2026-01-03T00:00:00+00:00"),
+    )):
+        asset = Asset(host="10.0.0.1", ports=[22], first_seen=first_seen, last_seen=last_seen)
+        path = storage.save_snapshot({asset.id: asset}, timestamp=f"2026-01-0{day + 1}T00:00:00+00:00")
+        saved.append((path, state({asset.id: asset})))
+
+    assert is_delta(saved[1][0]) and is_delta(saved[2][0])
+    for path, expected in saved:
+        assert state(storage.load_snapshot(path)) == expected
+
+    # inferred from the snapshot time: nothing stored for it
+    with open(saved[2][0]) as f:
+        assert "seen" not in json.load(f)["delta"]
@@ -0,0 +1,56 @@
+import os
+
+from attackdiff.diff_cache import DiffCache
+
+
+DIFF = {"new_assets": {}, "missing_assets": {}, "changed_assets": [{"host": "10.0.0.1"}]}
+
+
+def test_key_depends_on_options():
+    cache = DiffCache("unused")
+    assert cache.key("a", "b") == cache.key("a", "b", {})
+    assert cache.key("a", "b") != cache.key("a", "b", {"filter": {"port": [22]}})
+    assert cache.key("a", "b") != cache.key("b", "a")
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = DiffCache(tmp_path, max_bytes=10 ** 6)
+    for number, key in enumerate(("k1", "k2", "k3")):
+        cache.put(key, DIFF)
+        os.utime(cache._entry_path(key), ns=(number * 10 ** 9, number * 10 ** 9))
+
+    assert cache.get("k1") == DIFF  # now the most recently used
+    entry_size = cache._entry_path("k1").stat().st_size
+    cache.max_bytes = 2 * entry_size
+
+    assert cache.evict() == 1
+    assert cache.get("k2") is None
+    assert cache.get("k1") == DIFF
+    assert cache.get("k3") == DIFF
+
+
+def test_torn_entry_is_a_miss(tmp_path):
+    cache = DiffCache(tmp_path)
+    cache.put("k", DIFF)
+    with open(cache._entry_path("k"), "r+") as f:
+        f.truncate(10)
+
+    assert cache.get("k") is None
+    assert not cache._entry_path("k").exists()
+
+
+def test_invalidate_removes_entries_of_a_snapshot(tmp_path):
+    cache = DiffCache(tmp_path)
+    cache.put(cache.key("old", "mid"), DIFF)
+    cache.put(cache.key("mid", "new"), DIFF)
+    cache.put(cache.key("old", "new"), DIFF)
+
+    assert cache.invalidate("mid") == 2
+    assert cache.get(cache.key("old", "new")) == DIFF
+
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    cache = DiffCache(tmp_path / "cache", max_bytes=0)
+    cache.put("k", DIFF)
+    assert cache.get("k") is None
+    assert not cache.path.exists()
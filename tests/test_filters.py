@@ -0,0 +1,107 @@
+import pytest
+
+from attackdiff import jsonl
+from attackdiff.asset import Asset
+from attackdiff.diff import diff_assets
+from attackdiff.filters import AssetFilter
+
+
+SERVICES = {22: "ssh", 3389: "RDP"}
+
+
+def make_asset(host, ip, ports):
+    return Asset(host=host, ip=ip, ports=ports, services=[SERVICES.get(p, "http") for p in ports])
+
+
+OLD = [
+    make_asset("www.prod.example.com", "192.168.0.1", [80, 443]),
+    make_asset("db.prod.example.com", "192.168.0.2", [22]),
+    make_asset("www.dev.example.com", "192.168.1.1", [80]),
+    make_asset("10.0.0.1", "10.0.0.1", [22, 3389]),
+    make_asset("10.0.0.2", "10.0.0.2", [443]),
+    make_asset("10.0.1.1", "10.0.1.1", [22]),
+]
+NEW = [
+    make_asset("www.prod.example.com", "192.168.0.1", [22, 80, 443]),   # opened 22
+    make_asset("db.prod.example.com", "192.168.0.2", [5432]),           # closed 22
+    make_asset("api.prod.example.com", "192.168.0.3", [443]),           # new
+    make_asset("10.0.0.1", "10.0.0.1", [22, 3389]),
+    make_asset("10.0.0.3", "10.0.0.3", [3389]),                         # new
+    make_asset("10.0.1.1", "10.0.1.1", [22]),
+]
+
+FILTERS = [
+    {"hosts": ["*.PROD.example.com"]},
+    {"cidrs": ["10.0.0.0/24"]},
+    {"cidrs": ["192.168.0.0/24", "10.0.1.0/24"]},
+    {"ports": [22]},
+    {"services": ["rdp"]},
+    {"hosts": ["*.example.com"], "ports": [22, 3389]},
+]
+
+
+def reference(where):
+    """Diff of the assets matching `where` in either snapshot."""
+    old = {a.id: a for a in OLD}
+    new = {a.id: a for a in NEW}
+    ids = {aid for aid, a in old.items() if where.matches_asset(a)}
+    ids |= {aid for aid, a in new.items() if where.matches_asset(a)}
+    return diff_assets(
+        {aid: a for aid, a in old.items() if aid in ids},
+        {aid: a for aid, a in new.items() if aid in ids},
+    )
+
+
+def summary(diff):
+    return (
+        sorted(diff["new_assets"]),
+        sorted(diff["missing_assets"]),
+        sorted((c["host"], tuple(c["ports_added"]), tuple(c["ports_removed"])) for c in diff["changed_assets"]),
+    )
+
+
+def test_match_semantics():
+    where = AssetFilter(hosts=["*.prod.example.com"], ports=[22, 3389])
+    assert where.matches_asset(NEW[0])          # prod, 22
+    assert not where.matches_asset(NEW[2])      # prod, no 22 / 3389
+    assert not where.matches_asset(NEW[3])      # 22 / 3389, not prod
+
+    assert AssetFilter(cidrs=["192.168.0.0/16"]).matches_asset(NEW[0])   # by ip
+    assert AssetFilter(cidrs=["10.0.0.0/30"]).match("10.0.0.1", None, (), ())  # by host
+    assert AssetFilter(services=["rdp"]).matches_asset(NEW[4])           # case-insensitive
+
+
+def test_empty_and_bad_filters():
+    assert not AssetFilter()
+    assert AssetFilter(hosts=["x"]).identity() is not None
+    assert AssetFilter(ports=[22]).identity() is None
+    with pytest.raises(ValueError):
+        AssetFilter(cidrs=["10.0.0.0/33"])
+
+
+@pytest.mark.parametrize("snapshot_format", ["json", "jsonl", "binary"])
+@pytest.mark.parametrize("spec", FILTERS)
+def test_load_slice_matches_reference(make_storage, snapshot_format, spec):
+    storage = make_storage(snapshot_format=snapshot_format)
+    old_path = storage.save_snapshot({a.id: a for a in OLD})
+    new_path = storage.save_snapshot({a.id: a for a in NEW})
+    where = AssetFilter(**spec)
+
+    assert summary(diff_assets(*storage.load_slice(old_path, new_path, where))) == summary(reference(where))
+
+
+@pytest.mark.parametrize("spec", FILTERS)
+def test_streamed_jsonl_diff_matches_reference(make_storage, spec):
+    storage = make_storage(snapshot_format="jsonl")
+    old_path = storage.save_snapshot({a.id: a for a in OLD})
+    new_path = storage.save_snapshot({a.id: a for a in NEW})
+    where = AssetFilter(**spec)
+
+    diff = {"new_assets": {}, "missing_assets": {}, "changed_assets": []}
+    for kind, data in jsonl.iter_diff(old_path, new_path, where):
+        if kind == "changed":
+            diff["changed_assets"].append(data)
+        else:
+            diff[kind + "_assets"][data["id"]] = data
+
+    assert summary(diff) == summary(reference(where))
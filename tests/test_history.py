@@ -0,0 +1,63 @@
+from attackdiff.asset import Asset
+
+
+def save(storage, *states):
+    """One snapshot per state: {host: ports} (services named after the ports)."""
+    for hosts in states:
+        assets = {}
+        for host, ports in hosts.items():
+            asset = Asset(host=host, ports=ports, services=[f"s{p}" for p in ports])
+            assets[asset.id] = asset
+        storage.save_snapshot(assets, scanner="nmap")
+
+
+def test_timeline_events(make_storage):
+    storage = make_storage()
+    save(
+        storage,
+        {"10.0.0.1": [22], "10.0.0.2": [80]},
+        {"10.0.0.1": [22], "10.0.0.2": [80]},
+        {"10.0.0.1": [22, 443], "10.0.0.2": [80]},
+        {"10.0.0.2": [80]},
+        {"10.0.0.1": [443], "10.0.0.2": [80]},
+    )
+
+    timeline = storage.history.timeline("10.0.0.1")
+
+    assert timeline["sightings"] == 4
+    assert timeline["snapshots"] == 5
+    assert timeline["present"] is True
+    assert [e["event"] for e in timeline["events"]] == ["first_seen", "changed", "missing", "seen_again"]
+    changed = timeline["events"][1]
+    assert (changed["ports_added"], changed["ports_removed"]) == ([443], [])
+    assert changed["services_added"] == ["s443"]
+    again = timeline["events"][3]
+    assert (again["ports_added"], again["ports_removed"]) == ([], [22])
+
+    assert storage.history.timeline("10.9.9.9") is None
+
+
+def test_prune_and_rebuild(make_storage):
+    storage = make_storage()
+    save(storage, {"10.0.0.1": [22]}, {"10.0.0.1": [22, 80]}, {"10.0.0.1": [80]})
+
+    storage.prune(keep_last=2)
+    assert storage.history.timeline("10.0.0.1")["snapshots"] == 2
+
+    storage.rebuild_history()
+    events = storage.history.timeline("10.0.0.1")["events"]
+    assert [e["event"] for e in events] == ["first_seen", "changed"]
+
+
+def test_unnamed_services(make_storage):
+    storage = make_storage()
+    for ports, services in (([22], ["ssh"]), ([22, 8000], ["ssh", None]), ([8000, 8443], [None, "https"])):
+        asset = Asset(host="10.0.0.1", ports=ports, services=services)
+        storage.save_snapshot({asset.id: asset}, scanner="nmap")
+
+    events = storage.history.timeline("10.0.0.1")["events"]
+
+    assert [e["event"] for e in events] == ["first_seen", "changed", "changed"]
+    assert events[1]["services"] == ["ssh"]
+    assert events[2]["services_added"] == ["https"]
+    assert events[2]["services_removed"] == ["ssh"]
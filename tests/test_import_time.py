@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from benchmarks.import_time import DRIVER, FORBIDDEN, SNAPSHOT_MODULES, make_store
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# cumulative import time over a bare interpreter, per command
+BUDGET_MS = 100
+
+COMMANDS = [
+    ["list", "--short"],
+    ["prune", "--keep-last", "10", "--dry-run"],
+    ["config"],
+]
+
+
+def import_times(args: list, cwd: Path) -> dict:
+    """{module: cumulative us} of the top-level imports of `python -X importtime <args>`."""
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime"] + args,
+        cwd=cwd, env=env, capture_output=True, text=True, check=False
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.rstrip()] = int(cumulative)
+    return times
+
+
+def top_level_ms(times: dict) -> float:
+    return sum(us for name, us in times.items() if not name.startswith(" ")) / 1000
+
+
+@pytest.fixture(scope="module")
+def store(tmp_path_factory):
+    base = tmp_path_factory.mktemp("import-time")
+    make_store(base)
+    return base
+
+
+@pytest.mark.parametrize("command", COMMANDS, ids=" ".join)
+def test_light_command_imports(store, command):
+    driver = ["-c", DRIVER, str(store / "modules.txt")] + command
+    bare = min(top_level_ms(import_times(["-c", "pass"], store)) for _ in range(3))
+
+    runs = [import_times(driver, store) for _ in range(3)]
+    modules = {name.strip() for name in runs[0]}
+
+    forbidden = [
+        f for f in FORBIDDEN + SNAPSHOT_MODULES
+        if any(m == f or m.startswith(f + ".") for m in modules)
+    ]
+    assert forbidden == []
+    assert min(top_level_ms(times) for times in runs) - bare < BUDGET_MS
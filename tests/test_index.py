@@ -0,0 +1,82 @@
+import json
+import os
+
+from attackdiff.asset import Asset
+from attackdiff.index import SnapshotIndex, file_sha256
+
+
+def counting_describe(calls):
+    def describe(path):
+        calls.append(path.name)
+        return {"sha256": file_sha256(path)}
+
+    return describe
+
+
+def test_refresh_redescribes_changed_files(tmp_path):
+    a, b = tmp_path / "a.json", tmp_path / "b.json"
+    a.write_text("{}")
+    b.write_text("[]")
+    calls = []
+    describe = counting_describe(calls)
+
+    SnapshotIndex(tmp_path).refresh([a, b], describe)
+    assert calls == ["a.json", "b.json"]
+
+    # a new instance reads the saved index: nothing to describe
+    calls.clear()
+    SnapshotIndex(tmp_path).refresh([a, b], describe)
+    assert calls == []
+
+    # size changed
+    a.write_text('{"x": 1}')
+    # same size, mtime changed
+    b.write_text("{}")
+    st = b.stat()
+    os.utime(b, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    entries = SnapshotIndex(tmp_path).refresh([a, b], describe)
+    assert calls == ["a.json", "b.json"]
+    assert [e["sha256"] for e in entries] == [file_sha256(a), file_sha256(b)]
+    assert entries[0]["size"] == a.stat().st_size
+    assert entries[1]["mtime_ns"] == b.stat().st_mtime_ns
+
+
+def test_refresh_removes_deleted_files(tmp_path):
+    a, b = tmp_path / "a.json", tmp_path / "b.json"
+    a.write_text("{}")
+    b.write_text("[]")
+    describe = counting_describe([])
+    SnapshotIndex(tmp_path).refresh([a, b], describe)
+
+    b.unlink()
+    entries = SnapshotIndex(tmp_path).refresh([a], describe)
+
+    assert [e["name"] for e in entries] == ["a.json"]
+    with open(tmp_path / ".meta" / "index.json") as f:
+        assert list(json.load(f)["snapshots"]) == ["a.json"]
+
+
+def test_store_notices_snapshots_edited_outside(make_storage):
+    storage = make_storage()
+    web = Asset(host="www.example.com", ports=[443])
+    first = storage.save_snapshot({web.id: web}, tag="baseline")
+    second = storage.save_snapshot({web.id: web})
+    storage.snapshot_entries()
+
+    # add an asset and retag the snapshot by hand
+    with open(first) as f:
+        raw = json.load(f)
+    db = Asset(host="db.example.com", ports=[5432])
+    raw["assets"][db.id] = db.to_dict()
+    raw["meta"]["tag"] = "edited"
+    with open(first, "w") as f:
+        json.dump(raw, f)
+    second.unlink()
+
+    entries = make_storage().snapshot_entries()
+
+    assert [e["name"] for e in entries] == [first.name]
+    assert entries[0]["tag"] == "edited"
+    assert entries[0]["assets"] == 2
+    assert entries[0]["sha256"] == file_sha256(first)
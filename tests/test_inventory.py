@@ -0,0 +1,75 @@
+import json
+
+from attackdiff.asset import Asset
+from attackdiff.storage import AssetStorage
+
+
+def asset(number, port=22):
+    return Asset(host=f"10.0.0.{number}", ports=[port], sources=["nmap"])
+
+
+def inventory(storage):
+    return {aid: a.ports for aid, a in storage.assets.items()}
+
+
+def test_torn_record_is_dropped_and_cut_off(tmp_path):
+    path = tmp_path / "inventory.json"
+
+    with AssetStorage(path, compact_min=1000) as storage:
+        storage.upsert_many([asset(1), asset(2)])
+        storage.remove("10.0.0.1")
+        storage.upsert(asset(3, 443))
+
+    # a crash in the middle of writing the next record
+    torn = json.dumps({"op": "put", "id": "10.0.0.4", "asset": asset(4).to_dict()})
+    with open(storage.journal_path, "a") as f:
+        f.write(torn[:len(torn) // 2])
+    size = storage.journal_path.stat().st_size
+
+    storage = AssetStorage(path, compact_min=1000)
+    storage.load()
+
+    assert inventory(storage) == {"10.0.0.2": (22,), "10.0.0.3": (443,)}
+    assert storage.journal_path.stat().st_size < size
+
+    # the next record starts on a line of its own
+    storage.upsert(asset(5))
+    storage.close()
+
+    reloaded = AssetStorage(path, compact_min=1000)
+    reloaded.load()
+    assert inventory(reloaded) == {"10.0.0.2": (22,), "10.0.0.3": (443,), "10.0.0.5": (22,)}
+
+
+def test_compaction_keeps_inventory(tmp_path):
+    path = tmp_path / "inventory.json"
+
+    with AssetStorage(path, compact_min=10, background=False) as storage:
+        for round_ in range(5):
+            storage.upsert_many([asset(n, 22 + round_) for n in range(8)])
+        storage.remove("10.0.0.0")
+        expected = inventory(storage)
+
+    assert path.exists()
+    reloaded = AssetStorage(path)
+    reloaded.load()
+    assert inventory(reloaded) == expected
+    assert reloaded._journal_records < 10
+
+
+def test_segment_of_interrupted_compaction_is_replayed(tmp_path):
+    path = tmp_path / "inventory.json"
+
+    with AssetStorage(path, compact_min=1000) as storage:
+        storage.upsert_many([asset(1), asset(2)])
+
+    # rotated, but the checkpoint was never written
+    storage.journal_path.rename(storage.journal_path.with_name(storage.journal_path.name + ".1"))
+
+    with AssetStorage(path, compact_min=1000) as storage:
+        storage.load()
+        storage.upsert(asset(3))
+
+    reloaded = AssetStorage(path)
+    reloaded.load()
+    assert sorted(reloaded.assets) == ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
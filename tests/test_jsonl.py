@@ -0,0 +1,68 @@
+import pytest
+
+from attackdiff import jsonl
+from attackdiff.asset import Asset
+from attackdiff.diff import diff_assets
+from attackdiff.filters import AssetFilter
+
+
+STAMP = "2026-01-01T00:00:00+00:00"
+
+
+def asset(host, ports, services):
+    return Asset(host=host, ip=host, ports=ports, services=services, first_seen=STAMP, last_seen=STAMP)
+
+
+OLD = [
+    asset("10.0.0.1", [22], ["ssh"]),
+    asset("10.0.0.2", [80, 443], ["http", "https"]),
+    asset("10.0.0.3", [3389], ["rdp"]),                # removed
+    asset("10.0.0.4", [80], ["http"]),
+    asset("10.0.0.6", [25], ["smtp"]),
+]
+NEW = [
+    asset("10.0.0.1", [22], ["ssh"]),                  # unchanged
+    asset("10.0.0.2", [443, 8443], ["http", "https"]),  # ports changed
+    asset("10.0.0.4", [80], ["nginx"]),                # services-only change
+    asset("10.0.0.5", [5432], ["postgresql"]),         # added
+    asset("10.0.0.6", [25, 587], ["smtp", "submission"]),
+]
+
+
+def normalize(diff):
+    return {
+        "new_assets": {aid: a.to_dict() for aid, a in diff["new_assets"].items()},
+        "missing_assets": {aid: a.to_dict() for aid, a in diff["missing_assets"].items()},
+        "changed_assets": sorted(diff["changed_assets"], key=lambda c: c["host"]),
+    }
+
+
+def only(assets, where):
+    return {a.id: a for a in assets if where is None or where.matches_asset(a)}
+
+
+@pytest.mark.parametrize("where", [
+    None,
+    AssetFilter(cidrs=["10.0.0.0/30"]),
+    AssetFilter(services=["http"]),
+    AssetFilter(ports=[25, 3389]),
+])
+def test_iter_diff_matches_diff_assets(make_storage, where):
+    storage = make_storage(snapshot_format="jsonl")
+    old_path = storage.save_snapshot({a.id: a for a in OLD})
+    new_path = storage.save_snapshot({a.id: a for a in NEW})
+
+    # the reference: diff_assets of the assets matching in either snapshot
+    ids = set(only(OLD, where)) | set(only(NEW, where))
+    expected = diff_assets(
+        {a.id: a for a in OLD if a.id in ids},
+        {a.id: a for a in NEW if a.id in ids},
+    )
+
+    streamed = jsonl.collect_diff(jsonl.iter_diff(old_path, new_path, where))
+
+    assert normalize(streamed) == normalize(expected)
+    if where is None:
+        assert sorted(streamed["new_assets"]) == ["10.0.0.5"]
+        assert sorted(streamed["missing_assets"]) == ["10.0.0.3"]
+        assert [c["host"] for c in normalize(streamed)["changed_assets"]] == ["10.0.0.2", "10.0.0.4", "10.0.0.6"]
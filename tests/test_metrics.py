@@ -0,0 +1,28 @@
+import json
+
+import pytest
+
+from attackdiff.asset import Asset
+from attackdiff.main import main
+from attackdiff.storage import SnapshotStorage
+
+
+def test_ndjson_diff_stdout_stays_ndjson_with_metrics(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    storage = SnapshotStorage("data/scans")
+    web = Asset(host="10.0.0.1", ports=[80], sources=["nmap"])
+    storage.save_snapshot({web.id: web}, timestamp="2026-01-01T00:00:00+00:00")
+    web = Asset(host="10.0.0.1", ports=[80, 443], sources=["nmap"])
+    db = Asset(host="10.0.0.2", ports=[5432], sources=["nmap"])
+    storage.save_snapshot({web.id: web, db.id: db}, timestamp="2026-01-02T00:00:00+00:00")
+
+    with pytest.raises(SystemExit) as exit:
+        main(["diff", "--last", "--ndjson", "--metrics", str(tmp_path / "metrics.json"),
+              "--profile", str(tmp_path / "diff.prof")])
+    assert exit.value.code == 0
+
+    out, err = capsys.readouterr()
+    events = [json.loads(line) for line in out.splitlines()]
+    assert [event["event"] for event in events] == ["added", "changed"]
+    assert "Metrics written" in err and "Profile written" in err
+    assert (tmp_path / "metrics.json").exists()
@@ -0,0 +1,159 @@
+import io
+import json
+
+import pytest
+
+from attackdiff import output
+from attackdiff.asset import Asset
+from attackdiff.output import (
+    diff_to_json,
+    iter_diff_events,
+    normalize_diff,
+    print_diff,
+    write_json,
+    write_ndjson,
+    write_text,
+)
+
+
+STAMP = "2026-01-01T00:00:00+00:00"
+
+
+def asset(host, ports, services):
+    return Asset(host=host, ip=host, ports=ports, services=services, first_seen=STAMP, last_seen=STAMP)
+
+
+def changed(host, ports_added=(), ports_removed=(), services_added=(), services_removed=()):
+    return {
+        "host": host,
+        "ports_added": list(ports_added),
+        "ports_removed": list(ports_removed),
+        "services_added": list(services_added),
+        "services_removed": list(services_removed),
+    }
+
+
+def make_diff(new=0, missing=0, changes=0):
+    new_assets = [asset(f"10.0.1.{i}", [443, 80], ["https", "http"]) for i in range(new)]
+    missing_assets = [asset(f"10.0.2.{i}", [22], ["ssh"]) for i in range(missing)]
+    return {
+        "new_assets": {a.id: a for a in new_assets},
+        "missing_assets": {a.id: a for a in missing_assets},
+        "changed_assets": [
+            changed(f"10.0.3.{i}", ports_added=[8080], services_removed=["ftp"] if i % 2 else [])
+            for i in range(changes)
+        ],
+    }
+
+
+DIFFS = {
+    "full": make_diff(new=5, missing=4, changes=7),
+    "empty": make_diff(),
+    "new only": make_diff(new=2),
+    "missing only": make_diff(missing=2),
+    "changed only": make_diff(changes=3),
+    "services only": {"changed_assets": [changed("web", services_added=["nginx"], services_removed=["apache"])]},
+}
+
+
+@pytest.fixture(params=["assets", "normalized"])
+def as_given(request):
+    """The diffs with Asset objects (as diff_assets) or normalized (as the diff cache)."""
+    return (lambda diff: diff) if request.param == "assets" else normalize_diff
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(output, "_CHUNK", 3)
+
+
+def reference_text(diff):
+    """The CLI output as print_diff wrote it, one print() at a time."""
+    buffer = io.StringIO()
+
+    def emit(*texts):
+        print(*texts, file=buffer)
+
+    new = diff.get("new_assets", {})
+    removed = diff.get("missing_assets", {})
+    changes = diff.get("changed_assets", [])
+
+    if not new and not removed and not changes:
+        emit("[=] No changes detected")
+        return buffer.getvalue()
+
+    for assets, title, sign in ((new, "[+] New assets", "+"), (removed, "[-] Removed assets", "-")):
+        if assets:
+            emit(output._RULE + "\n")
+            emit("\n" + title)
+            for a in assets.values():
+                a = a if isinstance(a, dict) else a.to_dict()
+                emit(f"  {sign} {a['host']} \n         ports : {sorted(a['ports'])}\n"
+                     f"         services : {sorted(a['services'])}")
+            emit("\n" + output._RULE)
+
+    if changes:
+        emit(output._RULE + "\n")
+        emit("\n[!] Changed assets")
+        for i in changes:
+            emit(f"  ~ {i['host']}")
+            if i.get("ports_added"):
+                emit(f"      + ports : {i['ports_added']}")
+            if i.get("services_added"):
+                emit(f"      + services : {i['services_added']}")
+            emit("\n")
+            if i.get("ports_removed"):
+                emit(f"      - ports : {i['ports_removed']}")
+            if i.get("services_removed"):
+                emit(f"      - services : {i['services_removed']}")
+            emit("\n")
+
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("name", DIFFS)
+def test_write_json_matches_diff_to_json(name, as_given):
+    diff = as_given(DIFFS[name])
+    out = io.StringIO()
+
+    write_json(diff, out)
+
+    assert out.getvalue() == diff_to_json(diff)
+    assert not out.getvalue().endswith("\n")
+    json.loads(out.getvalue())
+
+
+def test_write_json_missing_sections():
+    out = io.StringIO()
+    write_json({}, out)
+    assert out.getvalue() == diff_to_json({})
+    assert json.loads(out.getvalue()) == {"new_assets": {}, "missing_assets": {}, "changed_assets": []}
+
+
+@pytest.mark.parametrize("name", DIFFS)
+def test_write_text_matches_print_diff(name, as_given, capsys):
+    diff = as_given(DIFFS[name])
+    out = io.StringIO()
+
+    write_text(diff, out)
+    print_diff(diff)
+
+    assert out.getvalue() == capsys.readouterr().out == reference_text(diff)
+
+
+@pytest.mark.parametrize("name", DIFFS)
+def test_write_ndjson_matches_iter_diff_events(name, as_given):
+    diff = as_given(DIFFS[name])
+    events = list(iter_diff_events(diff))
+    out = io.StringIO()
+
+    counts = write_ndjson(iter_diff_events(diff), out)
+
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert out.getvalue().endswith("\n") or not lines
+    assert lines == [
+        {"event": "changed", **data} if kind == "changed"
+        else {"event": {"new": "added", "missing": "removed"}[kind], "id": data["id"], **data}
+        for kind, data in events
+    ]
+    assert counts == {kind: sum(1 for k, _ in events if k == kind) for kind in ("new", "missing", "changed")}
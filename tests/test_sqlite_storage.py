@@ -0,0 +1,121 @@
+import pytest
+
+from attackdiff.asset import Asset
+from attackdiff.main import main
+from attackdiff.sqlite_storage import SqliteSnapshotStorage
+from attackdiff.storage import SnapshotStorage, load_store_config, open_storage
+
+
+def make_round(day):
+    stamp = f"2026-01-0{day}T00:00:00+00:00"
+    ports = [80, 443] if day % 2 else [80]
+    assets = [
+        Asset(host="www.example.com", ip="192.0.2.1", ports=ports, services=["http", "https"][:len(ports)],
+              sources=["nmap", "subfinder"], first_seen="2026-01-01T00:00:00+00:00", last_seen=stamp),
+        Asset(host="10.0.0.1", ip="10.0.0.1", ports=[22], services=["ssh"], sources=["nmap"],
+              first_seen=stamp, last_seen=stamp),
+    ]
+    return stamp, {a.id: a for a in assets}
+
+
+def state(assets):
+    return {aid: a.to_dict() for aid, a in assets.items()}
+
+
+def save_rounds(storage, days, tagged=True):
+    saved = []
+    for day in days:
+        stamp, assets = make_round(day)
+        tag = f"day{day}" if tagged else None
+        path = storage.save_snapshot(assets, tag=tag, scanner="nmap", timestamp=stamp)
+        saved.append((path, stamp, assets))
+    return saved
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = SqliteSnapshotStorage(tmp_path / "scans")
+    yield storage
+    storage.close()
+
+
+def test_round_trip_keeps_tags_and_timestamps(storage):
+    saved = save_rounds(storage, [1, 2, 3])
+
+    for day, (path, stamp, assets) in enumerate(saved, 1):
+        assert state(storage.load_snapshot(path)) == state(assets)
+        assert storage.load_meta(path) == {"timestamp": stamp, "tag": f"day{day}", "scanner": "nmap"}
+
+    assert storage.list_snapshots() == [path for path, _, _ in saved]
+    assert storage.find_snapshot_by_tag("day2") == saved[1][0]
+    assert storage.get_latest_snapshot() == saved[2][0]
+    assert [(e["tag"], e["timestamp"], e["assets"]) for e in storage.snapshot_entries()] == [
+        (f"day{day}", stamp, 2) for day, (_, stamp, _) in enumerate(saved, 1)
+    ]
+
+
+def test_prune_deletes_rows(storage):
+    saved = save_rounds(storage, [1]) + save_rounds(storage, [2, 3, 4, 5], tagged=False)
+    kept = [saved[0], saved[3], saved[4]]  # tagged snapshots are kept
+
+    storage.prune(keep_last=2, dry_run=True)
+    assert len(storage.list_snapshots()) == 5
+
+    result = storage.prune(keep_last=2)
+
+    assert [d["path"] for d in result["decisions"] if d["action"] == "delete"] == [saved[2][0], saved[1][0]]
+    assert storage.list_snapshots() == [path for path, _, _ in kept]
+    for path, _, assets in kept:
+        assert state(storage.load_snapshot(path)) == state(assets)
+    for table in ("asset", "port", "service"):
+        snapshots = storage.conn.execute(f"SELECT COUNT(DISTINCT snapshot_id) FROM {table}").fetchone()[0]
+        assert snapshots == 3
+
+
+def test_migrate_from_json_store(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    json_storage = SnapshotStorage("data/scans", keyframe_interval=2)  # a delta snapshot too
+    saved = save_rounds(json_storage, [1, 2, 3])
+
+    with pytest.raises(SystemExit) as exit:
+        main(["migrate", "--to", "sqlite"])
+    assert exit.value.code == 0
+    assert "Imported 3 snapshot(s)" in capsys.readouterr().out
+
+    assert load_store_config("data/scans")["backend"] == "sqlite"
+    storage = open_storage("data/scans")
+    assert isinstance(storage, SqliteSnapshotStorage)
+
+    entries = storage.snapshot_entries()
+    assert [(e["tag"], e["timestamp"]) for e in entries] == [(f"day{d}", stamp) for d, (_, stamp, _) in enumerate(saved, 1)]
+    for entry, (_, _, assets) in zip(entries, saved):
+        assert state(storage.load_snapshot(entry["path"])) == state(assets)
+    storage.close()
+
+    with pytest.raises(SystemExit, match="already uses the sqlite backend"):
+        main(["migrate", "--to", "sqlite"])
+
+
+@pytest.mark.parametrize("quick", [True, False])
+def test_integrity_problems(storage, quick):
+    save_rounds(storage, [1, 2])
+    assert storage.integrity_problems(quick=quick) == []
+
+
+def test_integrity_problems_reports_stale_index(tmp_path):
+    storage = SqliteSnapshotStorage(tmp_path / "scans")
+    save_rounds(storage, [1, 2])
+
+    # the index definition no longer matches its entries: only the full check reads indexes
+    with storage.conn:
+        storage.conn.execute("PRAGMA writable_schema = ON")
+        storage.conn.execute(
+            "UPDATE sqlite_master SET sql = 'CREATE INDEX snapshot_by_tag ON snapshot (scanner, name)' "
+            "WHERE name = 'snapshot_by_tag'"
+        )
+    storage.close()
+
+    storage = SqliteSnapshotStorage(tmp_path / "scans")
+    assert storage.integrity_problems(quick=True) == []
+    assert storage.integrity_problems(quick=False)
+    storage.close()